@@ -0,0 +1,59 @@
+# Agrégation mensuelle vectorisée des séries journalières Open-Meteo
+import numpy as np
+
+RAIN_DAY_MM = 1.0
+
+
+def column(daily, name, n):
+    values = daily.get(name)
+    if values is None:
+        return np.full(n, np.nan)
+    # None (valeur manquante chez Open-Meteo) -> NaN
+    return np.array(values, dtype=np.float64)
+
+
+def rounded(values):
+    return [None if np.isnan(v) else round(float(v), 2) for v in values]
+
+
+def monthly_aggregates(daily):
+    """Agrège `daily` (time, temperature_2m_max/min[/mean], precipitation_sum) par mois."""
+    times = np.array(daily.get("time", []), dtype="datetime64[D]")
+    n = len(times)
+    if n == 0:
+        return []
+    t_max = column(daily, "temperature_2m_max", n)
+    t_min = column(daily, "temperature_2m_min", n)
+    t_mean = column(daily, "temperature_2m_mean", n)
+    # Sans moyenne journalière fournie : (max + min) / 2
+    t_mean = np.where(np.isnan(t_mean), (t_max + t_min) / 2, t_mean)
+    precip = column(daily, "precipitation_sum", n)
+
+    order = np.argsort(times, kind="stable")
+    months = times[order].astype("datetime64[M]")
+    keys, starts, inverse = np.unique(months, return_index=True, return_inverse=True)
+    t_max, t_min, t_mean, precip = t_max[order], t_min[order], t_mean[order], precip[order]
+
+    def nan_mean(values):
+        ok = ~np.isnan(values)
+        sums = np.bincount(inverse, weights=np.where(ok, values, 0.0), minlength=len(keys))
+        counts = np.bincount(inverse, weights=ok, minlength=len(keys))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    days = np.bincount(inverse, minlength=len(keys))
+    has_precip = np.bincount(inverse, weights=~np.isnan(precip), minlength=len(keys)) > 0
+    precip_sum = np.bincount(inverse, weights=np.nan_to_num(precip), minlength=len(keys))
+    rain_days = np.bincount(inverse, weights=precip >= RAIN_DAY_MM, minlength=len(keys))
+    with np.errstate(invalid="ignore"):
+        # fmin/fmax ignorent les NaN ; les mois sont des tranches contiguës après le tri
+        month_min = np.fmin.reduceat(t_min, starts)
+        month_max = np.fmax.reduceat(t_max, starts)
+
+    return [
+        {"month": str(k), "temperature_avg": avg, "temperature_min": lo, "temperature_max": hi,
+         "precipitation": p if ok else None, "days": int(d), "rain_days": int(r)}
+        for k, avg, lo, hi, p, ok, d, r in zip(
+            keys, rounded(nan_mean(t_mean)), rounded(month_min), rounded(month_max),
+            rounded(precip_sum), has_precip, days, rain_days)
+    ]
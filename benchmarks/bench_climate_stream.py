@@ -0,0 +1,94 @@
+# Benchmark mémoire : séries climat 30 ans téléchargées en parallèle, raw=true (corps bufferisé
+# et mis en cache) vs stream=true (relayé par morceaux). Pic de RSS du processus de l'API.
+# Usage : python -m benchmarks.bench_climate_stream [--requests 200] [--concurrency 100]
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.stub_upstream import StubServer, free_port
+
+HEADERS = {"x-rapidapi-host": "bench"}
+
+
+def serve(port, upstream):
+    # Processus fils : l'API réelle, Open-Meteo redirigé vers le stub
+    import uvicorn
+
+    import main
+    from benchmarks.stub_upstream import RedirectTransport
+    main.upstream.transport = RedirectTransport(upstream)
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def memory_kb(pid, field):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+
+async def download(base, mode, total, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, headers=HEADERS, limits=limits, timeout=120) as client:
+        async def one(i):
+            # Un point différent par requête : pas de cache ni de single-flight partagés
+            params = {"lat": 40 + i * 0.01, "lon": 2.0, mode: "true"}
+            async with sem:
+                size = 0
+                async with client.stream("GET", "/point/climate", params=params) as r:
+                    assert r.status_code == 200, r.status_code
+                    async for chunk in r.aiter_bytes():
+                        size += len(chunk)
+                return size
+
+        start = time.perf_counter()
+        sizes = await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - start, sum(sizes)
+
+
+def run(mode, upstream, total, concurrency):
+    port = free_port()
+    env = {**os.environ, "METEO_DISK_CACHE": "", "METEO_PREWARM_ENABLED": "0", "METEO_RATE_LIMIT_ENABLED": "0"}
+    proc = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_climate_stream", "--serve", str(port),
+                             "--upstream", upstream], env=env)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        while True:
+            try:
+                httpx.get(base + "/ping")
+                break
+            except httpx.TransportError:
+                time.sleep(0.05)
+        idle = memory_kb(proc.pid, "VmRSS")
+        elapsed, size = asyncio.run(download(base, mode, total, concurrency))
+        peak = memory_kb(proc.pid, "VmHWM")
+    finally:
+        proc.terminate()
+        proc.wait()
+    return idle, peak, elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--upstream", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve, args.upstream)
+    with StubServer() as upstream:
+        for label, mode in (("raw=true (bufferisé)", "raw"), ("stream=true", "stream")):
+            idle, peak, elapsed, size = run(mode, upstream, args.requests, args.concurrency)
+            print(f"{label:22s}: RSS {idle / 1024:6.1f} Mo au repos -> pic {peak / 1024:6.1f} Mo "
+                  f"(+{(peak - idle) / 1024:5.1f} Mo), {size / 2**20:6.1f} Mo en {elapsed:5.2f} s")
+
+
+if __name__ == "__main__":
+    main()
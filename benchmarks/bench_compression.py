@@ -0,0 +1,78 @@
+# Benchmark compression : octets transférés et CPU par requête (entrée chaude du cache),
+# variantes pré-compressées à la mise en cache vs compression à la volée par le middleware
+# (le CPU mesuré inclut la décompression côté client httpx, dans le même processus)
+# Usage : python -m benchmarks.bench_compression [--requests 300]
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("METEO_DISK_CACHE", "")
+# Rafale de requêtes anonymes : hors du seau par client
+os.environ.setdefault("METEO_RATE_LIMIT_ENABLED", "0")
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+from benchmarks.stub_upstream import StubUpstream  # noqa: E402
+from compression import AVAILABLE  # noqa: E402
+from normals import NormalsStore  # noqa: E402
+
+ENDPOINTS = [
+    "/station/hourly?station=FRPARIS",
+    "/station/daily?station=FRPARIS",
+    "/station/climate?station=FRPARIS",
+    "/station/climate?station=FRPARIS&raw=true",
+]
+
+
+async def measure(client, url, encoding, total):
+    headers = {"Accept-Encoding": encoding}
+    r = await client.get(url, headers=headers)  # remplit le cache
+    assert r.status_code == 200
+    wire = r.num_bytes_downloaded
+    cpu = time.process_time()
+    for _ in range(total):
+        await client.get(url, headers=headers)
+    return wire, (time.process_time() - cpu) / total * 1e6
+
+
+async def run(total, precompressed):
+    encode = main.response_cache.encode
+    if not precompressed:
+        main.response_cache.encode = None
+    main.response_cache.clear()
+    transport = httpx.ASGITransport(app=main.app)
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     headers={"x-rapidapi-host": "bench"}) as client:
+            for url in ENDPOINTS:
+                for encoding in ("identity", *AVAILABLE):
+                    results[url, encoding] = await measure(client, url, encoding, total)
+    finally:
+        main.response_cache.encode = encode
+    return results
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    main.upstream.transport = httpx.ASGITransport(app=StubUpstream().app)
+    with tempfile.TemporaryDirectory() as tmp:
+        main.normals_store = NormalsStore(tmp)
+        before = asyncio.run(run(args.requests, precompressed=False))
+        after = asyncio.run(run(args.requests, precompressed=True))
+    for url in ENDPOINTS:
+        print(url)
+        for encoding in ("identity", *AVAILABLE):
+            wire, cpu_fly = before[url, encoding]
+            _, cpu_pre = after[url, encoding]
+            print(f"  {encoding:8s}: {wire / 1024:8.1f} Ko  CPU à la volée {cpu_fly:8.1f} µs/req"
+                  f"  pré-compressé {cpu_pre:8.1f} µs/req")
+
+
+if __name__ == "__main__":
+    main_()
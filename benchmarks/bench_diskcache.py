@@ -0,0 +1,42 @@
+# Benchmark du cache disque : latence de lecture d'une clé chaude (hourly 7 jours, climat 30 ans)
+# Usage : python -m benchmarks.bench_diskcache
+import json
+import os
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.stub_upstream import daily_payload, hourly_payload
+from cache import make_key
+from diskcache import DiskCache
+
+
+def read_us(cache, key, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        cache.get(key)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        writer = DiskCache(path, 1 << 30)
+        payloads = {
+            "hourly (7 j)": json.dumps(hourly_payload(48.8566, 2.3522)).encode(),
+            "climat (30 ans)": json.dumps(daily_payload(48.8566, 2.3522, date(1991, 1, 1), date(2020, 12, 31), [
+                "temperature_2m_max", "temperature_2m_min", "temperature_2m_mean", "precipitation_sum"])).encode(),
+        }
+        # Lecture depuis une autre connexion, comme un autre worker
+        reader = DiskCache(path, 1 << 30)
+        for name, body in payloads.items():
+            key = make_key("https://api.open-meteo.com/v1/forecast", {"dataset": name})
+            before = writer.size()
+            writer.set(key, body, ttl=3600)
+            compressed = writer.size() - before
+            print(f"{name:16} {len(body) / 1024:8.1f} Ko ({compressed / 1024:6.1f} Ko compressé)"
+                  f"  lecture : {read_us(reader, key, 500):7.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
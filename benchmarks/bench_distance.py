@@ -0,0 +1,48 @@
+# Benchmark distances : haversine scalaire en boucle (avant) vs noyau NumPy (après)
+# Usage : python -m benchmarks.bench_distance [--stations 500] [--points 1000]
+import argparse
+import random
+import time
+
+from distance import StationArrays
+from main import haversine
+from spatial import StationIndex
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stations", type=int, default=500)
+    parser.add_argument("--points", type=int, default=1000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    stations = [{"lat": rng.uniform(-90, 90), "lon": rng.uniform(-180, 180)} for _ in range(args.stations)]
+    points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(args.points)]
+    lats, lons = [p[0] for p in points], [p[1] for p in points]
+    arrays = StationArrays([s["lat"] for s in stations], [s["lon"] for s in stations])
+    index = StationIndex([s["lat"] for s in stations], [s["lon"] for s in stations])
+
+    def scalar():
+        for lat, lon in points:
+            sorted(haversine(lat, lon, s["lat"], s["lon"]) for s in stations)[:5]
+
+    pairs = args.stations * args.points
+    t_scalar = timed(scalar)
+    t_tree = timed(lambda: [index.query(lat, lon, k=5) for lat, lon in points])
+    t_vector = timed(lambda: arrays.nearest_many(lats, lons, k=5))
+    t_matrix = timed(lambda: arrays.distances_many(lats[:256], lons[:256]))
+    print(f"{args.points} points x {args.stations} stations, k=5")
+    print(f"scalaire + tri     : {t_scalar * 1000:9.1f} ms")
+    print(f"k-d tree par point : {t_tree * 1000:9.1f} ms")
+    print(f"nearest_many NumPy : {t_vector * 1000:9.1f} ms  (x{t_scalar / t_vector:.0f} vs scalaire)")
+    print(f"débit du noyau     : {256 * args.stations / t_matrix / 1e6:9.1f} M distances/s"
+          f"  (scalaire : {pairs / t_scalar / 1e6:.2f} M/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Benchmark du chemin de réponse pour 7 jours horaires : dict renvoyé à FastAPI (avant),
+# octets Open-Meteo relayés tels quels, et transformation sérialisée par fastjson (après)
+# Usage : python -m benchmarks.bench_json [--requests 2000]
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+from benchmarks.stub_upstream import hourly_payload
+from current import current_conditions
+from fastjson import ORJSON_AVAILABLE, FastJSONResponse, loads
+
+BODY = json.dumps(hourly_payload(48.8566, 2.3522)).encode()
+
+app = FastAPI()
+
+
+@app.get("/dict")
+async def as_dict():
+    # Ancien chemin : resp.json() puis jsonable_encoder + JSONResponse
+    return json.loads(BODY)
+
+
+@app.get("/passthrough")
+async def passthrough():
+    return Response(BODY, media_type="application/json")
+
+
+@app.get("/transform")
+async def transform():
+    data = loads(BODY)
+    data["current"] = current_conditions(data, "FRPARIS")
+    return FastJSONResponse(data)
+
+
+async def measure(path, total):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)
+        wall, cpu = time.perf_counter(), time.process_time()
+        for _ in range(total):
+            r = await client.get(path)
+            assert r.status_code == 200
+        return ((time.perf_counter() - wall) / total * 1e6, (time.process_time() - cpu) / total * 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    print(f"payload horaire 7 jours : {len(BODY) / 1024:.0f} Ko, orjson : {'oui' if ORJSON_AVAILABLE else 'non'}")
+    for label, path in (("dict + jsonable_encoder", "/dict"), ("octets relayés", "/passthrough"),
+                        ("transformation fastjson", "/transform")):
+        wall, cpu = asyncio.run(measure(path, args.requests))
+        print(f"{label:24s}: {wall:8.1f} µs/req  CPU {cpu:8.1f} µs/req")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Benchmark du coût de l'instrumentation : MetricsMiddleware autour d'une app ASGI minimale
+# et étapes `stage()` : 2 pour une requête servie depuis le cache (auth, cache), 6 au maximum
+# Usage : python -m benchmarks.bench_metrics [--requests 200000]
+import argparse
+import asyncio
+import time
+
+from metrics import MetricsMiddleware, stage
+
+CACHE_HIT = ("auth", "cache")
+ALL_STAGES = ("auth", "cache", "upstream", "parse", "encode", "compress")
+
+
+async def bare(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def staged(names):
+    async def app(scope, receive, send):
+        for name in names:
+            with stage(name):
+                pass
+        await bare(scope, receive, send)
+    return app
+
+
+async def per_request_us(app, total):
+    scope = {"type": "http", "method": "GET", "path": "/bench", "headers": []}
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(total):
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / total * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+    base = asyncio.run(per_request_us(bare, args.requests))
+    middleware = asyncio.run(per_request_us(MetricsMiddleware(bare), args.requests))
+    print(f"app ASGI nue                    : {base:6.2f} µs/req")
+    print(f"+ MetricsMiddleware             : {middleware:6.2f} µs/req  (+{middleware - base:5.2f} µs)")
+    for names in (CACHE_HIT, ALL_STAGES):
+        full = asyncio.run(per_request_us(MetricsMiddleware(staged(names)), args.requests))
+        print(f"+ middleware et {len(names)} étapes        : {full:6.2f} µs/req  (+{full - base:5.2f} µs)")
+
+
+if __name__ == "__main__":
+    main()
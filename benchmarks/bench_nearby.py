@@ -0,0 +1,48 @@
+# Benchmark /station/nearby : scan linéaire + tri (avant) vs StationIndex (après)
+# Usage : python -m benchmarks.bench_nearby [--queries 200]
+import argparse
+import random
+import time
+
+from main import haversine
+from spatial import StationIndex
+
+
+def synthetic_stations(n, seed=0):
+    rng = random.Random(seed)
+    return [{"id": f"S{i}", "name": f"Station {i}", "country": "XX",
+             "lat": rng.uniform(-90, 90), "lon": rng.uniform(-180, 180)} for i in range(n)]
+
+
+def linear_scan(stations, lat, lon, k=5):
+    with_dist = [(s, haversine(lat, lon, s["lat"], s["lon"])) for s in stations]
+    with_dist.sort(key=lambda x: x[1])
+    return with_dist[:k]
+
+
+def per_query_us(fn, queries):
+    start = time.perf_counter()
+    for lat, lon in queries:
+        fn(lat, lon)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(42)
+    queries = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(args.queries)]
+    print(f"{'stations':>9} {'scan (µs)':>12} {'index (µs)':>12} {'gain':>8} {'build (ms)':>11}")
+    for n in (500, 10_000, 100_000):
+        stations = synthetic_stations(n)
+        start = time.perf_counter()
+        index = StationIndex([s["lat"] for s in stations], [s["lon"] for s in stations])
+        build_ms = (time.perf_counter() - start) * 1000
+        scan = per_query_us(lambda la, lo: linear_scan(stations, la, lo), queries[:max(10, args.queries * 500 // n)])
+        tree = per_query_us(lambda la, lo: index.query(la, lo, k=5), queries)
+        print(f"{n:>9} {scan:>12.0f} {tree:>12.1f} {scan / tree:>7.0f}x {build_ms:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Surcharge : l'API (processus fils) devant un stub Open-Meteo saturé (au plus --capacity requêtes
+# traitées à la fois, les autres font la queue chez lui), avec et sans limite de concurrence
+# adaptative. Charge en boucle ouverte (débit d'arrivée fixe au-delà de la capacité du stub),
+# requêtes toutes distinctes (aucun cache) ; latences p50/p99 et répartition des statuts.
+# Débit par défaut modeste : le goulot doit être le stub, pas le CPU de la machine de mesure.
+# Usage : python -m benchmarks.bench_overload [--rate 40] [--duration 5] [--capacity 2] [--latency 0.1]
+import argparse
+import asyncio
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks.loadtest import HEADERS, percentiles, start_api
+from benchmarks.stub_upstream import StubServer, StubUpstream
+
+
+async def open_loop(base, rate, duration):
+    """`rate` requêtes par seconde pendant `duration` secondes, sans attendre les réponses."""
+    results = []
+
+    async def one(client, i):
+        params = {"lat": round(40 + i * 0.001, 4), "lon": 2.35}
+        start = time.perf_counter()
+        try:
+            status = (await client.get("/point/hourly", params=params)).status_code
+        except httpx.HTTPError:
+            status = "erreur"
+        results.append((status, time.perf_counter() - start))
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base, headers=HEADERS, limits=limits, timeout=60) as client:
+        tasks = []
+        start = time.perf_counter()
+        for i in range(int(rate * duration)):
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(client, i)))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def run(args, adaptive):
+    stub = StubUpstream(latency=args.latency, capacity=args.capacity)
+    with StubServer(stub) as upstream, tempfile.TemporaryDirectory() as workdir:
+        proc, base = start_api(upstream, workdir, METEO_CONCURRENCY_ENABLED="1" if adaptive else "0")
+        try:
+            results = asyncio.run(open_loop(base, args.rate, args.duration))
+            limits = httpx.get(base + "/stats", headers=HEADERS).json()["concurrency"]
+        finally:
+            proc.terminate()
+            proc.wait()
+    statuses = Counter(status for status, _ in results)
+    p50, _, p99 = percentiles([elapsed for _, elapsed in results])
+    ok50, _, ok99 = percentiles([elapsed for status, elapsed in results if status == 200])
+    label = "adaptative" if adaptive else "sans limite"
+    print(f"{label:12s} p50 {p50:8.1f}  p99 {p99:8.1f} ms | 200 : p50 {ok50:8.1f}  p99 {ok99:8.1f} ms"
+          f" | statuts {dict(sorted(statuses.items(), key=str))} | pic chez le stub {stub.peak}")
+    for host, s in limits.items():
+        print(f"{'':12s} {host} : limite {s['limit']}, refusés {s['shed']}, latence à vide {s['baseline_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=40, help="requêtes par seconde")
+    parser.add_argument("--duration", type=float, default=5.0, help="secondes")
+    parser.add_argument("--capacity", type=int, default=2, help="requêtes traitées à la fois par le stub")
+    parser.add_argument("--latency", type=float, default=0.1, help="temps de traitement du stub (s)")
+    args = parser.parse_args()
+    print(f"{args.rate:.0f} req/s pendant {args.duration:.0f} s, stub : {args.capacity} à la fois × "
+          f"{args.latency * 1000:.0f} ms (soit {args.capacity / args.latency:.0f} req/s au plus)")
+    run(args, adaptive=False)
+    run(args, adaptive=True)
+
+
+if __name__ == "__main__":
+    main()
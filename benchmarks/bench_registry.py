@@ -0,0 +1,69 @@
+# Benchmark du registre : liste de dicts + scans (avant) vs StationRegistry (après)
+# Usage : python -m benchmarks.bench_registry [--stations 100000]
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from typing import List
+
+from pydantic import TypeAdapter
+
+from main import Station
+from registry import StationRegistry
+
+COUNTRIES = ["FR", "US", "JP", "GB", "CN", "IN", "BR", "RU", "DE", "IT"] + [f"C{i}" for i in range(190)]
+
+
+def synthetic_rows(n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield {"id": f"ST{i:07d}", "name": f"Station {i}", "country": rng.choice(COUNTRIES),
+               "lat": rng.uniform(-90, 90), "lon": rng.uniform(-180, 180)}
+
+
+def resident(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def per_call_us(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stations", type=int, default=100_000)
+    args = parser.parse_args()
+    n = args.stations
+
+    def build_before():
+        stations = list(synthetic_rows(n))
+        return stations, {s["id"]: (s["lat"], s["lon"]) for s in stations}
+
+    (stations, coords), mem_before = resident(build_before)
+    registry, mem_after = resident(lambda: StationRegistry(synthetic_rows(n)))
+    last = stations[-1]["id"]
+    adapter = TypeAdapter(List[Station])
+
+    meta_before = per_call_us(lambda: next(s for s in stations if s["id"] == last), 20)
+    meta_after = per_call_us(lambda: registry.get(last), 10_000)
+    country_before = per_call_us(lambda: adapter.dump_json(adapter.validate_python([s for s in stations if s["country"] == "FR"])), 20)
+    registry.json("FR")
+    country_after = per_call_us(lambda: registry.json("FR"), 10_000)
+
+    print(f"{n} stations")
+    print(f"mémoire résidente     : {mem_before / 2**20:7.1f} Mo -> {mem_after / 2**20:7.1f} Mo")
+    print(f"/station/meta         : {meta_before:9.1f} µs -> {meta_after:6.2f} µs")
+    print(f"/stations?country=FR  : {country_before:9.1f} µs -> {country_after:6.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Benchmark /station/search : scan `in name.lower()` (avant) vs SearchIndex (après)
+# Usage : python -m benchmarks.bench_search [--names 100000]
+import argparse
+import random
+import time
+
+from search import SearchIndex
+
+SYLLABLES = ["sa", "o", "pau", "lo", "bo", "go", "tá", "ber", "lin", "ma", "drid", "ly", "on", "to",
+             "ky", "new", "york", "san", "ti", "a", "é", "ville", "burg", "ham", "mont", "réal", "ca"]
+
+
+def synthetic_names(n, seed=0):
+    rng = random.Random(seed)
+    return [" ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+                     for _ in range(rng.randint(1, 2))) for _ in range(n)]
+
+
+def qps(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--names", type=int, default=100_000)
+    args = parser.parse_args()
+    names = synthetic_names(args.names)
+    rng = random.Random(1)
+    # Requêtes d'autocomplétion : préfixes de 2 à 6 lettres de noms existants
+    queries = [rng.choice(names)[:rng.randint(2, 6)] for _ in range(300)]
+    typos = [n[:1] + n[2] + n[1] + n[3:] for n in (rng.choice(names) for _ in range(300)) if len(n) > 4]
+
+    start = time.perf_counter()
+    index = SearchIndex(names)
+    build = time.perf_counter() - start
+
+    def scan(q):
+        q = q.lower()
+        return [i for i, n in enumerate(names) if q in n.lower()]
+
+    print(f"{args.names} noms, index construit en {build:.1f} s")
+    print(f"scan linéaire      : {qps(scan, queries[:30]):8.0f} req/s")
+    print(f"index (préfixes)   : {qps(lambda q: index.search(q, limit=10), queries):8.0f} req/s")
+    print(f"index (avec fautes): {qps(lambda q: index.search(q, limit=10), typos):8.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
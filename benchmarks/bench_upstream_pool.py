@@ -0,0 +1,62 @@
+# Benchmark : client httpx par requête (avant) vs pool partagé UpstreamPool (après)
+# Usage : python -m benchmarks.bench_upstream_pool [--requests 2000] [--concurrency 50]
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.stub_upstream import StubServer
+from upstream import UpstreamPool
+
+PARAMS = {
+    "latitude": 48.8566,
+    "longitude": 2.3522,
+    "hourly": "temperature_2m,precipitation,relative_humidity_2m,wind_speed_10m",
+    "timezone": "auto",
+}
+
+
+async def drive(fetch, total, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            r = await fetch()
+            assert r.status_code == 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def per_request_client(url, total, concurrency):
+    async def fetch():
+        async with httpx.AsyncClient() as client:
+            return await client.get(url, params=PARAMS)
+    return await drive(fetch, total, concurrency)
+
+
+async def shared_pool(url, total, concurrency):
+    pool = UpstreamPool()
+    try:
+        return await drive(lambda: pool.get(url, params=PARAMS), total, concurrency)
+    finally:
+        await pool.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    with StubServer() as base:
+        url = base + "/v1/forecast"
+        before = asyncio.run(per_request_client(url, args.requests, args.concurrency))
+        after = asyncio.run(shared_pool(url, args.requests, args.concurrency))
+    print(f"client par requête : {before:8.0f} req/s")
+    print(f"pool partagé       : {after:8.0f} req/s  (x{after / before:.1f})")
+
+
+if __name__ == "__main__":
+    main()
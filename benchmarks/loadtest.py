@@ -0,0 +1,236 @@
+# Test de charge reproductible : l'API (uvicorn, processus fils) pointée par configuration
+# (METEO_OPEN_METEO_URL, METEO_CLIMATE_URL) vers un stub local d'Open-Meteo avec latence, gigue
+# et taux d'erreur réglables. Chaque endpoint est piloté à concurrence fixe ; débit, p50/p95/p99
+# et RSS sont comparés à la référence enregistrée (benchmarks/baselines/loadtest.json).
+# Usage : python -m benchmarks.loadtest [--requests 300] [--concurrency 20] [--locations 20]
+#         [--latency 0.02] [--jitter 0.01] [--error-rate 0] [--fixtures benchmarks/fixtures]
+#         [--only /station/hourly] [--save-baseline] [--tolerance 0.3]
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_climate_stream import memory_kb
+from benchmarks.stub_upstream import StubServer, StubUpstream, free_port
+from stations import STATIONS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baselines", "loadtest.json")
+HEADERS = {"x-rapidapi-host": "loadtest"}
+# Réglages qui doivent être identiques pour comparer à la référence
+COMPARED_SETTINGS = ("requests", "concurrency", "locations", "latency", "jitter", "error_rate", "seed")
+
+
+def station(i, n):
+    return STATIONS[i % n]["id"]
+
+
+def point(i, n):
+    s = STATIONS[i % n]
+    return {"lat": round(s["lat"] + 0.05, 4), "lon": round(s["lon"] + 0.05, 4)}
+
+
+def batch(i, n, size=10):
+    return {"stations": [station(i + j, n) for j in range(size)]}
+
+
+# (nom, méthode, chemin, requête i parmi n lieux -> paramètres ou corps JSON)
+SCENARIOS = [
+    ("/ping", "GET", "/ping", lambda i, n: {}),
+    ("/stations", "GET", "/stations", lambda i, n: {"country": STATIONS[i % n]["country"]}),
+    ("/station/meta", "GET", "/station/meta", lambda i, n: {"station": station(i, n)}),
+    ("/station/search", "GET", "/station/search", lambda i, n: {"name": STATIONS[i % n]["name"][:4]}),
+    ("/station/nearby", "GET", "/station/nearby", lambda i, n: {**point(i, n), "k": 10}),
+    ("/station/nearby/batch", "POST", "/station/nearby/batch",
+     lambda i, n: {"points": [point(i + j, n) for j in range(10)], "k": 5}),
+    ("/current", "GET", "/current", lambda i, n: {"station": station(i, n)}),
+    ("/history", "GET", "/history", lambda i, n: {"station": station(i, n), "date": "2024-06-01"}),
+    ("/forecast", "GET", "/forecast", lambda i, n: {"station": station(i, n)}),
+    ("/station/hourly", "GET", "/station/hourly", lambda i, n: {"station": station(i, n)}),
+    ("/station/hourly?format=csv", "GET", "/station/hourly", lambda i, n: {"station": station(i, n), "format": "csv"}),
+    ("/station/daily", "GET", "/station/daily", lambda i, n: {"station": station(i, n)}),
+    ("/station/monthly", "GET", "/station/monthly", lambda i, n: {"station": station(i, n)}),
+    ("/station/climate", "GET", "/station/climate", lambda i, n: {"station": station(i, n)}),
+    ("/station/climate?raw=true", "GET", "/station/climate",
+     lambda i, n: {"station": station(i, n), "raw": "true", "start_date": "2010-01-01", "end_date": "2019-12-31"}),
+    ("/point/hourly", "GET", "/point/hourly", lambda i, n: point(i, n)),
+    ("/point/daily", "GET", "/point/daily", lambda i, n: point(i, n)),
+    ("/point/monthly", "GET", "/point/monthly", lambda i, n: point(i, n)),
+    ("/point/climate", "GET", "/point/climate", lambda i, n: point(i, n)),
+    ("/batch/hourly", "POST", "/batch/hourly", batch),
+    ("/batch/daily", "POST", "/batch/daily", batch),
+    ("/batch/current", "POST", "/batch/current", batch),
+    ("/stats", "GET", "/stats", lambda i, n: {}),
+    ("/metrics", "GET", "/metrics", lambda i, n: {}),
+]
+
+
+def percentiles(latencies):
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) * 1000 if latencies else (0.0, 0.0, 0.0)
+    return round(float(p50), 2), round(float(p95), 2), round(float(p99), 2)
+
+
+async def drive(client, method, path, make, total, concurrency, locations):
+    """Envoie `total` requêtes (lieux parcourus en boucle) avec `concurrency` clients simultanés."""
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            args = make(i, locations)
+            start = time.perf_counter()
+            try:
+                if method == "GET":
+                    r = await client.get(path, params=args)
+                else:
+                    r = await client.post(path, json=args)
+                ok = r.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = percentiles(latencies)
+    return {"requests": total, "errors": errors, "rps": round(total / elapsed, 1),
+            "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+
+
+async def run_scenarios(base, scenarios, args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base, headers=HEADERS, limits=limits, timeout=120) as client:
+        results = {}
+        for name, method, path, make in scenarios:
+            results[name] = await drive(client, method, path, make, args.requests, args.concurrency,
+                                        args.locations)
+            r = results[name]
+            print(f"{name:28s} {r['rps']:9.1f} req/s  p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}"
+                  f"  p99 {r['p99_ms']:8.2f} ms  erreurs {r['errors']}")
+        return results
+
+
+def start_api(upstream, workdir, **settings):
+    """API lancée dans un processus fils ; `settings` : variables METEO_* supplémentaires."""
+    port = free_port()
+    env = {
+        **os.environ,
+        # Open-Meteo remplacé par le stub, par configuration
+        "METEO_OPEN_METEO_URL": upstream + "/v1/forecast",
+        "METEO_CLIMATE_URL": upstream + "/v1/climate",
+        # Mesure reproductible : ni cache disque ni normales précalculées ni préchauffage
+        "METEO_DISK_CACHE": "",
+        "METEO_NORMALS_DIR": os.path.join(workdir, "normals"),
+        "METEO_PREWARM_ENABLED": "0",
+        # Débit de l'API elle-même : ni budget Open-Meteo, ni limite par client, ni limite de
+        # concurrence (le stub partage le CPU : sa latence croît avec la charge, la limite baisserait)
+        "METEO_UPSTREAM_BUDGET_PER_MINUTE": "0",
+        "METEO_RATE_LIMIT_ENABLED": "0",
+        "METEO_CONCURRENCY_ENABLED": "0",
+        **settings,
+    }
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+                             "--port", str(port), "--log-level", "warning"],
+                            env=env, cwd=os.path.dirname(HERE))
+    base = f"http://127.0.0.1:{port}"
+    while True:
+        try:
+            httpx.get(base + "/ping", headers=HEADERS)
+            return proc, base
+        except httpx.TransportError:
+            if proc.poll() is not None:
+                raise RuntimeError("l'API n'a pas démarré")
+            time.sleep(0.05)
+
+
+def regressions(report, baseline, tolerance):
+    """Écarts au-delà de `tolerance` (fraction) : débit en baisse, latences ou RSS en hausse."""
+    found = []
+    for name, r in report["results"].items():
+        ref = baseline["results"].get(name)
+        if ref is None:
+            continue
+        if r["rps"] < ref["rps"] * (1 - tolerance):
+            found.append(f"{name}: débit {r['rps']} req/s < {ref['rps']} req/s")
+        for field in ("p95_ms", "p99_ms"):
+            # Plancher de 1 ms : les endpoints sub-milliseconde sont trop bruités
+            if r[field] > max(ref[field] * (1 + tolerance), ref[field] + 1.0):
+                found.append(f"{name}: {field} {r[field]} > {ref[field]}")
+        if r["errors"] > ref["errors"]:
+            found.append(f"{name}: {r['errors']} erreurs (référence {ref['errors']})")
+    if report["rss_peak_mb"] > baseline["rss_peak_mb"] * (1 + tolerance):
+        found.append(f"RSS pic {report['rss_peak_mb']} Mo > {baseline['rss_peak_mb']} Mo")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300, help="requêtes par endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--locations", type=int, default=20, help="stations/points distincts (défauts de cache)")
+    parser.add_argument("--latency", type=float, default=0.02, help="latence du stub (s)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="gigue uniforme ajoutée (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fixtures", default=os.path.join(HERE, "fixtures"), help="réponses enregistrées")
+    parser.add_argument("--only", action="append", help="scénario(s) à exécuter (nom exact)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    args = parser.parse_args()
+    scenarios = [s for s in SCENARIOS if not args.only or s[0] in args.only]
+    stub = StubUpstream(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed,
+                        fixtures=args.fixtures)
+    with StubServer(stub) as upstream, tempfile.TemporaryDirectory() as workdir:
+        proc, base = start_api(upstream, workdir)
+        try:
+            idle = memory_kb(proc.pid, "VmRSS")
+            results = asyncio.run(run_scenarios(base, scenarios, args))
+            rss, peak = memory_kb(proc.pid, "VmRSS"), memory_kb(proc.pid, "VmHWM")
+        finally:
+            proc.terminate()
+            proc.wait()
+    report = {
+        "settings": {k: getattr(args, k) for k in COMPARED_SETTINGS},
+        "results": results,
+        "rss_idle_mb": round(idle / 1024, 1),
+        "rss_mb": round(rss / 1024, 1),
+        "rss_peak_mb": round(peak / 1024, 1),
+    }
+    print(f"RSS : {report['rss_idle_mb']} Mo au repos, {report['rss_mb']} Mo après la charge, "
+          f"pic {report['rss_peak_mb']} Mo ; appels Open-Meteo {stub.hits} (dont {stub.replayed} enregistrés, "
+          f"{stub.errors} en erreur)")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"référence enregistrée : {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("pas de référence (--save-baseline pour en enregistrer une)")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["settings"] != report["settings"]:
+        print("réglages différents de la référence : pas de comparaison")
+        return
+    found = regressions(report, baseline, args.tolerance)
+    for line in found:
+        print("RÉGRESSION", line)
+    if found:
+        sys.exit(1)
+    print(f"aucune régression (tolérance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Enregistre des réponses réelles d'Open-Meteo, rejouées ensuite par le stub (StubUpstream(fixtures=...))
+# et par FileProvider (METEO_PROVIDER=file). Une réponse par type de requête, avec les paramètres
+# construits par providers.py ; au rejeu, elles sont déplacées aux coordonnées demandées et les
+# séries journalières sont découpées à la période demandée.
+# Usage : python -m benchmarks.record_fixtures [--out benchmarks/fixtures] [--lat 48.8566 --lon 2.3522]
+import argparse
+import json
+import os
+
+import httpx
+
+from normals import PERIOD
+from providers import OpenMeteoProvider
+
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+CLIMATE_URL = "https://climate-api.open-meteo.com/v1/climate"
+# Union des variables journalières demandées par les endpoints (history, forecast, daily, monthly)
+DAILY_VARIABLES = "temperature_2m_max,temperature_2m_min,temperature_2m_mean,precipitation_sum,wind_speed_10m_max"
+
+
+def recordings(lat, lon):
+    # Constructeurs de requêtes seulement : aucun appel par le pool
+    queries = OpenMeteoProvider(pool=None)
+    return {
+        "current": (FORECAST_URL, queries.current(lat, lon).params),
+        "hourly": (FORECAST_URL, queries.hourly(lat, lon).params),
+        "daily": (FORECAST_URL, {"latitude": lat, "longitude": lon, "daily": DAILY_VARIABLES,
+                                 "past_days": 92, "forecast_days": 16, "timezone": "auto"}),
+        "climate": (CLIMATE_URL, queries.climate(lat, lon, *PERIOD).params),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "fixtures"))
+    parser.add_argument("--lat", type=float, default=48.8566)
+    parser.add_argument("--lon", type=float, default=2.3522)
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    with httpx.Client(timeout=120) as client:
+        for kind, (url, params) in recordings(args.lat, args.lon).items():
+            r = client.get(url, params=params)
+            r.raise_for_status()
+            path = os.path.join(args.out, kind + ".json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(r.json(), f, ensure_ascii=False)
+            print(f"{kind:8s}: {len(r.content) / 1024:8.1f} Ko -> {path}")
+
+
+if __name__ == "__main__":
+    main()
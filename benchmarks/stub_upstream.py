@@ -0,0 +1,189 @@
+# Stub local d'Open-Meteo (forecast + climate) pour les benchmarks et les tests
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from providers import load_fixtures, replay
+
+
+def hourly_payload(lat, lon, hours=168):
+    start = datetime(2024, 6, 1)
+    times = [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(hours)]
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "timezone": "Europe/Paris",
+        "utc_offset_seconds": 7200,
+        "hourly_units": {"time": "iso8601", "temperature_2m": "°C", "precipitation": "mm",
+                         "relative_humidity_2m": "%", "wind_speed_10m": "km/h"},
+        "hourly": {
+            "time": times,
+            "temperature_2m": [round(15 + 8 * ((h % 24) / 24), 1) for h in range(hours)],
+            "precipitation": [0.1 * (h % 5 == 0) for h in range(hours)],
+            "relative_humidity_2m": [60 + h % 30 for h in range(hours)],
+            "wind_speed_10m": [round(5 + (h % 12) * 0.7, 1) for h in range(hours)],
+        },
+    }
+
+
+def current_payload(lat, lon, variables):
+    values = {"temperature_2m": 18.4, "relative_humidity_2m": 64, "precipitation": 0.0,
+              "wind_speed_10m": 9.7, "weather_code": 2}
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "timezone": "Europe/Paris",
+        "utc_offset_seconds": 7200,
+        "current": {"time": "2024-06-01T14:15", "interval": 900, **{v: values.get(v, 0) for v in variables}},
+    }
+
+
+def daily_payload(lat, lon, start, end, variables):
+    days = (end - start).days + 1
+    daily = {"time": [(start + timedelta(days=d)).isoformat() for d in range(days)]}
+    for i, var in enumerate(variables):
+        daily[var] = [round(10 + i + (d % 365) * 0.03, 1) for d in range(days)]
+    return {"latitude": lat, "longitude": lon, "timezone": "GMT", "daily": daily}
+
+
+class StubUpstream:
+    """Application ASGI imitant api.open-meteo.com et climate-api.open-meteo.com.
+
+    Injection de pannes : `error_rate` (part des requêtes en erreur `error_status`), `latency`
+    plus une gigue uniforme entre 0 et `jitter` secondes. `fixtures` : dossier de réponses
+    enregistrées (current, hourly, daily, climate), rejouées comme par FileProvider quand elles
+    couvrent la requête ; les autres sont générées.
+    Saturation : au plus `capacity` requêtes traitées à la fois, les suivantes attendent leur tour
+    (la latence croît avec la concurrence, comme un upstream surchargé).
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=503, seed=None, jitter=0.0, fixtures=None,
+                 capacity=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.fixtures = load_fixtures(fixtures)
+        self.replayed = 0
+        self.hits = 0
+        self.errors = 0
+        self.capacity = capacity
+        self.active = 0
+        self.peak = 0
+        self._slots = asyncio.Semaphore(capacity) if capacity else None
+        self.app = Starlette(routes=[
+            Route("/v1/forecast", self.forecast),
+            Route("/v1/climate", self.forecast),
+        ])
+
+    async def forecast(self, request):
+        self.hits += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            if self._slots is None:
+                return await self.respond(request)
+            async with self._slots:
+                return await self.respond(request)
+        finally:
+            self.active -= 1
+
+    async def respond(self, request):
+        delay = self.latency + (self.random.uniform(0.0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            return Response(json.dumps({"error": True, "reason": "injected"}), status_code=self.error_status,
+                            media_type="application/json")
+        q = request.query_params
+        # Plusieurs lieux : latitude/longitude séparées par des virgules -> liste
+        lats = [float(v) for v in q.get("latitude", "0").split(",")]
+        lons = [float(v) for v in q.get("longitude", "0").split(",")]
+        kind = self.kind(request.url.path, q)
+        payloads = [self.payload(kind, q, lat, lon) for lat, lon in zip(lats, lons)]
+        for p in payloads:
+            # Comme Open-Meteo : temps de calcul différent à chaque appel
+            p["generationtime_ms"] = round(self.random.uniform(0.01, 1.0), 4)
+        payload = payloads[0] if len(payloads) == 1 else payloads
+        return Response(json.dumps(payload), media_type="application/json")
+
+    @staticmethod
+    def kind(path, q):
+        if path.endswith("/climate"):
+            return "climate"
+        if "current" in q:
+            return "current"
+        return "daily" if "daily" in q else "hourly"
+
+    def payload(self, kind, q, lat, lon):
+        fixture = self.fixtures.get(kind)
+        if fixture is not None:
+            payload = replay(fixture, q, lat, lon)
+            if payload is not None:
+                self.replayed += 1
+                return payload
+        if kind == "current":
+            return current_payload(lat, lon, q["current"].split(","))
+        if "daily" in q:
+            start = date.fromisoformat(q.get("start_date", "2024-06-01"))
+            end = date.fromisoformat(q.get("end_date", (start + timedelta(days=6)).isoformat()))
+            return daily_payload(lat, lon, start, end, q["daily"].split(","))
+        return hourly_payload(lat, lon)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class StubServer:
+    """Lance un StubUpstream derrière uvicorn dans un thread (usage : `with StubServer() as url`)."""
+
+    def __init__(self, stub=None, port=None):
+        import uvicorn
+        self.stub = stub or StubUpstream()
+        self.port = port or free_port()
+        self.server = uvicorn.Server(uvicorn.Config(
+            self.stub.app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self.url
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+class RedirectTransport(httpx.AsyncBaseTransport):
+    """Envoie les requêtes vers `base` (stub local) quel que soit l'hôte Open-Meteo visé."""
+
+    def __init__(self, base):
+        self.base = httpx.URL(base)
+        self.inner = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        request.url = request.url.copy_with(scheme=self.base.scheme, host=self.base.host, port=self.base.port)
+        return await self.inner.handle_async_request(request)
+
+    async def aclose(self):
+        await self.inner.aclose()
@@ -0,0 +1,129 @@
+# Cache mémoire des réponses Open-Meteo : TTL par jeu de données, LRU borné en octets
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+
+# Surcoût approximatif d'une entrée (clé, objet, liens de l'OrderedDict)
+ENTRY_OVERHEAD = 200
+
+# Champ recalculé à chaque appel Open-Meteo, exclu de l'empreinte du contenu
+VOLATILE = re.compile(rb'"generationtime_ms":[^,}]*,?')
+
+
+def make_key(url, params):
+    # Clé stable quel que soit l'ordre ou le type des paramètres
+    return (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+
+
+class CacheEntry:
+    __slots__ = ("body", "stored_at", "ttl", "size", "variants", "etag", "modified")
+
+    def __init__(self, body, ttl, stored_at=None, variants=None):
+        self.body = body
+        self.ttl = ttl
+        self.stored_at = time.monotonic() if stored_at is None else stored_at
+        # Empreinte du contenu (ETag) et date de dernière modification (horloge murale)
+        self.etag = hashlib.blake2b(VOLATILE.sub(b"", body, count=1), digest_size=12).hexdigest()
+        self.modified = time.time() - (time.monotonic() - self.stored_at)
+        # Corps pré-compressés par encodage (gzip, br, zstd)
+        self.variants = variants or {}
+        self.size = len(body) + sum(len(v) for v in self.variants.values()) + ENTRY_OVERHEAD
+
+    @property
+    def age(self):
+        return time.monotonic() - self.stored_at
+
+    @property
+    def remaining(self):
+        return self.ttl - self.age
+
+    @property
+    def fresh(self):
+        return self.age < self.ttl
+
+
+class ResponseCache:
+    def __init__(self, max_bytes, max_stale=0.0, encode=None):
+        self.max_bytes = max_bytes
+        # encode(body) -> {encodage: corps compressé}, appelé une fois par entrée
+        self.encode = encode
+        # Les entrées expirées sont gardées `max_stale` secondes (service dégradé si l'upstream tombe)
+        self.max_stale = max_stale
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or not entry.fresh:
+            if entry is not None and entry.age >= entry.ttl + self.max_stale:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def peek(self, key):
+        # Sans effet sur l'ordre LRU ni les compteurs (préchauffage, supervision)
+        entry = self._entries.get(key)
+        return entry if entry is not None and entry.fresh else None
+
+    def get_stale(self, key):
+        """Dernière réponse connue, même expirée (dans la limite de `max_stale`)."""
+        entry = self._entries.get(key)
+        if entry is None or entry.age >= entry.ttl + self.max_stale:
+            return None
+        return entry
+
+    async def store(self, key, body, ttl, age=0.0):
+        """Comme set(), variantes compressées calculées hors de la boucle asyncio (gros corps)."""
+        variants = await asyncio.to_thread(self.encode, body) if self.encode is not None else None
+        return self.set(key, body, ttl, age, variants)
+
+    def set(self, key, body, ttl, age=0.0, variants=None):
+        # `age` : entrée déjà vieillie ailleurs (cache disque), `ttl` compté depuis son origine
+        if variants is None and self.encode is not None:
+            variants = self.encode(body)
+        entry = CacheEntry(body, ttl, stored_at=time.monotonic() - age, variants=variants)
+        if entry.size > self.max_bytes:
+            return entry
+        if key in self._entries:
+            old = self._entries[key]
+            # Contenu inchangé après rafraîchissement : la date de modification est conservée
+            if old.etag == entry.etag:
+                entry.modified = min(entry.modified, old.modified)
+            self._remove(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self.size -= old.size
+            self.evictions += 1
+        return entry
+
+    def _remove(self, key):
+        self.size -= self._entries.pop(key).size
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,58 @@
+# Disjoncteur par hôte : coupe le trafic vers un upstream défaillant pendant un temps de repos
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """S'ouvre après `threshold` échecs consécutifs ; une seule requête d'essai par période `cooldown`."""
+
+    def __init__(self, threshold=5, cooldown=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self.opened_at = 0.0
+
+    @property
+    def retry_after(self):
+        if self.state == CLOSED:
+            return 0.0
+        return max(self.opened_at + self.cooldown - self.clock(), 0.0)
+
+    def allow(self):
+        if self.state == CLOSED:
+            return True
+        if self.clock() - self.opened_at >= self.cooldown:
+            # Requête d'essai ; sans résultat, une autre sera permise après un nouveau cooldown
+            self.state = HALF_OPEN
+            self.opened_at = self.clock()
+            return True
+        self.rejected += 1
+        return False
+
+    def success(self):
+        self.state = CLOSED
+        self.failures = 0
+
+    def failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.threshold:
+            if self.state == CLOSED:
+                self.trips += 1
+            self.state = OPEN
+            self.opened_at = self.clock()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after, 1),
+        }
@@ -0,0 +1,168 @@
+# Compression des réponses (gzip, brotli, zstd) : négociation, variantes pré-compressées, middleware
+import gzip
+import zlib
+from contextvars import ContextVar
+
+from metrics import stage
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Ordre de préférence à qualité égale
+PREFERENCE = ("zstd", "br", "gzip")
+AVAILABLE = tuple(e for e, ok in (("zstd", ZSTD_AVAILABLE), ("br", BROTLI_AVAILABLE), ("gzip", True)) if ok)
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Encodage négocié pour la requête en cours (posé par CompressionMiddleware)
+accepted_encoding = ContextVar("accepted_encoding", default=None)
+
+
+def negotiate(header, encodings=AVAILABLE):
+    """Meilleur encodage de `encodings` accepté par l'en-tête Accept-Encoding (None : identité)."""
+    weights = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in PREFERENCE:
+        if encoding not in encodings:
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compressor(encoding, level):
+    """Compresseur incrémental : compress(chunk) puis flush() ; chaque morceau est vidé (streaming)."""
+    if encoding == "gzip":
+        obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return lambda chunk: obj.compress(chunk) + obj.flush(zlib.Z_SYNC_FLUSH), obj.flush
+    if encoding == "br":
+        obj = brotli.Compressor(quality=level)
+        return lambda chunk: obj.process(chunk) + obj.flush(), obj.finish
+    obj = zstandard.ZstdCompressor(level=level).compressobj()
+    return (lambda chunk: obj.compress(chunk) + obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)), obj.flush
+
+
+def compress(encoding, body, level):
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress(body)
+
+
+class Precompressor:
+    """Variantes compressées d'un corps, calculées une fois à la mise en cache."""
+
+    def __init__(self, encodings, levels, minimum_size):
+        self.encodings = [e for e in encodings if e in AVAILABLE]
+        self.levels = levels
+        self.minimum_size = minimum_size
+
+    def __call__(self, body):
+        if len(body) < self.minimum_size:
+            return {}
+        return {e: compress(e, body, self.levels[e]) for e in self.encodings}
+
+
+def header(headers, name):
+    for key, value in headers:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class CompressionMiddleware:
+    """Négocie Accept-Encoding, compresse à la volée les réponses non encore compressées."""
+
+    def __init__(self, app, encodings=AVAILABLE, levels=None, minimum_size=1024):
+        self.app = app
+        self.encodings = [e for e in encodings if e in AVAILABLE]
+        self.levels = levels or {}
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(header(scope["headers"], b"accept-encoding"), self.encodings)
+        token = accepted_encoding.set(encoding)
+        try:
+            if encoding is None:
+                return await self.app(scope, receive, send)
+            await self.app(scope, receive, CompressingSender(send, encoding, self.levels.get(encoding, 6),
+                                                              self.minimum_size))
+        finally:
+            accepted_encoding.reset(token)
+
+
+class CompressingSender:
+    def __init__(self, send, encoding, level, minimum_size):
+        self.send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start = None
+        self.active = None
+        self.stream = None
+
+    def eligible(self, headers):
+        content_type = header(headers, b"content-type") or ""
+        return (header(headers, b"content-encoding") is None
+                and any(content_type.startswith(t) for t in COMPRESSIBLE_TYPES))
+
+    def started(self, headers, length=None):
+        headers = [(k, v) for k, v in headers if k not in (b"content-length", b"vary")]
+        headers.append((b"content-encoding", self.encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return {**self.start, "headers": headers}
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.active = self.eligible(message.get("headers", []))
+            if not self.active:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or not self.active:
+            return await self.send(message)
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.stream is None and not more:
+            # Corps complet : compressé d'un bloc s'il dépasse le seuil
+            if len(body) < self.minimum_size:
+                await self.send(self.start)
+                return await self.send(message)
+            with stage("compress"):
+                body = compress(self.encoding, body, self.level)
+            await self.send(self.started(self.start["headers"], len(body)))
+            return await self.send({"type": "http.response.body", "body": body})
+        if self.stream is None:
+            # Corps streamé : compression incrémentale, sans Content-Length
+            self.stream = compressor(self.encoding, self.level)
+            await self.send(self.started(self.start["headers"]))
+        chunk, finish = self.stream
+        with stage("compress"):
+            data = chunk(body) if body else b""
+            if not more:
+                data += finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more})
@@ -0,0 +1,111 @@
+# Limite de concurrence adaptative (AIMD) par endpoint upstream : la limite monte tant que la latence
+# reste proche de la latence à vide, baisse dès qu'elle se dégrade ; l'excédent attend ou est refusé
+import asyncio
+import math
+import time
+from collections import deque
+
+
+class AdaptiveLimiter:
+    """Appels simultanés plafonnés à `limit`, ajustée à chaque réponse (AIMD).
+
+    Hausse additive (+1 par `limit` réponses) quand la latence moyenne (EWMA, poids `alpha`) reste
+    sous `tolerance` fois la latence de référence (minimum observé sur les deux dernières fenêtres
+    de `window` secondes) et que la limite est sollicitée ; baisse multiplicative (`backoff`) sur
+    latence dégradée, timeout ou surcharge (5xx, 429), au plus une fois par latence de référence.
+    Au-delà de la limite, les appelants attendent dans une file de `max_queue` places au plus
+    `queue_timeout` secondes ou le temps de deux appels à vide si c'est plus long (API climat) ;
+    sinon acquire() renvoie False (à refuser avec 503 + Retry-After).
+    """
+
+    def __init__(self, initial=20, min_limit=2, max_limit=100, backoff=0.9, tolerance=2.0,
+                 max_queue=200, queue_timeout=2.0, window=30.0, alpha=0.2, clock=time.monotonic):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.window = window
+        self.alpha = alpha
+        self.clock = clock
+        self.latency = None
+        self.inflight = 0
+        self.shed = 0
+        self._waiters = deque()
+        self._window_start = clock()
+        self._current_min = math.inf
+        self._previous_min = math.inf
+        self._last_decrease = -math.inf
+
+    @property
+    def baseline(self):
+        rtt = min(self._current_min, self._previous_min)
+        return None if rtt == math.inf else rtt
+
+    @property
+    def retry_after(self):
+        # Temps pour écouler la file au rythme actuel
+        return max(1.0, len(self._waiters) / self.limit * (self.baseline or 1.0))
+
+    async def acquire(self):
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            return False
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            # La place est transmise par release() : inflight déjà compté
+            await asyncio.wait_for(future, max(self.queue_timeout, 2 * (self.baseline or 0.0)))
+            return True
+        except asyncio.TimeoutError:
+            self.shed += 1
+            return False
+
+    def release(self, latency, dropped=False):
+        self.inflight -= 1
+        now = self.clock()
+        if now - self._window_start >= self.window:
+            self._previous_min, self._current_min = self._current_min, math.inf
+            self._window_start = now
+        if not dropped:
+            self._current_min = min(self._current_min, latency)
+            # Moyenne lissée : une requête lente isolée (lot de 50 lieux) ne fait pas baisser la limite
+            self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+        baseline = self.baseline
+        if dropped or (baseline is not None and self.latency > self.tolerance * baseline):
+            if now - self._last_decrease >= (baseline or 0.0):
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif (self.inflight + 1) * 2 >= self.limit:
+            # Limite réellement sollicitée : sinon une faible charge la ferait grimper sans raison
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def cancel(self):
+        """Place rendue sans mesure (appel finalement non envoyé)."""
+        self.inflight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.inflight < int(self.limit):
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.inflight += 1
+            future.set_result(None)
+
+    def stats(self):
+        baseline = self.baseline
+        return {
+            "limit": round(self.limit, 1),
+            "inflight": self.inflight,
+            "queued": sum(not f.done() for f in self._waiters),
+            "shed": self.shed,
+            "baseline_ms": round(baseline * 1000, 1) if baseline is not None else None,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+        }
@@ -0,0 +1,60 @@
+# Requêtes conditionnelles : ETag et Last-Modified tirés des métadonnées du cache, réponses 304
+from contextvars import ContextVar
+from email.utils import formatdate, parsedate_to_datetime
+
+from compression import header
+
+# (If-None-Match, If-Modified-Since) de la requête en cours, posés par ConditionalMiddleware
+request_conditions = ContextVar("request_conditions", default=(None, None))
+
+
+def etag(entry, variant=None):
+    # Une représentation par format/encodage : suffixe ajouté à l'empreinte du contenu
+    return f'"{entry.etag}-{variant}"' if variant else f'"{entry.etag}"'
+
+
+def last_modified(entry):
+    return formatdate(entry.modified, usegmt=True)
+
+
+def validator_headers(entry, variant=None):
+    return {"ETag": etag(entry, variant), "Last-Modified": last_modified(entry)}
+
+
+def not_modified(entry, variant=None):
+    """Vrai si le client possède déjà cette représentation (comparaison faible, RFC 9110).
+
+    L'ETag est comparé en entier à celui de la représentation servie (`variant`) : seul le
+    préfixe W/ est ignoré, une étiquette csv ou gzip ne valide pas la version json ou brute.
+    """
+    if_none_match, if_modified_since = request_conditions.get()
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        expected = etag(entry, variant)
+        return any(tag.strip().removeprefix("W/") == expected for tag in if_none_match.split(","))
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # Last-Modified est exprimé à la seconde
+        return int(entry.modified) <= since
+    return False
+
+
+class ConditionalMiddleware:
+    """Expose If-None-Match / If-Modified-Since aux endpoints des requêtes GET et HEAD."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+        token = request_conditions.set((header(scope["headers"], b"if-none-match"),
+                                        header(scope["headers"], b"if-modified-since")))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_conditions.reset(token)
@@ -0,0 +1,183 @@
+# Configuration de MeteoAPI (surchargeable par variables d'environnement)
+import os
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def env_float(name, default):
+    return float(os.getenv(name, default))
+
+
+def env_bool(name, default):
+    return os.getenv(name, "1" if default else "0").lower() in ("1", "true", "yes", "on")
+
+
+def env_map(name, default):
+    # Format : "cle=valeur,cle2=valeur2"
+    result = dict(default)
+    raw = os.getenv(name)
+    if not raw:
+        return result
+    for item in raw.split(","):
+        key, _, value = item.partition("=")
+        if key.strip():
+            result[key.strip()] = float(value)
+    return result
+
+
+def env_list(name, default):
+    # Format : "url1|url2"
+    raw = os.getenv(name)
+    return [v.strip() for v in raw.split("|") if v.strip()] if raw else list(default)
+
+
+def env_urls(name, default):
+    # Format : "jeu=url1|url2,jeu2=url3"
+    result = {k: list(v) for k, v in default.items()}
+    raw = os.getenv(name)
+    if not raw:
+        return result
+    for item in raw.split(","):
+        key, _, value = item.partition("=")
+        if key.strip():
+            result[key.strip()] = [v.strip() for v in value.split("|") if v.strip()]
+    return result
+
+
+# Fournisseur des données météo : "open-meteo" (HTTP) ou "file" (réponses enregistrées dans
+# PROVIDER_DIR, pour les tests et les benchmarks)
+PROVIDER = os.getenv("METEO_PROVIDER", "open-meteo")
+PROVIDER_DIR = os.getenv("METEO_PROVIDER_DIR", os.path.join("benchmarks", "fixtures"))
+# URL des API Open-Meteo ; plusieurs miroirs séparés par "|" (le plus rapide est préféré,
+# bascule sur le suivant en cas de panne). Pointables vers un stub local (benchmarks/loadtest.py).
+OPEN_METEO_URLS = env_list("METEO_OPEN_METEO_URL", ["https://api.open-meteo.com/v1/forecast"])
+CLIMATE_URLS = env_list("METEO_CLIMATE_URL", ["https://climate-api.open-meteo.com/v1/climate"])
+# URL par jeu de données (ex. "history=https://archive-api.open-meteo.com/v1/archive")
+PROVIDER_URLS = env_urls("METEO_PROVIDER_URLS", {
+    "current": OPEN_METEO_URLS,
+    "hourly": OPEN_METEO_URLS,
+    "daily": OPEN_METEO_URLS,
+    "history": OPEN_METEO_URLS,
+    "forecast": OPEN_METEO_URLS,
+    "climate": CLIMATE_URLS,
+})
+# Pénalité (secondes) ajoutée à la latence moyenne d'un miroir à chaque échec
+PROVIDER_FAILURE_PENALTY = env_float("METEO_PROVIDER_FAILURE_PENALTY", 1.0)
+
+# Pool de connexions vers Open-Meteo
+UPSTREAM_MAX_CONNECTIONS = env_int("METEO_UPSTREAM_MAX_CONNECTIONS", 100)
+UPSTREAM_MAX_KEEPALIVE = env_int("METEO_UPSTREAM_MAX_KEEPALIVE", 20)
+UPSTREAM_KEEPALIVE_EXPIRY = env_float("METEO_UPSTREAM_KEEPALIVE_EXPIRY", 30.0)
+UPSTREAM_HTTP2 = env_bool("METEO_UPSTREAM_HTTP2", True)
+UPSTREAM_CONNECT_TIMEOUT = env_float("METEO_UPSTREAM_CONNECT_TIMEOUT", 5.0)
+UPSTREAM_DEFAULT_TIMEOUT = env_float("METEO_UPSTREAM_TIMEOUT", 10.0)
+# Timeout de lecture par hôte (l'API climat renvoie 30 ans de données)
+UPSTREAM_TIMEOUTS = env_map("METEO_UPSTREAM_TIMEOUTS", {
+    "api.open-meteo.com": 10.0,
+    "climate-api.open-meteo.com": 60.0,
+})
+
+# Limitation par client RapidAPI (x-rapidapi-user) : requêtes par minute selon l'abonnement
+# (x-rapidapi-subscription), rafale comprise ; abonnement inconnu ou absent : RATE_LIMIT_DEFAULT_PLAN
+RATE_LIMIT_ENABLED = env_bool("METEO_RATE_LIMIT_ENABLED", True)
+RATE_LIMIT_PLANS = env_map("METEO_RATE_LIMIT_PLANS", {"BASIC": 60, "PRO": 600, "ULTRA": 3000, "MEGA": 12000})
+RATE_LIMIT_DEFAULT_PLAN = os.getenv("METEO_RATE_LIMIT_DEFAULT_PLAN", "BASIC")
+RATE_LIMIT_MAX_CLIENTS = env_int("METEO_RATE_LIMIT_MAX_CLIENTS", 100000)
+# Budget global d'appels Open-Meteo (par minute, 0 : illimité) et rafale ; au-delà, les appels
+# attendent (file servie à tour de rôle par client) dans la limite de UPSTREAM_BUDGET_MAX_QUEUE
+UPSTREAM_BUDGET_PER_MINUTE = env_float("METEO_UPSTREAM_BUDGET_PER_MINUTE", 600)
+UPSTREAM_BUDGET_BURST = env_float("METEO_UPSTREAM_BUDGET_BURST", 100)
+UPSTREAM_BUDGET_MAX_QUEUE = env_int("METEO_UPSTREAM_BUDGET_MAX_QUEUE", 1000)
+
+# Cache mémoire des réponses Open-Meteo
+CACHE_MAX_BYTES = env_int("METEO_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+# Durée de vie (secondes) par jeu de données : les modèles sont mis à jour ~toutes les heures
+CACHE_TTLS = env_map("METEO_CACHE_TTLS", {
+    "current": 300,
+    "hourly": 900,
+    "daily": 1800,
+    "forecast": 1800,
+    "history": 86400,
+    "climate": 7 * 86400,
+    "normals": 86400,
+})
+
+# Réponses expirées conservées pour être servies si Open-Meteo est en panne ou trop lent
+CACHE_MAX_STALE = env_float("METEO_CACHE_MAX_STALE", 86400.0)
+# Expirée depuis moins de N secondes : servie immédiatement et rafraîchie en arrière-plan
+CACHE_STALE_WHILE_REVALIDATE = env_float("METEO_CACHE_STALE_WHILE_REVALIDATE", 60.0)
+# Temps de réponse maximal accordé à Open-Meteo par jeu de données (secondes)
+LATENCY_BUDGETS = env_map("METEO_LATENCY_BUDGETS", {
+    "current": 2.0,
+    "hourly": 3.0,
+    "daily": 3.0,
+    "forecast": 3.0,
+    "history": 5.0,
+    "climate": 60.0,
+})
+# Disjoncteur par hôte : échecs consécutifs avant ouverture, durée d'ouverture (secondes)
+CIRCUIT_FAILURE_THRESHOLD = env_int("METEO_CIRCUIT_FAILURE_THRESHOLD", 5)
+CIRCUIT_COOLDOWN = env_float("METEO_CIRCUIT_COOLDOWN", 30.0)
+# Limite de concurrence adaptative par endpoint Open-Meteo, hôte + chemin (AIMD) : +1 par fenêtre
+# de réponses rapides, multipliée par CONCURRENCY_BACKOFF quand la latence moyenne dépasse
+# CONCURRENCY_TOLERANCE × la latence à vide (minimum sur CONCURRENCY_WINDOW secondes) ou sur
+# 5xx/429/timeout. Au-delà, les appels attendent au plus CONCURRENCY_QUEUE_TIMEOUT secondes dans
+# une file de CONCURRENCY_MAX_QUEUE places, sinon 503
+CONCURRENCY_ENABLED = env_bool("METEO_CONCURRENCY_ENABLED", True)
+CONCURRENCY_INITIAL = env_int("METEO_CONCURRENCY_INITIAL", 20)
+CONCURRENCY_MIN = env_int("METEO_CONCURRENCY_MIN", 2)
+CONCURRENCY_MAX = env_int("METEO_CONCURRENCY_MAX", UPSTREAM_MAX_CONNECTIONS)
+CONCURRENCY_BACKOFF = env_float("METEO_CONCURRENCY_BACKOFF", 0.9)
+CONCURRENCY_TOLERANCE = env_float("METEO_CONCURRENCY_TOLERANCE", 2.0)
+CONCURRENCY_MAX_QUEUE = env_int("METEO_CONCURRENCY_MAX_QUEUE", 200)
+CONCURRENCY_QUEUE_TIMEOUT = env_float("METEO_CONCURRENCY_QUEUE_TIMEOUT", 1.0)
+CONCURRENCY_WINDOW = env_float("METEO_CONCURRENCY_WINDOW", 30.0)
+
+# /point/* : coordonnées ramenées à la maille du modèle avant cache et appel (désactivé par défaut,
+# activable par requête avec snap=true). Résolution en degrés par jeu de données.
+POINT_SNAP = env_bool("METEO_POINT_SNAP", False)
+GRID_RESOLUTIONS = env_map("METEO_GRID_RESOLUTIONS", {
+    "hourly": 0.1,
+    "daily": 0.1,
+    "monthly": 0.1,
+    "climate": 0.25,
+})
+
+# Compression des réponses : encodages proposés (selon modules installés), niveaux, taille minimale
+COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv("METEO_COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()]
+COMPRESSION_LEVELS = env_map("METEO_COMPRESSION_LEVELS", {"gzip": 6, "br": 5, "zstd": 6})
+COMPRESSION_MIN_BYTES = env_int("METEO_COMPRESSION_MIN_BYTES", 1024)
+
+# Endpoints /batch/* : lieux par appel Open-Meteo et appels simultanés
+BATCH_CHUNK_SIZE = env_int("METEO_BATCH_CHUNK_SIZE", 50)
+BATCH_CONCURRENCY = env_int("METEO_BATCH_CONCURRENCY", 4)
+BATCH_MAX_LOCATIONS = env_int("METEO_BATCH_MAX_LOCATIONS", 1000)
+
+# /station/nearby/batch : noyau NumPy jusqu'à cette taille de registre, k-d tree au-delà
+NEARBY_VECTOR_MAX_STATIONS = env_int("METEO_NEARBY_VECTOR_MAX_STATIONS", 5000)
+
+# /station/monthly et /point/monthly sans start/end : jours passés inclus
+MONTHLY_PAST_DAYS = env_int("METEO_MONTHLY_PAST_DAYS", 92)
+
+# Store disque des normales climatiques 1991-2020 (préchauffage : python normals.py)
+NORMALS_DIR = os.getenv("METEO_NORMALS_DIR", "normals_store")
+
+# Cache disque (SQLite WAL) partagé par les workers ; chemin vide pour le désactiver
+DISK_CACHE_PATH = os.getenv("METEO_DISK_CACHE", "meteo_cache.sqlite3")
+DISK_CACHE_MAX_BYTES = env_int("METEO_DISK_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+DISK_CACHE_COMPACT_INTERVAL = env_float("METEO_DISK_CACHE_COMPACT_INTERVAL", 300.0)
+
+
+# Préchauffage des entrées les plus demandées (stale-while-revalidate en arrière-plan)
+PREWARM_ENABLED = env_bool("METEO_PREWARM_ENABLED", True)
+PREWARM_TOP_N = env_int("METEO_PREWARM_TOP_N", 50)
+# Rafraîchit une entrée chaude quand il lui reste moins de PREWARM_LEAD secondes
+PREWARM_LEAD = env_float("METEO_PREWARM_LEAD", 30.0)
+PREWARM_JITTER = env_float("METEO_PREWARM_JITTER", 10.0)
+PREWARM_CONCURRENCY = env_int("METEO_PREWARM_CONCURRENCY", 2)
+PREWARM_INTERVAL = env_float("METEO_PREWARM_INTERVAL", 10.0)
+# Score multiplié par PREWARM_DECAY à chaque passage ; minimum pour être rafraîchie
+PREWARM_DECAY = env_float("METEO_PREWARM_DECAY", 0.95)
+PREWARM_MIN_SCORE = env_float("METEO_PREWARM_MIN_SCORE", 2.0)
@@ -0,0 +1,40 @@
+import os
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+# Pas de cache disque partagé pendant les tests (chaque test peut en ouvrir un temporaire)
+os.environ.setdefault("METEO_DISK_CACHE", "")
+
+import config  # noqa: E402
+import main  # noqa: E402
+from benchmarks.stub_upstream import StubUpstream
+from normals import NormalsStore
+from ratelimit import UpstreamBudget
+
+HEADERS = {"x-rapidapi-host": "testhost"}
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    # Open-Meteo remplacé par le stub local, servi en ASGI par le pool partagé
+    stub = StubUpstream()
+    monkeypatch.setattr(main, "normals_store", NormalsStore(str(tmp_path / "normals")))
+    main.upstream.transport = httpx.ASGITransport(app=stub.app)
+    main.upstream.breakers.clear()
+    main.upstream.limiters.clear()
+    main.rate_limiter.clear()
+    # Budget Open-Meteo plein au début de chaque test
+    monkeypatch.setattr(main, "upstream_budget", UpstreamBudget(config.UPSTREAM_BUDGET_PER_MINUTE,
+                                                                config.UPSTREAM_BUDGET_BURST))
+    main.response_cache.clear()
+    yield stub
+    main.upstream.transport = None
+    main.response_cache.clear()
+
+
+@pytest.fixture
+def api(stub):
+    with TestClient(main.app, headers=HEADERS) as client:
+        yield client
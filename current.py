@@ -0,0 +1,55 @@
+# Conditions actuelles : bloc `current=` d'Open-Meteo ramené au format WeatherCurrent
+from datetime import datetime, timedelta, timezone
+
+CURRENT_VARIABLES = "temperature_2m,relative_humidity_2m,precipitation,wind_speed_10m,weather_code"
+
+# Codes météo WMO utilisés par Open-Meteo
+WMO_CONDITIONS = {
+    0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Fog", 48: "Depositing rime fog",
+    51: "Light drizzle", 53: "Drizzle", 55: "Dense drizzle",
+    56: "Light freezing drizzle", 57: "Dense freezing drizzle",
+    61: "Slight rain", 63: "Rain", 65: "Heavy rain",
+    66: "Light freezing rain", 67: "Heavy freezing rain",
+    71: "Slight snow fall", 73: "Snow fall", 75: "Heavy snow fall", 77: "Snow grains",
+    80: "Slight rain showers", 81: "Rain showers", 82: "Violent rain showers",
+    85: "Slight snow showers", 86: "Heavy snow showers",
+    95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail",
+}
+
+
+def current_params(lat, lon):
+    return {"latitude": lat, "longitude": lon, "current": CURRENT_VARIABLES, "timezone": "auto"}
+
+
+def current_index(times, utc_offset_seconds, now=None):
+    """Indice de l'heure en cours (heure locale de la station) dans une série horaire."""
+    now = now or datetime.now(timezone.utc)
+    local = (now + timedelta(seconds=utc_offset_seconds)).strftime("%Y-%m-%dT%H:00")
+    # Les heures sont triées : dernière heure <= maintenant
+    idx = 0
+    for i, t in enumerate(times):
+        if t > local:
+            break
+        idx = i
+    return idx
+
+
+def current_conditions(data, station, now=None):
+    """Dictionnaire WeatherCurrent à partir d'une réponse Open-Meteo (bloc current ou hourly)."""
+    block = data.get("current")
+    if block is None:
+        # Fournisseur sans bloc current : heure en cours de la série horaire
+        hourly = data["hourly"]
+        idx = current_index(hourly["time"], data.get("utc_offset_seconds", 0), now)
+        block = {k: v[idx] for k, v in hourly.items()}
+    code = block.get("weather_code")
+    return {
+        "station": station,
+        "temperature": block.get("temperature_2m"),
+        "humidity": block.get("relative_humidity_2m"),
+        "wind_speed": block.get("wind_speed_10m"),
+        "precipitation": block.get("precipitation"),
+        "condition": WMO_CONDITIONS.get(code, "Unknown"),
+        "time": block.get("time"),
+    }
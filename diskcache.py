@@ -0,0 +1,109 @@
+# Cache disque partagé entre workers uvicorn : SQLite en mode WAL, corps compressés
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_stored_at ON entries (stored_at);
+"""
+
+
+def key_str(key):
+    return json.dumps(key, separators=(",", ":"))
+
+
+class DiskCache:
+    """Entrées compressées (zlib) avec date d'expiration ; plusieurs processus peuvent partager le fichier.
+
+    Écritures et compaction sur une connexion protégée par un verrou ; lectures sur une connexion
+    par thread, sans ce verrou : en mode WAL, un lecteur n'attend jamais un écrivain.
+    """
+
+    def __init__(self, path, max_bytes, level=6, keep_stale=0.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.level = level
+        # Durée de conservation après expiration (réponses de secours si l'upstream tombe)
+        self.keep_stale = keep_stale
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False,
+                                                      isolation_level=None)
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def get(self, key, max_stale=0.0):
+        """(corps, âge en secondes, ttl restant) ou None si absent/expiré depuis plus de `max_stale`."""
+        now = time.time()
+        row = self._reader().execute(
+            "SELECT body, stored_at, expires_at FROM entries WHERE key = ?", (key_str(key),)).fetchone()
+        if row is None or row[2] + max_stale <= now:
+            self.misses += 1
+            return None
+        self.hits += 1
+        body, stored_at, expires_at = row
+        return zlib.decompress(body), now - stored_at, expires_at - now
+
+    def set(self, key, body, ttl):
+        now = time.time()
+        packed = zlib.compress(body, self.level)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, body, stored_at, expires_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key_str(key), packed, now, now + ttl, len(packed)))
+
+    def size(self):
+        return self._reader().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def compact(self):
+        """Supprime les entrées expirées puis les plus anciennes au-delà de max_bytes."""
+        with self._lock:
+            conn = self._conn
+            expired = conn.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (time.time() - self.keep_stale,)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                # Plus anciennes d'abord, jusqu'à libérer l'excédent
+                keys = []
+                for key, size in conn.execute("SELECT key, size FROM entries ORDER BY stored_at"):
+                    keys.append((key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+                evicted = len(keys)
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        return expired, evicted
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
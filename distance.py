@@ -0,0 +1,85 @@
+# Noyau haversine vectorisé (NumPy) pour les calculs de distance en masse
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(phi1, lam1, cos1, phi2, lam2, cos2):
+    """Haversine sur des tableaux (radians, cos(lat) fournis), avec diffusion NumPy."""
+    a = np.sin((phi2 - phi1) * 0.5)
+    a *= a
+    b = np.sin((lam2 - lam1) * 0.5)
+    b *= b
+    b *= cos2
+    b *= cos1
+    a += b
+    np.minimum(a, 1.0, out=a)
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= 2 * EARTH_RADIUS_KM
+    return a
+
+
+class StationArrays:
+    """Coordonnées des stations en tableaux float64 contigus (radians, cos(lat) précalculé)."""
+
+    def __init__(self, lats, lons):
+        self.lat = np.ascontiguousarray(np.radians(np.asarray(lats, dtype=np.float64)))
+        self.lon = np.ascontiguousarray(np.radians(np.asarray(lons, dtype=np.float64)))
+        self.cos_lat = np.cos(self.lat)
+        # Vecteurs unitaires (n, 3) : classement par produit scalaire en un seul appel BLAS
+        self.xyz = np.ascontiguousarray(np.stack([
+            self.cos_lat * np.cos(self.lon),
+            self.cos_lat * np.sin(self.lon),
+            np.sin(self.lat),
+        ], axis=1))
+
+    def __len__(self):
+        return len(self.lat)
+
+    def distances(self, lat, lon, start=0, stop=None):
+        """Distances (km) d'un point aux stations [start:stop]."""
+        phi, lam = math.radians(lat), math.radians(lon)
+        return haversine_km(phi, lam, math.cos(phi),
+                            self.lat[start:stop], self.lon[start:stop], self.cos_lat[start:stop])
+
+    def distances_many(self, lats, lons):
+        """Matrice (points x stations) des distances en km."""
+        phi = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+        lam = np.radians(np.asarray(lons, dtype=np.float64))[:, None]
+        return haversine_km(phi, lam, np.cos(phi), self.lat, self.lon, self.cos_lat)
+
+    def nearest_many(self, lats, lons, k=5, radius_km=None, block=1024):
+        """Pour chaque point, (indices, distances) des k stations les plus proches."""
+        results = []
+        k = min(k, len(self))
+        if k == 0:
+            return [(np.empty(0, dtype=np.intp), np.empty(0)) for _ in lats]
+        phi = np.radians(np.asarray(lats, dtype=np.float64))
+        lam = np.radians(np.asarray(lons, dtype=np.float64))
+        cos_phi = np.cos(phi)
+        queries = np.stack([cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)], axis=1)
+        # Traitement par blocs pour borner la mémoire de la matrice (points x stations)
+        for i in range(0, len(queries), block):
+            # Le produit scalaire décroît avec la distance : sélection des k meilleurs sans trigo
+            score = queries[i:i + block] @ self.xyz.T
+            np.negative(score, out=score)
+            if k < len(self):
+                cols = np.argpartition(score, k - 1, axis=1)[:, :k]
+            else:
+                cols = np.broadcast_to(np.arange(len(self)), score.shape)
+            # Distances exactes (haversine) uniquement pour les stations retenues
+            sl = slice(i, i + block)
+            dist = haversine_km(phi[sl, None], lam[sl, None], cos_phi[sl, None],
+                                self.lat[cols], self.lon[cols], self.cos_lat[cols])
+            order = np.argsort(dist, axis=1, kind="stable")
+            cols = np.take_along_axis(cols, order, axis=1)
+            dist = np.take_along_axis(dist, order, axis=1)
+            for idx, row in zip(cols, dist):
+                if radius_km is not None:
+                    keep = row <= radius_km
+                    idx, row = idx[keep], row[keep]
+                results.append((idx, row))
+        return results
@@ -0,0 +1,35 @@
+# Sérialisation JSON rapide (orjson si installé) et réponse qui évite jsonable_encoder
+import json
+
+from starlette.responses import Response
+
+from metrics import stage
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+if ORJSON_AVAILABLE:
+    loads = orjson.loads
+
+    def dumps(obj):
+        return orjson.dumps(obj)
+else:
+    loads = json.loads
+
+    def dumps(obj):
+        # Même encodage que JSONResponse de FastAPI
+        return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """Contenu déjà composé de types JSON natifs : sérialisé directement, sans re-parcours par FastAPI."""
+
+    media_type = "application/json"
+
+    def render(self, content):
+        with stage("encode"):
+            return dumps(content)
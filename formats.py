@@ -0,0 +1,118 @@
+# Formats de sortie des séries temporelles : colonnes Open-Meteo converties sans dict par ligne
+import csv
+import io
+from typing import Literal
+
+import numpy as np
+from starlette.responses import Response, StreamingResponse
+
+from fastjson import dumps
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+OutputFormat = Literal["json", "csv", "ndjson", "arrow", "parquet"]
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Blocs de séries reconnus, par ordre de préférence
+SERIES_BLOCKS = ("hourly", "daily", "monthly")
+# Lignes par morceau de corps streamé
+CHUNK_ROWS = 2000
+
+
+class FormatUnavailable(Exception):
+    """Format demandé dont la dépendance optionnelle (pyarrow) n'est pas installée."""
+
+
+def series_columns(data):
+    """(bloc, {colonne: valeurs}) de la série contenue dans une réponse Open-Meteo ou calculée."""
+    for block in SERIES_BLOCKS:
+        series = data.get(block)
+        if isinstance(series, dict):
+            return block, series
+        if isinstance(series, list):
+            # Agrégats mensuels : liste de lignes -> colonnes
+            names = list(series[0]) if series else []
+            return block, {name: [row[name] for row in series] for name in names}
+    return None, {}
+
+
+def metadata(data):
+    return {k: v for k, v in data.items() if not isinstance(v, (dict, list)) and v is not None}
+
+
+def csv_chunks(columns):
+    names = list(columns)
+    values = [columns[n] for n in names]
+    rows = len(values[0]) if values else 0
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(names)
+    for start in range(0, rows, CHUNK_ROWS):
+        writer.writerows(zip(*(v[start:start + CHUNK_ROWS] for v in values)))
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if rows == 0:
+        yield buf.getvalue().encode()
+
+
+def ndjson_chunks(columns):
+    # Clés encodées une fois ; chaque ligne est assemblée à partir des valeurs de la ligne
+    keys = [dumps(name) + b":" for name in columns]
+    values = list(columns.values())
+    rows = len(values[0]) if values else 0
+    for start in range(0, rows, CHUNK_ROWS):
+        lines = []
+        for row in zip(*(v[start:start + CHUNK_ROWS] for v in values)):
+            lines.append(b"{" + b",".join(k + dumps(x) for k, x in zip(keys, row)) + b"}\n")
+        yield b"".join(lines)
+
+
+def arrow_column(name, values):
+    if name in ("time", "month") and values and isinstance(values[0], str):
+        times = np.array(values, dtype="datetime64")
+        # Arrow : dates (jour) ou horodatages à la seconde
+        return pa.array(times if times.dtype == np.dtype("datetime64[D]") else times.astype("datetime64[s]"))
+    return pa.array(values)
+
+
+def arrow_table(data, columns):
+    table = pa.table({name: arrow_column(name, values) for name, values in columns.items()})
+    meta = {k: str(v) for k, v in metadata(data).items()}
+    return table.replace_schema_metadata(meta)
+
+
+def arrow_bytes(table, fmt):
+    sink = io.BytesIO()
+    if fmt == "parquet":
+        pa.parquet.write_table(table, sink, compression="zstd")
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
+
+
+def render(data, fmt, headers=None):
+    """Réponse au format `fmt` (hors json) pour la série de `data`."""
+    _, columns = series_columns(data)
+    media_type = MEDIA_TYPES[fmt]
+    if fmt == "csv":
+        return StreamingResponse(csv_chunks(columns), media_type=media_type, headers=headers)
+    if fmt == "ndjson":
+        return StreamingResponse(ndjson_chunks(columns), media_type=media_type, headers=headers)
+    if not ARROW_AVAILABLE:
+        raise FormatUnavailable(fmt)
+    return Response(arrow_bytes(arrow_table(data, columns), fmt), media_type=media_type, headers=headers)
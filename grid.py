@@ -0,0 +1,18 @@
+# Quantification des coordonnées sur la grille des modèles Open-Meteo (meilleur taux de cache)
+
+
+def snap(value, resolution):
+    # Arrondi au nœud le plus proche ; 6 décimales pour des clés de cache stables
+    return round(round(value / resolution) * resolution, 6)
+
+
+def snap_coords(lat, lon, resolution):
+    """(lat, lon) ramenés au nœud de grille le plus proche pour une résolution en degrés."""
+    lat = min(max(snap(lat, resolution), -90.0), 90.0)
+    lon = snap(lon, resolution)
+    # 180 et -180 désignent la même maille
+    if lon >= 180.0:
+        lon = round(lon - 360.0, 6)
+    elif lon < -180.0:
+        lon = round(lon + 360.0, 6)
+    return lat, lon
@@ -1,11 +1,79 @@
 from fastapi import FastAPI, Query, HTTPException, Request, Body
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from typing import List, Optional
-from pydantic import BaseModel
-import httpx
+from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
 from stations import STATIONS
+from registry import StationRegistry
+from upstream import UpstreamPool, UpstreamError, UpstreamTimeout, UpstreamOverloaded, CircuitOpenError
+from cache import ResponseCache, make_key
+from singleflight import SingleFlight
+from diskcache import DiskCache
+from prewarm import Prewarmer
+from spatial import StationIndex
+from distance import StationArrays
+from search import SearchIndex
+from aggregate import monthly_aggregates
+from fastjson import FastJSONResponse, dumps, loads
+from compression import CompressionMiddleware, Precompressor, accepted_encoding
+from conditional import ConditionalMiddleware, not_modified, validator_headers
+from metrics import MetricsMiddleware, registry as metrics_registry, stage
+from ratelimit import BudgetExhausted, RateLimiter, RateLimitMiddleware, UpstreamBudget, current_client
+from formats import FormatUnavailable, OutputFormat, render
+from grid import snap_coords
+from current import current_conditions
+from normals import CLIMATE_RANGE, PERIOD, NormalsStore, normals_payload, point_key
+from providers import FileProvider, OpenMeteoProvider
+from datetime import date
+import config
+import asyncio
 import math
 
+# Pool de connexions partagé par tous les endpoints (ouvert/fermé par le lifespan)
+upstream = UpstreamPool()
+# Source des données : Open-Meteo et ses miroirs, ou réponses enregistrées (METEO_PROVIDER=file)
+provider = FileProvider(config.PROVIDER_DIR) if config.PROVIDER == "file" else OpenMeteoProvider(upstream)
+# Cache des réponses Open-Meteo, partagé par tous les endpoints
+# Niveaux lus comme flottants par env_map
+COMPRESSION_LEVELS = {e: int(level) for e, level in config.COMPRESSION_LEVELS.items()}
+# Les entrées sont compressées une fois à la mise en cache, servies telles quelles ensuite
+response_cache = ResponseCache(config.CACHE_MAX_BYTES, config.CACHE_MAX_STALE,
+                               encode=Precompressor(config.COMPRESSION_ENCODINGS, COMPRESSION_LEVELS,
+                                                    config.COMPRESSION_MIN_BYTES))
+# Un seul appel Open-Meteo en vol par (URL, paramètres)
+upstream_flights = SingleFlight()
+# Limite de requêtes par client RapidAPI et budget global d'appels Open-Meteo
+rate_limiter = RateLimiter(config.RATE_LIMIT_PLANS, config.RATE_LIMIT_DEFAULT_PLAN, config.RATE_LIMIT_MAX_CLIENTS)
+upstream_budget = (UpstreamBudget(config.UPSTREAM_BUDGET_PER_MINUTE, config.UPSTREAM_BUDGET_BURST,
+                                  config.UPSTREAM_BUDGET_MAX_QUEUE)
+                   if config.UPSTREAM_BUDGET_PER_MINUTE > 0 else None)
+# Normales climatiques précalculées (voir `python normals.py`)
+normals_store = NormalsStore(config.NORMALS_DIR)
+# Cache disque partagé par les workers et conservé entre redémarrages (désactivé si chemin vide)
+disk_cache = (DiskCache(config.DISK_CACHE_PATH, config.DISK_CACHE_MAX_BYTES, keep_stale=config.CACHE_MAX_STALE)
+              if config.DISK_CACHE_PATH else None)
+
+async def compact_disk_cache():
+    while True:
+        await asyncio.sleep(config.DISK_CACHE_COMPACT_INTERVAL)
+        await asyncio.to_thread(disk_cache.compact)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await provider.start()
+    compaction = asyncio.create_task(compact_disk_cache()) if disk_cache is not None else None
+    if config.PREWARM_ENABLED:
+        prewarmer.start()
+    yield
+    if compaction is not None:
+        compaction.cancel()
+    if config.PREWARM_ENABLED:
+        await prewarmer.stop()
+    await provider.aclose()
+
 app = FastAPI(
+    lifespan=lifespan,
     title="MeteoAPI",
     description="API météo inspirée de Meteostat, compatible RapidAPI.",
     version="1.0.0",
@@ -15,16 +83,30 @@ app = FastAPI(
         {"name": "Forecast", "description": "Prévisions météo"},
         {"name": "Stations", "description": "Recherche de stations météo"},
         {"name": "Station Data", "description": "Données de la station"},
-        {"name": "Point Data", "description": "Données du point"}
+        {"name": "Point Data", "description": "Données du point"},
+        {"name": "Batch", "description": "Données pour plusieurs stations/points en un appel"},
+        {"name": "Monitoring", "description": "État des caches et du préchauffage"}
     ]
 )
 
+# Négociation Accept-Encoding ; compresse les réponses qui ne sortent pas du cache
+app.add_middleware(CompressionMiddleware, encodings=config.COMPRESSION_ENCODINGS, levels=COMPRESSION_LEVELS,
+                   minimum_size=config.COMPRESSION_MIN_BYTES)
+# If-None-Match / If-Modified-Since : 304 calculés depuis les métadonnées du cache
+app.add_middleware(ConditionalMiddleware)
+# 429 et X-RateLimit-* par client RapidAPI, avant tout autre traitement
+if config.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+# Durées par route et par étape (le plus externe : mesure aussi la compression)
+app.add_middleware(MetricsMiddleware)
+
 # Modèles de données
 class WeatherCurrent(BaseModel):
     station: str
     temperature: float
     humidity: int
     wind_speed: float
+    precipitation: Optional[float] = None
     condition: str
     time: str
 
@@ -68,8 +150,18 @@ class DailyData(BaseModel):
 
 class MonthlyData(BaseModel):
     month: str
-    temperature_avg: float
-    precipitation: float
+    temperature_avg: Optional[float] = None
+    temperature_min: Optional[float] = None
+    temperature_max: Optional[float] = None
+    precipitation: Optional[float] = None
+    days: int
+    rain_days: int
+
+class MonthlyResponse(BaseModel):
+    latitude: float
+    longitude: float
+    timezone: Optional[str] = None
+    monthly: List[MonthlyData]
 
 class ClimateData(BaseModel):
     period: str
@@ -84,71 +176,293 @@ class StationMeta(BaseModel):
     lon: float
     elevation: float
 
+class Point(BaseModel):
+    lat: float
+    lon: float
+
+class BatchRequest(BaseModel):
+    stations: List[str] = []
+    points: List[Point] = []
+
+class NearbyBatchRequest(BaseModel):
+    points: List[Point]
+    k: int = Field(5, ge=1, le=1000)
+    radius_km: Optional[float] = Field(None, gt=0)
+
 # Vérification proxy RapidAPI
 async def verify_rapidapi_proxy(request: Request):
-    if not (request.headers.get("x-rapidapi-host") or request.headers.get("x-rapidapi-user")):
-        raise HTTPException(status_code=401, detail="Accès uniquement via le proxy RapidAPI.")
+    with stage("auth"):
+        if not (request.headers.get("x-rapidapi-host") or request.headers.get("x-rapidapi-user")):
+            raise HTTPException(status_code=401, detail="Accès uniquement via le proxy RapidAPI.")
+
+# Registre des stations (index par id et par pays), construit une fois au chargement
+registry = StationRegistry(STATIONS)
+
+@app.exception_handler(UpstreamError)
+async def upstream_error_handler(request: Request, exc: UpstreamError):
+    if isinstance(exc, CircuitOpenError):
+        return JSONResponse({"detail": "Open-Meteo indisponible"}, status_code=503,
+                            headers={"Retry-After": str(math.ceil(exc.retry_after))})
+    if isinstance(exc, BudgetExhausted):
+        return JSONResponse({"detail": "Quota Open-Meteo atteint"}, status_code=503,
+                            headers={"Retry-After": str(math.ceil(exc.retry_after))})
+    if isinstance(exc, UpstreamOverloaded):
+        return JSONResponse({"detail": "Open-Meteo surchargé"}, status_code=503,
+                            headers={"Retry-After": str(math.ceil(exc.retry_after))})
+    if isinstance(exc, UpstreamTimeout):
+        return JSONResponse({"detail": "Open-Meteo trop lent"}, status_code=504)
+    return JSONResponse({"detail": "Erreur Open-Meteo"}, status_code=502)
+
+# Appel du fournisseur, résultat stocké dans les caches mémoire et disque
+async def fetch_upstream(key, query):
+    if upstream_budget is not None:
+        await upstream_budget.acquire(current_client.get())
+    r = await provider.get(query)
+    if r.status_code != 200:
+        raise UpstreamError(r.status_code)
+    ttl = config.CACHE_TTLS[query.dataset]
+    entry = await response_cache.store(key, r.content, ttl)
+    if disk_cache is not None:
+        await asyncio.to_thread(disk_cache.set, key, r.content, ttl)
+    return entry
+
+# Entrée du cache disque encore valable au moins `min_remaining` secondes, copiée en mémoire
+# (lecture SQLite et décompression hors de la boucle asyncio)
+async def adopt_disk_entry(key, min_remaining=0.0):
+    hit = await asyncio.to_thread(disk_cache.get, key) if disk_cache is not None else None
+    if hit is None or hit[2] <= min_remaining:
+        return None
+    body, age, remaining = hit
+    return await response_cache.store(key, body, age + remaining, age=age)
+
+# Dernière réponse connue (mémoire puis disque), même expirée
+async def stale_entry(key):
+    entry = response_cache.get_stale(key)
+    if entry is None and disk_cache is not None:
+        hit = await asyncio.to_thread(disk_cache.get, key, config.CACHE_MAX_STALE)
+        if hit is not None:
+            body, age, remaining = hit
+            entry = await response_cache.store(key, body, age + remaining, age=age)
+    return entry
+
+# Récupère une réponse du fournisseur en passant par le cache (clé : source du jeu + paramètres)
+async def fetch_cached(query):
+    key = provider.key(query)
+    if config.PREWARM_ENABLED:
+        prewarmer.record(key, query)
+    with stage("cache"):
+        entry = response_cache.get(key)
+    if entry is not None:
+        return entry
 
-# Helper pour trouver les coordonnées d'une station
-station_coords = {s["id"]: (s["lat"], s["lon"]) for s in STATIONS}
+    async def fetch():
+        # Cache disque partagé entre workers, puis Open-Meteo
+        return await adopt_disk_entry(key) or await fetch_upstream(key, query)
+
+    stale = response_cache.get_stale(key)
+    if stale is not None and stale.age - stale.ttl < config.CACHE_STALE_WHILE_REVALIDATE:
+        # Expirée depuis peu : servie telle quelle, rafraîchie en arrière-plan
+        upstream_flights.spawn(key, fetch)
+        return stale
+    budget = config.LATENCY_BUDGETS.get(query.dataset, config.UPSTREAM_DEFAULT_TIMEOUT)
+    try:
+        # L'appel continue après le dépassement du budget et remplira le cache
+        return await asyncio.wait_for(upstream_flights.do(key, fetch), budget)
+    except asyncio.TimeoutError:
+        stale = stale or await stale_entry(key)
+        if stale is None:
+            raise UpstreamTimeout()
+        return stale
+    except UpstreamError as e:
+        stale = (stale or await stale_entry(key)) if e.transient else None
+        if stale is None:
+            raise
+        return stale
+
+# Rafraîchissement d'une entrée chaude avant expiration (un autre worker a pu le faire via le disque)
+async def refresh_cached(key, query):
+    async def fetch():
+        return await adopt_disk_entry(key, config.PREWARM_LEAD) or await fetch_upstream(key, query)
+
+    await upstream_flights.do(key, fetch)
+
+def cached_remaining(key):
+    entry = response_cache.peek(key)
+    return entry.remaining if entry is not None else None
+
+prewarmer = Prewarmer(
+    refresh_cached, cached_remaining,
+    top_n=config.PREWARM_TOP_N, lead=config.PREWARM_LEAD, jitter=config.PREWARM_JITTER,
+    concurrency=config.PREWARM_CONCURRENCY, interval=config.PREWARM_INTERVAL,
+    decay=config.PREWARM_DECAY, min_score=config.PREWARM_MIN_SCORE,
+)
+
+def cache_headers(entry):
+    headers = {
+        "Cache-Control": f"public, max-age={max(int(entry.remaining), 0)}",
+        "Age": str(int(entry.age)),
+    }
+    if not entry.fresh:
+        # Réponse de secours (upstream lent, en erreur ou en cours de rafraîchissement)
+        headers["Warning"] = '110 - "Response is Stale"'
+        headers["X-Stale-Seconds"] = str(int(-entry.remaining))
+    return headers
+
+FORMAT_QUERY = Query("json", description="json, csv, ndjson, arrow ou parquet (séries temporelles)")
+CLIMATE_START = Query(None, description="Début de la série brute (défaut 1991-01-01)")
+CLIMATE_END = Query(None, description="Fin de la série brute (défaut 2020-12-31)")
+CLIMATE_STREAM = Query(False, description="Série brute relayée en streaming, sans mise en cache")
+
+# Renvoie le corps Open-Meteo tel quel (json) ou converti colonne par colonne dans le format demandé
+def cached_response(entry, format="json"):
+    encoding = accepted_encoding.get()
+    if format == "json":
+        body = entry.variants.get(encoding) if encoding else None
+        variant = encoding if body is not None else None
+        headers = {**cache_headers(entry), **validator_headers(entry, variant)}
+        if entry.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if not_modified(entry, variant):
+            return Response(status_code=304, headers=headers)
+        if body is None:
+            return Response(entry.body, media_type="application/json", headers=headers)
+        # Variante pré-compressée : aucun coût de compression par requête
+        headers["Content-Encoding"] = encoding
+        return Response(body, media_type="application/json", headers=headers)
+    variant = f"{format}-{encoding}" if encoding else format
+    headers = {**cache_headers(entry), **validator_headers(entry, variant)}
+    if not_modified(entry, variant):
+        return Response(status_code=304, headers=headers)
+    try:
+        with stage("parse"):
+            data = loads(entry.body)
+        with stage("encode"):
+            return render(data, format, headers)
+    except FormatUnavailable:
+        raise HTTPException(status_code=501, detail=f"Format {format} indisponible (pyarrow non installé)")
+
+# Série climat relayée morceau par morceau : mémoire bornée quelle que soit la période demandée
+async def stream_upstream(query):
+    if upstream_budget is not None:
+        await upstream_budget.acquire(current_client.get())
+    r = await provider.stream(query)
+    if r.status_code != 200:
+        await r.aclose()
+        raise UpstreamError(r.status_code)
+
+    async def body():
+        try:
+            async for chunk in r.aiter_bytes():
+                yield chunk
+        finally:
+            await r.aclose()
+
+    # Client parti avant le début de l'itération : le générateur ne démarre jamais, la tâche de fond
+    # ferme quand même la réponse et rend sa connexion au pool (aclose est idempotent)
+    return StreamingResponse(body(), media_type="application/json", background=BackgroundTask(r.aclose))
+
+def climate_dates(start_date, end_date):
+    start = (start_date or date.fromisoformat(PERIOD[0])).isoformat()
+    end = (end_date or date.fromisoformat(PERIOD[1])).isoformat()
+    if not CLIMATE_RANGE[0] <= start <= end <= CLIMATE_RANGE[1]:
+        raise HTTPException(status_code=400, detail=f"Période invalide (entre {CLIMATE_RANGE[0]} et {CLIMATE_RANGE[1]})")
+    return start, end
+
+# Normales 1991-2020 : store disque, calculées une fois depuis la série brute.
+# Série brute : raw=true, ou dès qu'une période start_date/end_date est demandée ; stream=true la relaie sans la mettre en mémoire.
+async def fetch_climate(store_key, lat, lon, raw, format="json", start_date=None, end_date=None, stream=False):
+    raw = raw or stream or start_date is not None or end_date is not None
+    query = provider.climate(lat, lon, *climate_dates(start_date, end_date))
+    if stream and format != "json":
+        raise HTTPException(status_code=400, detail="stream=true n'est disponible qu'avec format=json")
+    try:
+        if stream:
+            entry = response_cache.get(provider.key(query))
+            return cached_response(entry) if entry is not None else await stream_upstream(query)
+        if raw:
+            return cached_response(await fetch_cached(query), format)
+        key = make_key("normals:" + provider.source("climate"), query.params)
+        entry = response_cache.get(key)
+        if entry is None:
+            # Lecture/décompression, calcul et écriture gzip hors de la boucle asyncio
+            body = await asyncio.to_thread(normals_store.get, store_key)
+            if body is None:
+                series = await fetch_cached(query)
+                with stage("parse"):
+                    data = loads(series.body)
+                body = await asyncio.to_thread(normals_payload, data)
+                await asyncio.to_thread(normals_store.put, store_key, body)
+            entry = await response_cache.store(key, body, config.CACHE_TTLS["normals"])
+        return cached_response(entry, format)
+    except UpstreamError as e:
+        if e.status_code == 400:
+            return {"error": True, "reason": "No climate data for this location"}
+        raise
+
+# Agrégats mensuels calculés depuis le journalier, mis en cache séparément de la série brute
+async def fetch_monthly(lat, lon, start, end, format="json"):
+    if (start is None) != (end is None):
+        raise HTTPException(status_code=400, detail="Paramètres start et end à fournir ensemble")
+    if start and start > end:
+        raise HTTPException(status_code=400, detail="start doit précéder end")
+    query = provider.monthly(lat, lon, start, end)
+    key = make_key("monthly:" + provider.source(query.dataset), query.params)
+    entry = response_cache.get(key)
+    if entry is None:
+        daily = await fetch_cached(query)
+        with stage("parse"):
+            data = loads(daily.body)
+        body = dumps({
+            "latitude": data.get("latitude", lat),
+            "longitude": data.get("longitude", lon),
+            "timezone": data.get("timezone"),
+            "monthly": monthly_aggregates(data.get("daily", {})),
+        })
+        # Expire en même temps que la série journalière dont il est issu
+        entry = await response_cache.store(key, body, max(daily.remaining, 0))
+    return cached_response(entry, format)
 
 # Endpoints
-@app.get("/current", tags=["Current"])
+@app.get("/current", response_model=WeatherCurrent, tags=["Current"])
 async def get_current_weather(request: Request, station: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None):
     await verify_rapidapi_proxy(request)
     if station:
-        coords = station_coords.get(station)
+        coords = registry.coords(station)
         if not coords:
             raise HTTPException(status_code=404, detail="Station inconnue")
         lat, lon = coords
     if lat is None or lon is None:
         raise HTTPException(status_code=400, detail="Paramètres manquants (station ou lat/lon)")
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "hourly": "temperature_2m,precipitation,relative_humidity_2m,wind_speed_10m",
-        "timezone": "auto"
-    }
-    async with httpx.AsyncClient() as client:
-        r = await client.get(OPEN_METEO_BASE, params=params)
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail="Erreur Open-Meteo")
-        data = r.json()
-        if "hourly" in data and "time" in data["hourly"]:
-            idx = -1
-            result = {k: v[idx] for k, v in data["hourly"].items()}
-            return result
-        return data
+    # Bloc `current=` uniquement : quelques centaines d'octets au lieu de 7 jours horaires
+    entry = await fetch_cached(provider.current(lat, lon))
+    headers = {**cache_headers(entry), **validator_headers(entry, "current")}
+    if not_modified(entry, "current"):
+        return Response(status_code=304, headers=headers)
+    with stage("parse"):
+        data = loads(entry.body)
+    result = current_conditions(data, station or f"{lat},{lon}")
+    return FastJSONResponse(result, headers=headers)
 
 @app.get("/history", tags=["History"])
-async def get_history_weather(request: Request, station: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None, date: Optional[str] = None):
+async def get_history_weather(request: Request, station: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None, date: Optional[str] = None,
+                              format: OutputFormat = FORMAT_QUERY):
     await verify_rapidapi_proxy(request)
     if station:
-        coords = station_coords.get(station)
+        coords = registry.coords(station)
         if not coords:
             raise HTTPException(status_code=404, detail="Station inconnue")
         lat, lon = coords
     if lat is None or lon is None or date is None:
         raise HTTPException(status_code=400, detail="Paramètres manquants (station/lat/lon/date)")
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "start_date": date,
-        "end_date": date,
-        "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum,wind_speed_10m_max",
-        "timezone": "auto"
-    }
-    async with httpx.AsyncClient() as client:
-        r = await client.get(OPEN_METEO_BASE, params=params)
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail="Erreur Open-Meteo")
-        return r.json()
+    entry = await fetch_cached(provider.history(lat, lon, date))
+    return cached_response(entry, format)
 
 @app.get("/forecast", tags=["Forecast"])
-async def get_forecast_weather(request: Request, station: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None, days: int = 7):
+async def get_forecast_weather(request: Request, station: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None, days: int = 7,
+                               format: OutputFormat = FORMAT_QUERY):
     await verify_rapidapi_proxy(request)
     if station:
-        coords = station_coords.get(station)
+        coords = registry.coords(station)
         if not coords:
             raise HTTPException(status_code=404, detail="Station inconnue")
         lat, lon = coords
@@ -156,119 +470,127 @@ async def get_forecast_weather(request: Request, station: Optional[str] = None,
         raise HTTPException(status_code=400, detail="Paramètres manquants (station ou lat/lon)")
     if days is None:
         days = 7
-    from datetime import date, timedelta
-    start = date.today().isoformat()
-    end = (date.today() + timedelta(days=days)).isoformat()
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "start_date": start,
-        "end_date": end,
-        "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum,wind_speed_10m_max",
-        "timezone": "auto"
-    }
-    async with httpx.AsyncClient() as client:
-        r = await client.get(OPEN_METEO_BASE, params=params)
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail="Erreur Open-Meteo")
-        return r.json()
+    entry = await fetch_cached(provider.forecast(lat, lon, days))
+    return cached_response(entry, format)
 
 @app.get("/stations", response_model=List[Station], tags=["Stations"])
 async def get_stations(request: Request, country: Optional[str] = Query(None)):
     await verify_rapidapi_proxy(request)
-    if country:
-        return [s for s in STATIONS if s["country"] == country]
-    return STATIONS
+    # Listes pré-sérialisées par le registre
+    return Response(registry.json(country or None), media_type="application/json")
 
 @app.get("/ping", tags=["Current"])
 async def ping():
     return {"status": "ok"}
 
+# Caches, single-flight, préchauffage et disjoncteurs : lus à chaque appel de /metrics
+@metrics_registry.collector
+def collect_state():
+    cache = response_cache.stats()
+    flights = upstream_flights.stats()
+    warm = prewarmer.stats()
+    samples = [
+        ("meteo_cache_hits_total", "counter", "Lectures du cache mémoire trouvées", [({}, cache["hits"])]),
+        ("meteo_cache_misses_total", "counter", "Lectures du cache mémoire manquées", [({}, cache["misses"])]),
+        ("meteo_cache_hit_ratio", "gauge", "Part des lectures du cache mémoire trouvées", [({}, cache["hit_ratio"])]),
+        ("meteo_cache_bytes", "gauge", "Taille du cache mémoire", [({}, cache["bytes"])]),
+        ("meteo_cache_evictions_total", "counter", "Entrées évincées du cache mémoire", [({}, cache["evictions"])]),
+        ("meteo_singleflight_coalesced_total", "counter", "Appels Open-Meteo évités par regroupement",
+         [({}, flights["coalesced"])]),
+        ("meteo_prewarm_queue_depth", "gauge", "Rafraîchissements en attente", [({}, warm["queue_depth"])]),
+        ("meteo_prewarm_refreshed_total", "counter", "Entrées rafraîchies par le préchauffage",
+         [({}, warm["refreshed"])]),
+        ("meteo_circuit_open", "gauge", "Disjoncteur ouvert (1) par hôte",
+         [({"host": host}, int(s["state"] != "closed")) for host, s in upstream.stats().items()]),
+    ]
+    limits = upstream.concurrency_stats()
+    if limits:
+        samples.append(("meteo_upstream_concurrency_limit", "gauge", "Limite de concurrence adaptative par endpoint",
+                        [({"endpoint": e}, s["limit"]) for e, s in limits.items()]))
+        samples.append(("meteo_upstream_concurrency_queued", "gauge", "Appels en attente d'une place par endpoint",
+                        [({"endpoint": e}, s["queued"]) for e, s in limits.items()]))
+        samples.append(("meteo_upstream_shed_total", "counter", "Appels refusés (503), file de concurrence pleine",
+                        [({"endpoint": e}, s["shed"]) for e, s in limits.items()]))
+    samples.append(("meteo_rate_limited_total", "counter", "Requêtes refusées (429) par la limite des clients",
+                    [({}, rate_limiter.rejected)]))
+    if upstream_budget is not None:
+        budget = upstream_budget.stats()
+        samples.append(("meteo_upstream_budget_queued", "gauge", "Appels Open-Meteo en attente du budget",
+                        [({}, budget["queued"])]))
+        samples.append(("meteo_upstream_budget_rejected_total", "counter", "Appels refusés, file du budget pleine",
+                        [({}, budget["rejected"])]))
+    if disk_cache is not None:
+        samples.append(("meteo_disk_cache_hits_total", "counter", "Lectures du cache disque trouvées",
+                        [({}, disk_cache.hits)]))
+        samples.append(("meteo_disk_cache_misses_total", "counter", "Lectures du cache disque manquées",
+                        [({}, disk_cache.misses)]))
+    return samples
+
+@app.get("/metrics", tags=["Monitoring"])
+async def get_metrics():
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/stats", tags=["Monitoring"])
+async def get_stats():
+    return {
+        "cache": response_cache.stats(),
+        "singleflight": upstream_flights.stats(),
+        "prewarm": prewarmer.stats(),
+        "circuits": upstream.stats(),
+        "concurrency": upstream.concurrency_stats(),
+        "provider": provider.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "upstream_budget": upstream_budget.stats() if upstream_budget is not None else None,
+    }
+
 # Station Data
 @app.get("/station/hourly", tags=["Station Data"])
-async def get_hourly_station_data(request: Request, station: str = Query(...)):
+async def get_hourly_station_data(request: Request, station: str = Query(...), format: OutputFormat = FORMAT_QUERY):
     await verify_rapidapi_proxy(request)
-    lat, lon = station_coords.get(station, (None, None))
+    lat, lon = registry.coords(station) or (None, None)
     if lat is None or lon is None:
         raise HTTPException(status_code=404, detail="Station inconnue")
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "hourly": "temperature_2m,precipitation,relative_humidity_2m,wind_speed_10m",
-        "timezone": "auto"
-    }
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(OPEN_METEO_BASE, params=params)
-        resp.raise_for_status()
-        data = resp.json()
-    return data
+    entry = await fetch_cached(provider.hourly(lat, lon))
+    return cached_response(entry, format)
 
 @app.get("/station/daily", tags=["Station Data"])
-async def get_daily_station_data(request: Request, station: str = Query(...)):
+async def get_daily_station_data(request: Request, station: str = Query(...), format: OutputFormat = FORMAT_QUERY):
     await verify_rapidapi_proxy(request)
-    lat, lon = station_coords.get(station, (None, None))
+    lat, lon = registry.coords(station) or (None, None)
     if lat is None or lon is None:
         raise HTTPException(status_code=404, detail="Station inconnue")
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
-        "timezone": "auto"
-    }
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(OPEN_METEO_BASE, params=params)
-        resp.raise_for_status()
-        data = resp.json()
-    return data
-
-@app.get("/station/monthly", tags=["Station Data"])
-async def get_monthly_station_data(request: Request, station: str = Query(...)):
+    entry = await fetch_cached(provider.daily(lat, lon))
+    return cached_response(entry, format)
+
+@app.get("/station/monthly", response_model=MonthlyResponse, tags=["Station Data"])
+async def get_monthly_station_data(request: Request, station: str = Query(...),
+                                   start: Optional[date] = None, end: Optional[date] = None,
+                                   format: OutputFormat = FORMAT_QUERY):
     await verify_rapidapi_proxy(request)
-    lat, lon = station_coords.get(station, (None, None))
+    lat, lon = registry.coords(station) or (None, None)
     if lat is None or lon is None:
         raise HTTPException(status_code=404, detail="Station inconnue")
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
-        "timezone": "auto"
-    }
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(OPEN_METEO_BASE, params=params)
-        resp.raise_for_status()
-        data = resp.json()
-    return data
+    return await fetch_monthly(lat, lon, start, end, format)
 
 @app.get("/station/climate", tags=["Station Data"])
-async def get_station_climate_data(request: Request, station: str = Query(...)):
+async def get_station_climate_data(request: Request, station: str = Query(...),
+                                   raw: bool = Query(False, description="Série journalière brute 1991-2020"),
+                                   format: OutputFormat = FORMAT_QUERY,
+                                   start_date: Optional[date] = CLIMATE_START, end_date: Optional[date] = CLIMATE_END,
+                                   stream: bool = CLIMATE_STREAM):
     await verify_rapidapi_proxy(request)
-    lat, lon = station_coords.get(station, (None, None))
+    lat, lon = registry.coords(station) or (None, None)
     if lat is None or lon is None:
         raise HTTPException(status_code=404, detail="Station inconnue")
-    climate_url = "https://climate-api.open-meteo.com/v1/climate"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "models": "ERA5",
-        "daily": "temperature_2m_max,temperature_2m_min,temperature_2m_mean,precipitation_sum,wind_speed_10m_mean",
-        "start_date": "1991-01-01",
-        "end_date": "2020-12-31"
-    }
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(climate_url, params=params)
-        if resp.status_code == 400:
-            return {"error": True, "reason": "No climate data for this location"}
-        resp.raise_for_status()
-        data = resp.json()
-    return data
+    return await fetch_climate(station, lat, lon, raw, format, start_date, end_date, stream)
 
 @app.get("/station/meta", tags=["Station Data"])
 async def get_station_meta_data(request: Request, station: str = Query(...)):
     await verify_rapidapi_proxy(request)
-    s = next((s for s in STATIONS if s["id"] == station), None)
+    s = registry.get(station)
     if not s:
         raise HTTPException(status_code=404, detail="Station inconnue")
-    return s
+    return FastJSONResponse(s)
 
 def haversine(lat1, lon1, lat2, lon2):
     R = 6371  # Rayon de la Terre en km
@@ -280,93 +602,152 @@ def haversine(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
     return R * c
 
+# Index spatial construit une fois au chargement
+station_index = StationIndex(registry.lats, registry.lons)
+# Coordonnées en tableaux NumPy pour les requêtes multi-points
+station_arrays = StationArrays(registry.lats, registry.lons)
+
 @app.get("/station/nearby", tags=["Stations"])
-async def get_station_nearby(request: Request, lat: Optional[float] = None, lon: Optional[float] = None):
+async def get_station_nearby(request: Request, lat: Optional[float] = None, lon: Optional[float] = None,
+                             k: int = Query(5, ge=1, le=1000), radius_km: Optional[float] = Query(None, gt=0)):
     await verify_rapidapi_proxy(request)
     if lat is None or lon is None:
         raise HTTPException(status_code=400, detail="lat and lon are required")
-    stations_with_dist = [
-        (s, haversine(lat, lon, s["lat"], s["lon"])) for s in STATIONS
-    ]
-    stations_with_dist.sort(key=lambda x: x[1])
-    return [s for s, d in stations_with_dist[:5]]
+    return FastJSONResponse([
+        {**registry.record(i), "distance_km": round(d, 3)}
+        for i, d in station_index.query(lat, lon, k=k, radius_km=radius_km)
+    ])
+
+@app.post("/station/nearby/batch", tags=["Stations"])
+async def get_station_nearby_batch(request: Request, body: NearbyBatchRequest):
+    await verify_rapidapi_proxy(request)
+    if len(body.points) > config.BATCH_MAX_LOCATIONS:
+        raise HTTPException(status_code=400, detail=f"Maximum {config.BATCH_MAX_LOCATIONS} points par requête")
+    # Noyau NumPy (produit matriciel) tant que le registre est petit, k-d tree par point au-delà
+    if len(station_arrays) > config.NEARBY_VECTOR_MAX_STATIONS:
+        return FastJSONResponse([
+            [{**registry.record(i), "distance_km": round(d, 3)} for i, d in station_index.query(p.lat, p.lon, k=body.k, radius_km=body.radius_km)]
+            for p in body.points
+        ])
+    lats = [p.lat for p in body.points]
+    lons = [p.lon for p in body.points]
+    return FastJSONResponse([
+        [{**registry.record(i), "distance_km": round(d, 3)} for i, d in zip(idx.tolist(), dist.tolist())]
+        for idx, dist in station_arrays.nearest_many(lats, lons, k=body.k, radius_km=body.radius_km)
+    ])
 
 # Point Data
-OPEN_METEO_BASE = "https://api.open-meteo.com/v1/forecast"
+SNAP_QUERY = Query(None, description="Ramène lat/lon à la maille du modèle (défaut : METEO_POINT_SNAP)")
+
+# Coordonnées quantifiées sur la grille du jeu de données : deux positions GPS voisines partagent le cache
+def point_coords(lat, lon, dataset, snap):
+    if not (config.POINT_SNAP if snap is None else snap):
+        return lat, lon, {}
+    lat, lon = snap_coords(lat, lon, config.GRID_RESOLUTIONS[dataset])
+    return lat, lon, {"X-Snapped-Lat": str(lat), "X-Snapped-Lon": str(lon)}
+
+def with_headers(response, headers):
+    if isinstance(response, Response):
+        response.headers.update(headers)
+    return response
 
 @app.get("/point/hourly", tags=["Point Data"])
-async def get_hourly_point_data(request: Request, lat: float = Query(...), lon: float = Query(...)):
+async def get_hourly_point_data(request: Request, lat: float = Query(...), lon: float = Query(...),
+                                snap: Optional[bool] = SNAP_QUERY, format: OutputFormat = FORMAT_QUERY):
     await verify_rapidapi_proxy(request)
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "hourly": "temperature_2m,precipitation,relative_humidity_2m,wind_speed_10m",
-        "timezone": "auto"
-    }
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(OPEN_METEO_BASE, params=params)
-        resp.raise_for_status()
-        data = resp.json()
-    return data
+    lat, lon, snapped = point_coords(lat, lon, "hourly", snap)
+    entry = await fetch_cached(provider.hourly(lat, lon))
+    return with_headers(cached_response(entry, format), snapped)
 
 @app.get("/point/daily", tags=["Point Data"])
-async def get_daily_point_data(request: Request, lat: float = Query(...), lon: float = Query(...)):
+async def get_daily_point_data(request: Request, lat: float = Query(...), lon: float = Query(...),
+                               snap: Optional[bool] = SNAP_QUERY, format: OutputFormat = FORMAT_QUERY):
     await verify_rapidapi_proxy(request)
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
-        "timezone": "auto"
-    }
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(OPEN_METEO_BASE, params=params)
-        resp.raise_for_status()
-        data = resp.json()
-    return data
-
-@app.get("/point/monthly", tags=["Point Data"])
-async def get_monthly_point_data(request: Request, lat: float = Query(...), lon: float = Query(...)):
+    lat, lon, snapped = point_coords(lat, lon, "daily", snap)
+    entry = await fetch_cached(provider.daily(lat, lon))
+    return with_headers(cached_response(entry, format), snapped)
+
+@app.get("/point/monthly", response_model=MonthlyResponse, tags=["Point Data"])
+async def get_monthly_point_data(request: Request, lat: float = Query(...), lon: float = Query(...),
+                                 start: Optional[date] = None, end: Optional[date] = None,
+                                 snap: Optional[bool] = SNAP_QUERY, format: OutputFormat = FORMAT_QUERY):
     await verify_rapidapi_proxy(request)
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
-        "timezone": "auto"
-    }
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(OPEN_METEO_BASE, params=params)
-        resp.raise_for_status()
-        data = resp.json()
-    return data
+    lat, lon, snapped = point_coords(lat, lon, "monthly", snap)
+    return with_headers(await fetch_monthly(lat, lon, start, end, format), snapped)
 
 @app.get("/point/climate", tags=["Point Data"])
-async def get_point_climate_data(request: Request, lat: float = Query(...), lon: float = Query(...)):
+async def get_point_climate_data(request: Request, lat: float = Query(...), lon: float = Query(...),
+                                 raw: bool = Query(False, description="Série journalière brute 1991-2020"),
+                                 snap: Optional[bool] = SNAP_QUERY, format: OutputFormat = FORMAT_QUERY,
+                                 start_date: Optional[date] = CLIMATE_START, end_date: Optional[date] = CLIMATE_END,
+                                 stream: bool = CLIMATE_STREAM):
     await verify_rapidapi_proxy(request)
-    climate_url = "https://climate-api.open-meteo.com/v1/climate"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "models": "ERA5",
-        "daily": "temperature_2m_max,temperature_2m_min,temperature_2m_mean,precipitation_sum,wind_speed_10m_mean",
-        "start_date": "1991-01-01",
-        "end_date": "2020-12-31"
-    }
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(climate_url, params=params)
-        if resp.status_code == 400:
-            return {"error": True, "reason": "No climate data for this location"}
-        resp.raise_for_status()
-        data = resp.json()
-    return data
+    lat, lon, snapped = point_coords(lat, lon, "climate", snap)
+    return with_headers(await fetch_climate(point_key(lat, lon), lat, lon, raw, format, start_date, end_date, stream), snapped)
+
+# Index de recherche des noms (sans accents, préfixes + trigrammes), construit au chargement
+search_index = SearchIndex(registry.names)
 
 @app.get("/station/search", tags=["Stations"])
-async def search_station_by_name(request: Request, name: str = Query(..., description="City or station name to search")):
+async def search_station_by_name(request: Request, name: str = Query(..., description="City or station name to search"),
+                                 limit: int = Query(20, ge=1, le=100), fuzzy: bool = True):
     await verify_rapidapi_proxy(request)
-    name_lower = name.lower()
-    results = [
-        {"id": s["id"], "name": s["name"], "country": s["country"], "lat": s["lat"], "lon": s["lon"]}
-        for s in STATIONS if name_lower in s["name"].lower()
-    ]
+    results = [registry.record(i) for i in search_index.search(name, limit=limit, fuzzy=fuzzy)]
     if not results:
         raise HTTPException(status_code=404, detail="No station found for this name")
-    return results 
\ No newline at end of file
+    return FastJSONResponse(results)
+
+# Batch : plusieurs lieux par appel Open-Meteo (latitude/longitude séparées par des virgules)
+def batch_locations(body: BatchRequest):
+    locations = {}
+    unknown = [s for s in body.stations if s not in registry]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Station inconnue : {', '.join(unknown)}")
+    for station in body.stations:
+        locations[station] = registry.coords(station)
+    for p in body.points:
+        locations[f"{p.lat},{p.lon}"] = (p.lat, p.lon)
+    if not locations:
+        raise HTTPException(status_code=400, detail="Paramètres manquants (stations ou points)")
+    if len(locations) > config.BATCH_MAX_LOCATIONS:
+        raise HTTPException(status_code=400, detail=f"Maximum {config.BATCH_MAX_LOCATIONS} lieux par requête")
+    return locations
+
+async def fetch_batch_chunk(chunk, dataset, semaphore):
+    query = provider.batch(dataset, [lat for _, (lat, _) in chunk], [lon for _, (_, lon) in chunk])
+    async with semaphore:
+        entry = await fetch_cached(query)
+    with stage("parse"):
+        data = loads(entry.body)
+    # Open-Meteo renvoie un objet pour un seul lieu, une liste sinon
+    if isinstance(data, dict):
+        data = [data]
+    if dataset == "current":
+        data = [current_conditions(d, key) for (key, _), d in zip(chunk, data)]
+    return {key: d for (key, _), d in zip(chunk, data)}
+
+# Payloads déjà décodés : une seule sérialisation, sans jsonable_encoder
+async def fetch_batch(body: BatchRequest, dataset):
+    items = list(batch_locations(body).items())
+    size = config.BATCH_CHUNK_SIZE
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    semaphore = asyncio.Semaphore(config.BATCH_CONCURRENCY)
+    results = {}
+    for part in await asyncio.gather(*(fetch_batch_chunk(c, dataset, semaphore) for c in chunks)):
+        results.update(part)
+    return FastJSONResponse(results)
+
+@app.post("/batch/hourly", tags=["Batch"])
+async def get_batch_hourly(request: Request, body: BatchRequest):
+    await verify_rapidapi_proxy(request)
+    return await fetch_batch(body, "hourly")
+
+@app.post("/batch/daily", tags=["Batch"])
+async def get_batch_daily(request: Request, body: BatchRequest):
+    await verify_rapidapi_proxy(request)
+    return await fetch_batch(body, "daily")
+
+@app.post("/batch/current", tags=["Batch"])
+async def get_batch_current(request: Request, body: BatchRequest):
+    await verify_rapidapi_proxy(request)
+    return await fetch_batch(body, "current")
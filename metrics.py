@@ -0,0 +1,184 @@
+# Métriques au format texte Prometheus : histogrammes par route et par étape, compteurs, jauges
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+# Secondes : de 0,1 ms (cache chaud) à 10 s (timeout Open-Meteo)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+# Étapes mesurées pendant la requête en cours : liste de (étape, secondes), vidée par MetricsMiddleware
+current_stages = ContextVar("current_stages", default=None)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def label_str(names, values, extra=""):
+    pairs = [f'{n}="{escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{label_str(self.labels, labels)} {number(value)}"
+
+
+class Gauge(Counter):
+    def dec(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, labels, value):
+        self._values[labels] = value
+
+    def render(self):
+        for line in super().render():
+            yield line.replace(" counter", " gauge", 1) if line.startswith("# TYPE") else line
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels, value):
+        try:
+            series = self._series[labels]
+        except KeyError:
+            # [compte par tranche (+ dépassement), somme]
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = 'le="' + number(bound) + '"'
+                yield f"{self.name}_bucket{label_str(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{label_str(self.labels, labels)} {total!r}"
+            yield f"{self.name}_count{label_str(self.labels, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """fn() -> [(nom, type, aide, [(labels dict, valeur)])], appelé à chaque lecture de /metrics."""
+        self.collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for fn in self.collectors:
+            for name, kind, help, samples in fn():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{label_str(labels.keys(), labels.values())} {number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+request_seconds = registry.add(Histogram(
+    "meteo_request_duration_seconds", "Durée des requêtes HTTP par route", ("route", "method", "status")))
+stage_seconds = registry.add(Histogram(
+    "meteo_stage_duration_seconds", "Durée des étapes (auth, cache, upstream, parse, encode, compress) par route",
+    ("route", "stage")))
+requests_in_flight = registry.add(Gauge("meteo_requests_in_flight", "Requêtes HTTP en cours"))
+upstream_seconds = registry.add(Histogram(
+    "meteo_upstream_duration_seconds", "Latence des appels Open-Meteo par hôte", ("host",)))
+upstream_responses = registry.add(Counter(
+    "meteo_upstream_responses_total", "Réponses Open-Meteo par hôte et statut", ("host", "status")))
+upstream_in_flight = registry.add(Gauge("meteo_upstream_in_flight", "Appels Open-Meteo en cours", ("host",)))
+
+
+class stage:
+    """`with stage("parse"):` ajoute la durée du bloc aux étapes de la requête en cours."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = perf_counter() - self.start
+        stages = current_stages.get()
+        if stages is None:
+            # Hors requête (préchauffage, tâches de fond)
+            stage_seconds.observe(("background", self.name), elapsed)
+        else:
+            stages.append((self.name, elapsed))
+
+
+class MetricsMiddleware:
+    """Durée totale et par étape de chaque requête, étiquetée par le gabarit de route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = perf_counter()
+        stages = []
+        token = current_stages.set(stages)
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            requests_in_flight.dec()
+            current_stages.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            request_seconds.observe((path, scope["method"], status), perf_counter() - start)
+            observe = stage_seconds.observe
+            for name, elapsed in stages:
+                observe((path, name), elapsed)
@@ -0,0 +1,190 @@
+# Normales climatiques 1991-2020 : calcul vectorisé, stockage compact sur disque, préchauffage
+import argparse
+import asyncio
+import gzip
+import os
+import re
+
+import numpy as np
+
+import config
+from aggregate import RAIN_DAY_MM, column, rounded
+from fastjson import dumps
+
+PERIOD = ("1991-01-01", "2020-12-31")
+# Dates couvertes par l'API climat (séries brutes)
+CLIMATE_RANGE = ("1950-01-01", "2050-12-31")
+PERCENTILES = (10, 50, 90)
+# Version du format des normales stockées : à incrémenter quand le contenu calculé change, les
+# fichiers d'une version antérieure sont alors ignorés et recalculés à la demande
+LAYOUT = 2
+# Jours du calendrier d'une année non bissextile : index des normales par jour de l'année
+CALENDAR = [str(d)[5:] for d in np.arange("2001-01-01", "2002-01-01", dtype="datetime64[D]")]
+
+
+def climate_params(lat, lon, start_date=PERIOD[0], end_date=PERIOD[1]):
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "models": "ERA5",
+        "daily": "temperature_2m_max,temperature_2m_min,temperature_2m_mean,precipitation_sum,wind_speed_10m_mean",
+        "start_date": start_date,
+        "end_date": end_date
+    }
+
+
+def group_mean(index, values, size):
+    ok = ~np.isnan(values)
+    sums = np.bincount(index, weights=np.where(ok, values, 0.0), minlength=size)
+    counts = np.bincount(index, weights=ok, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def compute_normals(daily):
+    """Normales mensuelles et par jour de l'année à partir de la série journalière."""
+    times = np.array(daily.get("time", []), dtype="datetime64[D]")
+    n = len(times)
+    t_max = column(daily, "temperature_2m_max", n)
+    t_min = column(daily, "temperature_2m_min", n)
+    t_mean = column(daily, "temperature_2m_mean", n)
+    t_mean = np.where(np.isnan(t_mean), (t_max + t_min) / 2, t_mean)
+    precip = column(daily, "precipitation_sum", n)
+
+    months = times.astype("datetime64[M]").astype(np.int64)
+    month = months % 12
+    # Indice (année, mois) pour les cumuls mensuels, ramené à 0
+    year_month = months - months.min() if n else months
+    # Jour de l'année indexé par (mois, jour) : en année bissextile, les jours après le 28 février
+    # reculent d'un rang et le 29 février est écarté, chaque rang couvre une seule date du calendrier
+    years = times.astype("datetime64[Y]")
+    doy = (times - years).astype(np.int64)
+    year = years.astype(np.int64) + 1970
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    feb29 = leap & (doy == 59)
+    doy = doy - (leap & (doy >= 59))
+
+    # Cumul de précipitations et jours de pluie par (année, mois), puis moyenne par mois
+    has_precip = ~np.isnan(precip)
+    ym_total = np.bincount(year_month, weights=np.where(has_precip, precip, 0.0))
+    ym_rain = np.bincount(year_month, weights=precip >= RAIN_DAY_MM)
+    ym_seen = np.bincount(year_month, weights=has_precip) > 0
+    ym_month = (np.arange(len(ym_total)) + (months.min() if n else 0)) % 12
+    ym_total = np.where(ym_seen, ym_total, np.nan)
+    ym_rain = np.where(ym_seen, ym_rain, np.nan)
+
+    with np.errstate(invalid="ignore"):
+        pct = [[np.nanpercentile(t_mean[month == m], p) if np.any((month == m) & ~np.isnan(t_mean)) else np.nan
+                for m in range(12)] for p in PERCENTILES]
+    monthly = {
+        "month": list(range(1, 13)),
+        "temperature_mean": rounded(group_mean(month, t_mean, 12)),
+        "temperature_max": rounded(group_mean(month, t_max, 12)),
+        "temperature_min": rounded(group_mean(month, t_min, 12)),
+        **{f"temperature_p{p}": rounded(np.array(v)) for p, v in zip(PERCENTILES, pct)},
+        "precipitation": rounded(group_mean(ym_month, ym_total, 12)),
+        "rain_days": rounded(group_mean(ym_month, ym_rain, 12)),
+    }
+    days = len(CALENDAR)
+    day_of_year = {
+        "day": list(range(1, days + 1)),
+        "date": CALENDAR,
+        **{name: rounded(group_mean(doy, np.where(feb29, np.nan, values), days))
+           for name, values in (("temperature_mean", t_mean), ("temperature_max", t_max),
+                                ("temperature_min", t_min), ("precipitation", precip))},
+    }
+    return {"monthly": monthly, "day_of_year": day_of_year}
+
+
+def normals_payload(data):
+    """Réponse JSON (bytes) des normales pour une réponse brute de l'API climat."""
+    return dumps({
+        "latitude": data.get("latitude"),
+        "longitude": data.get("longitude"),
+        "period": f"{PERIOD[0][:4]}-{PERIOD[1][:4]}",
+        **compute_normals(data.get("daily", {})),
+    })
+
+
+def point_key(lat, lon):
+    return f"{lat:.4f}_{lon:.4f}"
+
+
+class NormalsStore:
+    """Un fichier gzip par station/point et par version du format (LAYOUT) dans `path`, écrit de façon atomique."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{re.sub(r'[^A-Za-z0-9_.-]', '_', key)}.v{LAYOUT}.json.gz")
+
+    def __contains__(self, key):
+        return os.path.exists(self._file(key))
+
+    def get(self, key):
+        try:
+            with open(self._file(key), "rb") as f:
+                return gzip.decompress(f.read())
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, body):
+        os.makedirs(self.path, exist_ok=True)
+        target = self._file(key)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(body, compresslevel=9))
+        os.replace(tmp, target)
+
+
+async def warm(store, stations, concurrency, force=False, pool=None):
+    """Calcule et enregistre les normales des stations absentes du store."""
+    from providers import OpenMeteoProvider
+    from upstream import UpstreamError, UpstreamPool
+    provider = OpenMeteoProvider(pool or UpstreamPool())
+    sem = asyncio.Semaphore(concurrency)
+    done, failed = 0, []
+
+    async def one(station_id, lat, lon):
+        nonlocal done
+        if not force and station_id in store:
+            return
+        async with sem:
+            try:
+                r = await provider.get(provider.climate(lat, lon, *PERIOD))
+            except UpstreamError:
+                failed.append(station_id)
+                return
+        if r.status_code != 200:
+            failed.append(station_id)
+            return
+        body = await asyncio.to_thread(normals_payload, r.json())
+        await asyncio.to_thread(store.put, station_id, body)
+        done += 1
+
+    try:
+        await asyncio.gather(*(one(*s) for s in stations))
+    finally:
+        await provider.aclose()
+    return done, failed
+
+
+def main():
+    from registry import StationRegistry
+    from stations import STATIONS
+    parser = argparse.ArgumentParser(description="Préchauffe le store des normales climatiques")
+    parser.add_argument("--stations", help="identifiants séparés par des virgules (toutes par défaut)")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--force", action="store_true", help="recalcule les normales déjà présentes")
+    args = parser.parse_args()
+    registry = StationRegistry(STATIONS)
+    ids = args.stations.split(",") if args.stations else list(dict.fromkeys(registry.ids))
+    stations = [(i, *registry.coords(i)) for i in ids if i in registry]
+    store = NormalsStore(config.NORMALS_DIR)
+    done, failed = asyncio.run(warm(store, stations, args.concurrency, args.force))
+    print(f"{done} station(s) calculée(s), {len(failed)} échec(s) {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
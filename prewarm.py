@@ -0,0 +1,143 @@
+# Préchauffage en arrière-plan : rafraîchit les entrées les plus demandées avant leur expiration
+import asyncio
+import heapq
+import random
+import time
+from collections import deque
+
+
+class Prewarmer:
+    """Compte les requêtes par clé de cache et rafraîchit les N plus chaudes peu avant expiration.
+
+    `refresh(key, *request)` recharge une entrée à partir des arguments passés à `record` ;
+    `remaining(key)` renvoie son TTL restant en secondes (None si absente ou expirée).
+    Au plus `max_tracked` clés suivies, y compris entre deux passages ; une clé dont le
+    rafraîchissement échoue attend `interval` × 2^échecs secondes (au plus `max_backoff`).
+    """
+
+    def __init__(self, refresh, remaining, top_n=50, lead=30.0, jitter=10.0, concurrency=2,
+                 interval=10.0, decay=0.95, min_score=2.0, max_tracked=10000, max_backoff=600.0,
+                 clock=time.monotonic):
+        self.refresh = refresh
+        self.remaining = remaining
+        self.top_n = top_n
+        self.lead = lead
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.interval = interval
+        self.decay = decay
+        self.min_score = min_score
+        self.max_tracked = max_tracked
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.refreshed = 0
+        self.failed = 0
+        self.durations = deque(maxlen=100)
+        self._scores = {}
+        self._requests = {}
+        # Clé -> (échecs consécutifs, pas de nouvel essai avant)
+        self._failures = {}
+        self._scheduled = set()
+        self._inflight = 0
+        self._queue = None
+        self._tasks = []
+
+    def record(self, key, *request):
+        self._scores[key] = self._scores.get(key, 0.0) + 1.0
+        self._requests[key] = request
+        if len(self._scores) > self.max_tracked:
+            # Trafic de coordonnées toutes différentes : élagage sans attendre le prochain passage,
+            # avec une marge de 10 % pour ne pas trier à chaque nouvelle clé
+            self._trim(int(self.max_tracked * 0.9))
+
+    def hottest(self):
+        return [key for key, score in heapq.nlargest(self.top_n, self._scores.items(), key=lambda kv: kv[1])
+                if score >= self.min_score]
+
+    def due(self):
+        """Clés chaudes qui expirent dans moins de `lead` secondes et pas encore planifiées."""
+        result = []
+        now = self.clock()
+        for key in self.hottest():
+            if key in self._scheduled or self._failures.get(key, (0, now))[1] > now:
+                continue
+            remaining = self.remaining(key)
+            if remaining is None or remaining <= self.lead:
+                result.append((key, remaining))
+        return result
+
+    def tick(self):
+        loop = asyncio.get_running_loop()
+        for key, remaining in self.due():
+            self._scheduled.add(key)
+            # Gigue : étale les rafraîchissements sans dépasser l'expiration
+            window = self.jitter if remaining is None else max(min(self.jitter, remaining - 1.0), 0.0)
+            loop.call_later(random.uniform(0.0, window), self._queue.put_nowait, key)
+        self._age()
+
+    def _age(self):
+        # Décroissance exponentielle : la popularité reflète le trafic récent
+        self._scores = {k: s * self.decay for k, s in self._scores.items() if s * self.decay >= 0.05}
+        self._trim(self.max_tracked)
+
+    def _trim(self, size):
+        if len(self._scores) > size:
+            self._scores = dict(heapq.nlargest(size, self._scores.items(), key=lambda kv: kv[1]))
+        for key in self._requests.keys() - self._scores.keys() - self._scheduled:
+            del self._requests[key]
+            self._failures.pop(key, None)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.tick()
+
+    async def _worker(self):
+        while True:
+            key = await self._queue.get()
+            request = self._requests.get(key)
+            self._inflight += 1
+            start = time.perf_counter()
+            try:
+                if request is not None:
+                    await self.refresh(key, *request)
+                    self.refreshed += 1
+                    self._failures.pop(key, None)
+            except Exception:
+                self.failed += 1
+                # Échecs répétés : nouvel essai de plus en plus espacé
+                count = self._failures.get(key, (0, 0.0))[0] + 1
+                delay = min(self.interval * 2 ** count, self.max_backoff)
+                self._failures[key] = (count, self.clock() + delay)
+            finally:
+                self._inflight -= 1
+                self.durations.append(time.perf_counter() - start)
+                self._scheduled.discard(key)
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._scheduled.clear()
+        # Nombre de workers = plafond d'appels Open-Meteo simultanés
+        self._tasks = [asyncio.create_task(self._run())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self):
+        durations = list(self.durations)
+        return {
+            "tracked": len(self._scores),
+            "scheduled": len(self._scheduled),
+            "backing_off": len(self._failures),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "inflight": self._inflight,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "last_refresh_ms": round(durations[-1] * 1000, 2) if durations else None,
+            "avg_refresh_ms": round(sum(durations) / len(durations) * 1000, 2) if durations else None,
+            "max_refresh_ms": round(max(durations) * 1000, 2) if durations else None,
+        }
@@ -0,0 +1,244 @@
+# Fournisseurs de données météo : requêtes par jeu de données, miroirs Open-Meteo avec bascule,
+# fournisseur fichier (réponses enregistrées) pour les tests et les benchmarks
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+import httpx
+
+import config
+from cache import make_key
+from circuit import CLOSED
+from current import CURRENT_VARIABLES, current_params
+from fastjson import dumps
+from normals import climate_params
+from upstream import UpstreamError
+
+HOURLY_VARIABLES = "temperature_2m,precipitation,relative_humidity_2m,wind_speed_10m"
+DAILY_VARIABLES = "temperature_2m_max,temperature_2m_min,precipitation_sum"
+# /history et /forecast
+SUMMARY_VARIABLES = "temperature_2m_max,temperature_2m_min,precipitation_sum,wind_speed_10m_max"
+MONTHLY_VARIABLES = "temperature_2m_max,temperature_2m_min,temperature_2m_mean,precipitation_sum"
+BATCH_VARIABLES = {
+    "hourly": {"hourly": HOURLY_VARIABLES},
+    "daily": {"daily": DAILY_VARIABLES},
+    "current": {"current": CURRENT_VARIABLES},
+}
+# Réponse enregistrée utilisée par jeu de données (FileProvider)
+RECORDED = {"current": "current", "hourly": "hourly", "daily": "daily", "history": "daily",
+            "forecast": "daily", "climate": "climate"}
+
+
+class Query(NamedTuple):
+    """Requête d'un jeu de données (TTL, budget de latence, URL) avec ses paramètres Open-Meteo."""
+    dataset: str
+    params: dict
+
+
+class Provider(ABC):
+    """Interface appelée par les handlers : construit les requêtes, puis get() ou stream().
+
+    Sous-classes : source() et get() obligatoires. Les réponses exposent `status_code`, `content` et, pour stream(), `aiter_bytes()`/`aclose()`.
+    """
+
+    def current(self, lat, lon):
+        return Query("current", current_params(lat, lon))
+
+    def hourly(self, lat, lon):
+        return Query("hourly", {"latitude": lat, "longitude": lon, "hourly": HOURLY_VARIABLES, "timezone": "auto"})
+
+    def daily(self, lat, lon):
+        return Query("daily", {"latitude": lat, "longitude": lon, "daily": DAILY_VARIABLES, "timezone": "auto"})
+
+    def history(self, lat, lon, day):
+        return Query("history", {"latitude": lat, "longitude": lon, "start_date": day, "end_date": day,
+                                 "daily": SUMMARY_VARIABLES, "timezone": "auto"})
+
+    def forecast(self, lat, lon, days=7):
+        start = date.today()
+        return Query("forecast", {"latitude": lat, "longitude": lon, "start_date": start.isoformat(),
+                                  "end_date": (start + timedelta(days=days)).isoformat(),
+                                  "daily": SUMMARY_VARIABLES, "timezone": "auto"})
+
+    def monthly(self, lat, lon, start=None, end=None):
+        """Série journalière source des agrégats mensuels (sans période : MONTHLY_PAST_DAYS jours passés,
+        sans jour de prévision, pour ne pas mêler prévisions et observations)."""
+        params = {"latitude": lat, "longitude": lon, "daily": MONTHLY_VARIABLES, "timezone": "auto"}
+        if start:
+            params["start_date"] = start.isoformat()
+            params["end_date"] = end.isoformat()
+        else:
+            params["past_days"] = config.MONTHLY_PAST_DAYS
+            params["forecast_days"] = 0
+        return Query("daily", params)
+
+    def climate(self, lat, lon, start_date, end_date):
+        return Query("climate", climate_params(lat, lon, start_date, end_date))
+
+    def batch(self, dataset, lats, lons):
+        """Plusieurs lieux en un appel : latitude/longitude séparées par des virgules."""
+        return Query(dataset, {"latitude": ",".join(str(lat) for lat in lats),
+                               "longitude": ",".join(str(lon) for lon in lons),
+                               **BATCH_VARIABLES[dataset], "timezone": "auto"})
+
+    @abstractmethod
+    def source(self, dataset):
+        """Identité stable des données d'un jeu (clé de cache), quel que soit le miroir qui répond."""
+
+    def key(self, query):
+        return make_key(self.source(query.dataset), query.params)
+
+    @abstractmethod
+    async def get(self, query):
+        """Réponse complète (status_code, content)."""
+
+    async def stream(self, query):
+        return await self.get(query)
+
+    async def start(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class OpenMeteoProvider(Provider):
+    """Open-Meteo et ses miroirs : le plus rapide d'abord, bascule sur le suivant en cas d'échec.
+
+    `urls` : {jeu de données: [URL, ...]} ; la première URL sert d'identité aux clés de cache.
+    """
+
+    def __init__(self, pool, urls=None, penalty=None, alpha=0.2):
+        self.pool = pool
+        self.urls = {d: list(u) for d, u in (config.PROVIDER_URLS if urls is None else urls).items()}
+        empty = sorted(d for d, u in self.urls.items() if not u)
+        if empty:
+            raise ValueError(f"Aucune URL configurée pour : {', '.join(empty)}")
+        self.penalty = config.PROVIDER_FAILURE_PENALTY if penalty is None else penalty
+        self.alpha = alpha
+        # Latence moyenne (exponentielle) par URL, échecs pénalisés
+        self.latency = {}
+        self.failovers = 0
+
+    def source(self, dataset):
+        return self.urls[dataset][0]
+
+    def available(self, url):
+        breaker = self.pool.breakers.get(urlsplit(url).hostname)
+        return breaker is None or breaker.state == CLOSED or breaker.retry_after == 0
+
+    def ranked(self, dataset):
+        urls = self.urls[dataset]
+        if len(urls) == 1:
+            return urls
+        # Disjoncteurs fermés d'abord, puis latence moyenne ; miroir jamais mesuré : essayé en premier
+        return sorted(urls, key=lambda u: (not self.available(u), self.latency.get(u, 0.0)))
+
+    def observe(self, url, seconds):
+        previous = self.latency.get(url)
+        self.latency[url] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    async def get(self, query):
+        return await self._send(query, stream=False)
+
+    async def stream(self, query):
+        return await self._send(query, stream=True)
+
+    async def _send(self, query, stream):
+        error = None
+        for i, url in enumerate(self.ranked(query.dataset)):
+            if i:
+                self.failovers += 1
+            start = time.perf_counter()
+            try:
+                r = await (self.pool.stream if stream else self.pool.get)(url, query.params)
+            except UpstreamError as e:
+                error = e
+            else:
+                # 5xx et 429 : miroir en difficulté ; 4xx : requête invalide, renvoyée telle quelle
+                if r.status_code < 500 and r.status_code != 429:
+                    self.observe(url, time.perf_counter() - start)
+                    return r
+                if stream:
+                    await r.aclose()
+                error = UpstreamError(r.status_code)
+            self.observe(url, time.perf_counter() - start + self.penalty)
+        raise error
+
+    async def start(self):
+        await self.pool.start([url for urls in self.urls.values() for url in urls])
+
+    async def aclose(self):
+        await self.pool.aclose()
+
+    def stats(self):
+        return {
+            "failovers": self.failovers,
+            "latency_ms": {url: round(s * 1000, 1) for url, s in self.latency.items()},
+        }
+
+
+def load_fixtures(path):
+    """Réponses Open-Meteo enregistrées par benchmarks/record_fixtures.py, par type de requête."""
+    fixtures = {}
+    if path and os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".json"):
+                with open(os.path.join(path, name), encoding="utf-8") as f:
+                    fixtures[name[:-len(".json")]] = json.load(f)
+    return fixtures
+
+
+def replay(fixture, q, lat, lon):
+    """Réponse enregistrée déplacée en (lat, lon) ; None si elle ne couvre pas la requête."""
+    payload = {**fixture, "latitude": lat, "longitude": lon}
+    daily = fixture.get("daily")
+    if daily is None or "daily" not in q:
+        return payload
+    variables = q["daily"].split(",")
+    if any(v not in daily for v in variables):
+        return None
+    times = daily["time"]
+    i, j = 0, len(times)
+    if "start_date" in q:
+        start, end = q["start_date"], q.get("end_date", q["start_date"])
+        if not times or start < times[0] or end > times[-1]:
+            return None
+        i, j = bisect_left(times, start), bisect_right(times, end)
+    payload["daily"] = {v: daily[v][i:j] for v in ("time", *variables)}
+    return payload
+
+
+class FileProvider(Provider):
+    """Réponses enregistrées sur disque, sans réseau (tests, benchmarks) ; 404 si non couvert."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fixtures = load_fixtures(path)
+        self.served = 0
+
+    def source(self, dataset):
+        return "file:" + dataset
+
+    async def get(self, query):
+        fixture = self.fixtures.get(RECORDED[query.dataset])
+        lats = str(query.params["latitude"]).split(",")
+        lons = str(query.params["longitude"]).split(",")
+        payloads = [replay(fixture, query.params, float(lat), float(lon)) if fixture else None
+                    for lat, lon in zip(lats, lons)]
+        if any(p is None for p in payloads):
+            return httpx.Response(404, content=dumps({"error": True, "reason": "Aucune réponse enregistrée"}))
+        self.served += 1
+        payload = payloads[0] if len(payloads) == 1 else payloads
+        return httpx.Response(200, content=dumps(payload), headers={"content-type": "application/json"})
+
+    def stats(self):
+        return {"path": self.path, "recorded": sorted(self.fixtures), "served": self.served}
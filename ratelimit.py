@@ -0,0 +1,219 @@
+# Limitation de débit : seau à jetons par client RapidAPI (x-rapidapi-user) selon son abonnement,
+# budget global d'appels Open-Meteo avec file d'attente servie à tour de rôle par client
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+
+from compression import header
+from fastjson import dumps
+from upstream import UpstreamError
+
+# Client RapidAPI de la requête en cours (posé par RateLimitMiddleware), pour l'ordonnancement équitable
+current_client = ContextVar("current_client", default=None)
+
+
+class TokenBucket:
+    """`capacity` jetons au plus, `rate` jetons par seconde ; rempli paresseusement à chaque lecture."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now):
+        self.refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def wait(self):
+        """Secondes avant le prochain jeton."""
+        return max(1.0 - self.tokens, 0.0) / self.rate
+
+    def reset(self):
+        """Secondes avant que le seau soit de nouveau plein."""
+        return (self.capacity - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Un seau par client, `plans[abonnement]` requêtes par `window` secondes (rafale comprise).
+
+    Dictionnaire ordonné par dernier accès : lecture et éviction du client le plus ancien en O(1),
+    sans verrou (tout se passe dans la boucle asyncio, sans await entre lecture et écriture).
+    """
+
+    def __init__(self, plans, default_plan, max_clients=100000, window=60.0, clock=time.monotonic):
+        self.plans = {plan.upper(): limit for plan, limit in plans.items()}
+        self.default_limit = self.plans[default_plan.upper()]
+        self.max_clients = max_clients
+        self.window = window
+        self.clock = clock
+        self.rejected = 0
+        self._buckets = OrderedDict()
+
+    def check(self, client, plan=None):
+        """(accepté, limite, restant, secondes avant remplissage, secondes avant le prochain jeton)"""
+        limit = self.plans.get(plan.upper(), self.default_limit) if plan else self.default_limit
+        now = self.clock()
+        bucket = self._buckets.get(client)
+        if bucket is not None and bucket.capacity != limit:
+            # Changement d'abonnement : jetons restants conservés (plafonnés), sinon alterner
+            # BASIC/PRO dans x-rapidapi-subscription remplirait le seau à chaque requête
+            bucket.refill(now)
+            tokens = min(bucket.tokens, limit)
+            bucket = self._buckets[client] = TokenBucket(limit / self.window, limit, now)
+            bucket.tokens = tokens
+        elif bucket is None:
+            bucket = self._buckets[client] = TokenBucket(limit / self.window, limit, now)
+            if len(self._buckets) > self.max_clients:
+                # Client inactif depuis le plus longtemps : son seau est plein, l'oublier ne change rien
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(client)
+        allowed = bucket.take(now)
+        if not allowed:
+            self.rejected += 1
+        return allowed, int(limit), int(bucket.tokens), bucket.reset(), bucket.wait()
+
+    def clear(self):
+        self._buckets.clear()
+
+    def stats(self):
+        return {"clients": len(self._buckets), "rejected": self.rejected}
+
+
+class BudgetExhausted(UpstreamError):
+    """File d'attente du budget Open-Meteo pleine : réessayer après `retry_after` secondes."""
+
+    def __init__(self, retry_after):
+        super().__init__(503)
+        self.retry_after = retry_after
+
+
+class UpstreamBudget:
+    """Budget global d'appels Open-Meteo (seau à jetons partagé).
+
+    Budget épuisé : les appels attendent dans une file par client, servies à tour de rôle (un appel
+    par client et par tour) ; un client qui multiplie les appels n'affame pas les autres.
+    Au-delà de `max_queue` appels en attente : BudgetExhausted.
+    """
+
+    def __init__(self, per_minute, burst, max_queue=1000, clock=time.monotonic):
+        self.bucket = TokenBucket(per_minute / 60.0, burst, clock())
+        self.max_queue = max_queue
+        self.clock = clock
+        self.waiting = 0
+        self.delayed = 0
+        self.rejected = 0
+        self._queues = OrderedDict()
+        self._timer = None
+
+    async def acquire(self, client=None):
+        if not self._queues and self.bucket.take(self.clock()):
+            return
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise BudgetExhausted(self.bucket.wait() + self.waiting / self.bucket.rate)
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(client)
+        if queue is None:
+            queue = self._queues[client] = deque()
+        queue.append(future)
+        self.waiting += 1
+        self.delayed += 1
+        self._schedule()
+        # Appelant annulé (budget de latence dépassé) : sa place est sautée par _dispatch
+        await future
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.bucket.wait(), self._dispatch)
+
+    def _dispatch(self):
+        self._timer = None
+        while self._queues:
+            client, queue = next(iter(self._queues.items()))
+            future = queue[0]
+            if not future.cancelled() and not self.bucket.take(self.clock()):
+                break
+            queue.popleft()
+            self.waiting -= 1
+            if queue:
+                # Tour suivant : ce client repasse derrière les autres
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+            if not future.cancelled():
+                future.set_result(None)
+        if self._queues:
+            self._schedule()
+
+    def stats(self):
+        return {
+            "tokens": round(self.bucket.tokens, 1),
+            "queued": self.waiting,
+            "clients_waiting": len(self._queues),
+            "delayed": self.delayed,
+            "rejected": self.rejected,
+        }
+
+
+def rate_limit_headers(limit, remaining, reset):
+    return [
+        (b"x-ratelimit-limit", str(limit).encode()),
+        (b"x-ratelimit-remaining", str(remaining).encode()),
+        (b"x-ratelimit-reset", str(math.ceil(reset)).encode()),
+    ]
+
+
+class RateLimitMiddleware:
+    """429 au-delà de la limite de l'abonnement, en-têtes X-RateLimit-* sur chaque réponse.
+
+    Client identifié par x-rapidapi-user ; sans cet en-tête, seau anonyme par adresse du client
+    avec l'abonnement par défaut (retirer l'en-tête ne contourne pas la limite).
+    """
+
+    def __init__(self, app, limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        user = header(scope["headers"], b"x-rapidapi-user")
+        if user is None:
+            client = scope.get("client")
+            user, plan = f"anonymous:{client[0] if client else ''}", None
+        else:
+            plan = header(scope["headers"], b"x-rapidapi-subscription")
+        allowed, limit, remaining, reset, retry_after = self.limiter.check(user, plan)
+        headers = rate_limit_headers(limit, remaining, reset)
+        if not allowed:
+            body = dumps({"detail": "Trop de requêtes"})
+            await send({"type": "http.response.start", "status": 429, "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+                *headers,
+            ]})
+            return await send({"type": "http.response.body", "body": body})
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+
+        token = current_client.set(user)
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_client.reset(token)
@@ -0,0 +1,67 @@
+# Registre des stations : stockage en colonnes, index par id et par pays
+import sys
+from array import array
+
+from fastjson import dumps
+
+
+class StationRegistry:
+    """Stations en colonnes (pas de dict par station) avec recherches en O(1)."""
+
+    __slots__ = ("ids", "names", "countries", "lats", "lons", "_by_id", "_by_country", "_json")
+
+    def __init__(self, stations):
+        self.ids = []
+        self.names = []
+        self.countries = []
+        self.lats = array("d")
+        self.lons = array("d")
+        self._by_id = {}
+        self._by_country = {}
+        self._json = {}
+        for i, s in enumerate(stations):
+            country = sys.intern(s["country"])
+            self.ids.append(s["id"])
+            self.names.append(s["name"])
+            self.countries.append(country)
+            self.lats.append(s["lat"])
+            self.lons.append(s["lon"])
+            # Identifiants en double dans la liste source : la première occurrence fait foi
+            self._by_id.setdefault(s["id"], i)
+            self._by_country.setdefault(country, array("l")).append(i)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, station_id):
+        return station_id in self._by_id
+
+    def index(self, station_id):
+        return self._by_id.get(station_id)
+
+    def coords(self, station_id):
+        i = self._by_id.get(station_id)
+        return None if i is None else (self.lats[i], self.lons[i])
+
+    def record(self, i):
+        return {"id": self.ids[i], "name": self.names[i], "country": self.countries[i],
+                "lat": self.lats[i], "lon": self.lons[i]}
+
+    def get(self, station_id):
+        i = self._by_id.get(station_id)
+        return None if i is None else self.record(i)
+
+    def json(self, country=None):
+        """Liste des stations (ou d'un pays) au format du modèle Station, sérialisée une fois."""
+        if country is not None and country not in self._by_country:
+            return b"[]"
+        body = self._json.get(country)
+        if body is None:
+            indices = range(len(self)) if country is None else self._by_country[country]
+            body = dumps([
+                {"id": self.ids[i], "name": self.names[i], "country": self.countries[i],
+                 "region": None, "lat": self.lats[i], "lon": self.lons[i]}
+                for i in indices
+            ])
+            self._json[country] = body
+        return body
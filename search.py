@@ -0,0 +1,126 @@
+# Index de recherche des noms de stations : préfixes triés, trigrammes, tolérance aux fautes
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+# Rangs de pertinence (plus petit = meilleur)
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = range(5)
+# Trigrammes trop fréquents ignorés pour la recherche approchée (peu discriminants)
+FUZZY_MAX_POSTINGS = 5000
+FUZZY_CANDIDATES = 30
+
+
+def normalize(text):
+    # Sans accents, en minuscules, ponctuation ramenée à des espaces : "Bogotá" -> "bogota"
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return re.sub(r"[\W_]+", " ", text).strip()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, max_dist):
+    """Distance de Damerau-Levenshtein (transpositions adjacentes), bornée à max_dist + 1."""
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_dist:
+            return max_dist + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SearchIndex:
+    """Recherche par préfixe, sous-chaîne et approchée, classée par pertinence."""
+
+    def __init__(self, names):
+        self.names = [normalize(n) for n in names]
+        # Tableaux triés (texte, indice) : noms complets et chacun de leurs mots
+        self.prefixes = sorted((name, i) for i, name in enumerate(self.names))
+        self.words = sorted({(w, i) for i, name in enumerate(self.names) for w in name.split()})
+        postings = defaultdict(lambda: array("l"))
+        self.gram_counts = array("l")
+        for i, name in enumerate(self.names):
+            grams = trigrams(name)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                postings[gram].append(i)
+        self.postings = dict(postings)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _prefix_scan(self, table, query, limit):
+        found = []
+        pos = bisect_left(table, (query,))
+        while pos < len(table) and table[pos][0].startswith(query) and len(found) < limit:
+            found.append(table[pos][1])
+            pos += 1
+        return found
+
+    def _substring(self, query):
+        grams = [g for g in trigrams(query) if g[0] != " " and g[-1] != " "] or trigrams(query)
+        lists = [self.postings.get(g) for g in grams]
+        if not all(lists):
+            return []
+        # La liste la plus courte suffit : chaque candidat est vérifié directement
+        rarest = min(lists, key=len)
+        return [i for i in rarest if query in self.names[i]]
+
+    def _fuzzy(self, query):
+        grams = trigrams(query)
+        max_dist = 1 if len(query) <= 5 else 2
+        counts = Counter()
+        for g in grams:
+            ids = self.postings.get(g, ())
+            if len(ids) <= FUZZY_MAX_POSTINGS:
+                counts.update(ids)
+        # Une modification détruit au plus 4 trigrammes : filtre avant le calcul de distance
+        floor = max(1, len(grams) - 4 * max_dist)
+        candidates = [c for c in counts.most_common(FUZZY_CANDIDATES) if c[1] >= floor]
+        matches = []
+        for i, _ in candidates:
+            name = self.names[i]
+            targets = [name] + name.split()
+            dist = min(edit_distance(query, t[:len(query) + max_dist], max_dist) for t in targets)
+            if dist <= max_dist:
+                matches.append((dist, i))
+        return matches
+
+    def search(self, text, limit=20, fuzzy=True):
+        """Indices des stations triés par pertinence."""
+        query = normalize(text)
+        if not query or limit <= 0:
+            return []
+        ranked = {}
+
+        def add(i, rank, score=0.0):
+            key = (rank, -score, self.names[i])
+            if i not in ranked or key < ranked[i]:
+                ranked[i] = key
+
+        # Les préfixes sont bornés : au-delà de `limit` ils ne changeraient pas le classement
+        for i in self._prefix_scan(self.prefixes, query, limit * 4):
+            add(i, EXACT if self.names[i] == query else PREFIX)
+        for i in self._prefix_scan(self.words, query, limit * 4):
+            add(i, WORD_PREFIX)
+        # Les rangs suivants ne sont calculés que s'il manque des résultats
+        if len(query) >= 3 and len(ranked) < limit:
+            for i in self._substring(query):
+                add(i, SUBSTRING)
+            if fuzzy and len(ranked) < limit:
+                for dist, i in self._fuzzy(query):
+                    add(i, FUZZY, -dist)
+        return sorted(ranked, key=ranked.__getitem__)[:limit]
@@ -0,0 +1,40 @@
+# Regroupement des appels identiques simultanés (single-flight)
+import asyncio
+
+
+class SingleFlight:
+    """Les appelants concurrents d'une même clé attendent une seule exécution."""
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight = {}
+
+    @property
+    def inflight(self):
+        return len(self._inflight)
+
+    def spawn(self, key, fn):
+        """Lance (ou rejoint) l'exécution de `key` sans l'attendre."""
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return task
+
+    async def do(self, key, fn):
+        # shield : l'annulation d'un appelant n'annule pas les autres
+        return await asyncio.shield(self.spawn(key, fn))
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # évite "Task exception was never retrieved"
+
+    def stats(self):
+        return {"calls": self.calls, "coalesced": self.coalesced, "inflight": self.inflight}
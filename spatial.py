@@ -0,0 +1,91 @@
+# Index spatial des stations : k-d tree sur les coordonnées 3D de la sphère unité
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371
+LEAF_SIZE = 16
+
+
+def to_xyz(lat, lon):
+    phi, lam = math.radians(lat), math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord):
+    # La corde est monotone avec la distance orthodromique : conversion exacte
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+def km_to_chord(km):
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+class StationIndex:
+    """Plus proches voisins (k et/ou rayon) en O(log n) au lieu d'un tri complet."""
+
+    def __init__(self, lats, lons, leaf_size=LEAF_SIZE):
+        self.leaf_size = leaf_size
+        points = [to_xyz(lat, lon) for lat, lon in zip(lats, lons)]
+        # Les stations sont réordonnées pour que chaque feuille soit une tranche contiguë
+        self.order = list(range(len(points)))
+        self.nodes = []
+        if points:
+            self._build(points, 0, len(points))
+        self.xs = [points[i][0] for i in self.order]
+        self.ys = [points[i][1] for i in self.order]
+        self.zs = [points[i][2] for i in self.order]
+
+    def __len__(self):
+        return len(self.order)
+
+    def _build(self, points, start, stop):
+        node_id = len(self.nodes)
+        self.nodes.append(None)
+        if stop - start <= self.leaf_size:
+            self.nodes[node_id] = (start, stop, -1, 0.0, -1, -1)
+            return node_id
+        idx = self.order[start:stop]
+        spreads = [max(points[i][a] for i in idx) - min(points[i][a] for i in idx) for a in range(3)]
+        axis = spreads.index(max(spreads))
+        idx.sort(key=lambda i: points[i][axis])
+        self.order[start:stop] = idx
+        mid = (start + stop) // 2
+        split = points[self.order[mid]][axis]
+        left = self._build(points, start, mid)
+        right = self._build(points, mid, stop)
+        self.nodes[node_id] = (start, stop, axis, split, left, right)
+        return node_id
+
+    def query(self, lat, lon, k=5, radius_km=None):
+        """Liste de (indice de station, distance_km) triée par distance croissante."""
+        if not self.nodes or k <= 0:
+            return []
+        q = to_xyz(lat, lon)
+        limit = km_to_chord(radius_km) ** 2 if radius_km is not None else math.inf
+        heap = []  # tas max sur la distance : (-d², position)
+        self._search(0, q, k, limit, heap)
+        found = sorted((-d2, pos) for d2, pos in heap)
+        return [(self.order[pos], chord_to_km(math.sqrt(d2))) for d2, pos in found]
+
+    def _search(self, node_id, q, k, limit, heap):
+        start, stop, axis, split, left, right = self.nodes[node_id]
+        qx, qy, qz = q
+        if axis < 0:
+            xs, ys, zs = self.xs, self.ys, self.zs
+            for pos in range(start, stop):
+                dx, dy, dz = xs[pos] - qx, ys[pos] - qy, zs[pos] - qz
+                d2 = dx * dx + dy * dy + dz * dz
+                if d2 > limit:
+                    continue
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d2, pos))
+                elif d2 < -heap[0][0]:
+                    heapq.heapreplace(heap, (-d2, pos))
+            return
+        diff = q[axis] - split
+        near, far = (left, right) if diff < 0 else (right, left)
+        self._search(near, q, k, limit, heap)
+        worst = -heap[0][0] if len(heap) == k else limit
+        if diff * diff <= min(worst, limit):
+            self._search(far, q, k, limit, heap)
@@ -0,0 +1,38 @@
+import math
+
+from aggregate import monthly_aggregates
+
+
+def test_monthly_aggregates_group_by_month():
+    daily = {
+        "time": ["2024-01-30", "2024-01-31", "2024-02-01", "2024-02-02"],
+        "temperature_2m_max": [10.0, 12.0, 5.0, None],
+        "temperature_2m_min": [2.0, 4.0, -1.0, None],
+        "precipitation_sum": [0.0, 3.5, 1.0, None],
+    }
+    jan, feb = monthly_aggregates(daily)
+    assert jan == {"month": "2024-01", "temperature_avg": 7.0, "temperature_min": 2.0,
+                   "temperature_max": 12.0, "precipitation": 3.5, "days": 2, "rain_days": 1}
+    # Jour manquant : ignoré dans les moyennes et extrêmes, compté dans `days`
+    assert feb["temperature_avg"] == 2.0 and feb["temperature_min"] == -1.0
+    assert feb["precipitation"] == 1.0 and feb["days"] == 2 and feb["rain_days"] == 1
+
+
+def test_monthly_aggregates_prefers_daily_mean_and_handles_empty():
+    daily = {"time": ["2024-03-01", "2024-03-02"], "temperature_2m_max": [10, 20],
+             "temperature_2m_min": [0, 10], "temperature_2m_mean": [4, None]}
+    (mar,) = monthly_aggregates(daily)
+    assert math.isclose(mar["temperature_avg"], (4 + 15) / 2)
+    assert mar["precipitation"] is None
+    assert monthly_aggregates({}) == []
+
+
+def test_monthly_endpoint_aggregates_and_caches(api, stub):
+    r = api.get("/station/monthly", params={"station": "FRPARIS", "start": "2024-01-15", "end": "2024-03-10"})
+    assert r.status_code == 200
+    months = r.json()["monthly"]
+    assert [m["month"] for m in months] == ["2024-01", "2024-02", "2024-03"]
+    assert [m["days"] for m in months] == [17, 29, 10]
+    again = api.get("/point/monthly", params={"lat": 48.8566, "lon": 2.3522, "start": "2024-01-15", "end": "2024-03-10"})
+    assert again.json()["monthly"] == months and stub.hits == 1
+    assert api.get("/point/monthly", params={"lat": 1, "lon": 1, "start": "2024-01-15"}).status_code == 400
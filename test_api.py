@@ -62,7 +62,7 @@ def test_station_monthly():
     r = client.get(f"/station/monthly?station={STATION}", headers=HEADERS)
     assert r.status_code == 200
     data = r.json()
-    assert "daily" in data  # Open-Meteo ne fournit pas de monthly, on utilise daily
+    assert "monthly" in data  # agrégé côté serveur à partir du daily Open-Meteo
 
 def test_station_climate():
     r = client.get(f"/station/climate?station={STATION}", headers=HEADERS)
@@ -96,7 +96,7 @@ def test_point_monthly():
     r = client.get(f"/point/monthly?lat={LAT}&lon={LON}", headers=HEADERS)
     assert r.status_code == 200
     data = r.json()
-    assert "daily" in data  # Open-Meteo ne fournit pas de monthly, on utilise daily
+    assert "monthly" in data  # agrégé côté serveur à partir du daily Open-Meteo
 
 def test_point_climate():
     r = client.get(f"/point/climate?lat={LAT}&lon={LON}", headers=HEADERS)
@@ -0,0 +1,29 @@
+import config
+from stations import STATIONS
+
+
+def test_batch_hourly_keyed_by_input(api, stub):
+    body = {"stations": ["FRPARIS", "USNYC"], "points": [{"lat": 43.6, "lon": 1.44}]}
+    r = api.post("/batch/hourly", json=body)
+    assert r.status_code == 200
+    data = r.json()
+    assert set(data) == {"FRPARIS", "USNYC", "43.6,1.44"}
+    assert data["USNYC"]["latitude"] == 40.7128 and "hourly" in data["USNYC"]
+    assert stub.hits == 1
+
+
+def test_batch_chunks_large_requests(api, stub, monkeypatch):
+    monkeypatch.setattr(config, "BATCH_CHUNK_SIZE", 50)
+    ids = [s["id"] for s in STATIONS[:120]]
+    r = api.post("/batch/daily", json={"stations": ids})
+    assert r.status_code == 200
+    assert list(r.json()) == ids
+    assert stub.hits == 3
+
+
+def test_batch_current_and_errors(api, stub):
+    r = api.post("/batch/current", json={"stations": ["FRPARIS"]})
+    assert r.status_code == 200
+    assert r.json()["FRPARIS"]["station"] == "FRPARIS" and "temperature" in r.json()["FRPARIS"]
+    assert api.post("/batch/current", json={"stations": ["NOPE"]}).status_code == 404
+    assert api.post("/batch/current", json={}).status_code == 400
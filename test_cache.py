@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+
+from cache import ResponseCache, make_key
+
+
+def test_make_key_ignores_param_order_and_types():
+    assert make_key("u", {"a": 1, "b": "x"}) == make_key("u", {"b": "x", "a": "1"})
+    assert make_key("u", {"a": 1}) != make_key("v", {"a": 1})
+
+
+def test_ttl_expiry_counts_miss():
+    cache = ResponseCache(10_000)
+    entry = cache.set("k", b"{}", ttl=60)
+    assert cache.get("k") is entry
+    entry.stored_at = time.monotonic() - 61
+    assert cache.get("k") is None
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 0)
+
+
+def test_lru_eviction_bounded_by_bytes():
+    cache = ResponseCache(3 * (1000 + 200))
+    for key in "abc":
+        cache.set(key, b"x" * 1000, ttl=60)
+    cache.get("a")
+    cache.set("d", b"x" * 1000, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.size <= cache.max_bytes and cache.evictions == 1
+    # Une entrée plus grosse que le cache n'est pas conservée
+    cache.set("big", b"x" * 10_000, ttl=60)
+    assert cache.get("big") is None
+
+
+def test_endpoint_served_from_cache_with_headers(api, stub):
+    r1 = api.get("/point/hourly?lat=48.8566&lon=2.3522")
+    r2 = api.get("/point/hourly?lat=48.8566&lon=2.3522")
+    assert r1.status_code == r2.status_code == 200
+    assert r1.json() == r2.json() and "hourly" in r2.json()
+    assert stub.hits == 1
+    assert r2.headers["cache-control"].startswith("public, max-age=")
+    assert int(r2.headers["age"]) >= 0
+
+
+def test_store_compresses_off_the_event_loop():
+    threads = []
+
+    def encode(body):
+        threads.append(threading.current_thread())
+        return {"gzip": b"z"}
+
+    cache = ResponseCache(10_000, encode=encode)
+    entry = asyncio.run(cache.store("k", b"{}", ttl=60))
+    assert entry.variants == {"gzip": b"z"} and cache.get("k") is entry
+    assert threads != [threading.main_thread()]
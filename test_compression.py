@@ -0,0 +1,45 @@
+import gzip
+import zlib
+
+import pytest
+
+import main
+from compression import AVAILABLE, negotiate
+
+
+def test_negotiate_quality_and_preference():
+    assert negotiate("gzip, deflate", ("zstd", "br", "gzip")) == "gzip"
+    assert negotiate("gzip;q=0.5, br", ("br", "gzip")) == "br"
+    assert negotiate("br;q=0, gzip", ("br", "gzip")) == "gzip"
+    assert negotiate("*", ("zstd", "gzip")) == "zstd"
+    assert negotiate("identity", ("gzip",)) is None and negotiate(None) is None
+
+
+def raw(api, url, encoding):
+    with api.stream("GET", url, headers={"Accept-Encoding": encoding}) as r:
+        return r, b"".join(r.iter_raw())
+
+
+def test_cached_payload_served_precompressed(api, stub):
+    r, body = raw(api, "/station/hourly?station=FRPARIS", "gzip")
+    assert r.headers["content-encoding"] == "gzip" and r.headers["vary"] == "Accept-Encoding"
+    entry = main.response_cache.get(main.provider.key(main.provider.hourly(48.8566, 2.3522)))
+    assert body == entry.variants["gzip"] and gzip.decompress(body) == entry.body
+    r, body = raw(api, "/station/hourly?station=FRPARIS", "identity")
+    assert "content-encoding" not in r.headers and body == entry.body
+
+
+@pytest.mark.parametrize("encoding", AVAILABLE)
+def test_dynamic_and_streamed_responses_compressed(api, stub, encoding):
+    r = api.get("/point/hourly?lat=1&lon=1&format=csv", headers={"Accept-Encoding": encoding})
+    assert r.headers["content-encoding"] == encoding and r.text.startswith("time,")
+    # Petite réponse : sous le seuil, non compressée
+    r = api.get("/current?station=FRPARIS", headers={"Accept-Encoding": encoding})
+    assert "content-encoding" not in r.headers and r.json()["station"] == "FRPARIS"
+
+
+def test_streamed_gzip_is_valid_stream(api, stub):
+    r, body = raw(api, "/point/hourly?lat=2&lon=2&format=ndjson", "gzip")
+    assert "content-length" not in r.headers
+    text = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body).decode()
+    assert len(text.splitlines()) == 168
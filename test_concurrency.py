@@ -0,0 +1,105 @@
+import asyncio
+
+import httpx
+import pytest
+
+import main
+from concurrency import AdaptiveLimiter
+from upstream import UpstreamOverloaded, UpstreamPool
+
+
+def test_limit_grows_when_fast_and_backs_off_when_slow():
+    now = [0.0]
+    limiter = AdaptiveLimiter(initial=4, min_limit=2, max_limit=10, backoff=0.5, tolerance=2.0,
+                              clock=lambda: now[0])
+
+    async def run():
+        for _ in range(4):
+            assert await limiter.acquire()
+        # Réponses rapides avec la limite pleinement utilisée : hausse additive
+        for _ in range(4):
+            limiter.release(0.1)
+        assert limiter.limit > 4 and limiter.baseline == 0.1
+        # Latence moyenne au-delà de 2 × la latence à vide : baisse multiplicative,
+        # une fois par latence de référence
+        for _ in range(3):
+            await limiter.acquire()
+        limiter.release(0.5)
+        assert limiter.limit > 4
+        limiter.release(0.5)
+        assert limiter.limit < 3
+        now[0] = 1.0
+        limiter.release(0.5, dropped=True)
+        assert limiter.limit == 2
+
+    asyncio.run(run())
+
+
+def test_excess_callers_wait_then_are_shed():
+    async def run():
+        limiter = AdaptiveLimiter(initial=1, min_limit=1, max_limit=1, max_queue=1, queue_timeout=0.05)
+        assert await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        # File pleine : refus immédiat
+        assert not await limiter.acquire()
+        # La place libérée passe au premier en attente
+        limiter.release(0.01)
+        assert await waiting and limiter.inflight == 1
+        # Délai d'attente dépassé : refus
+        assert not await limiter.acquire()
+        return limiter.stats()
+
+    stats = asyncio.run(run())
+    assert stats["shed"] == 2 and stats["queued"] == 0
+
+
+def test_overloaded_upstream_sheds_with_503(api, stub):
+    limiter = main.upstream.limiters["api.open-meteo.com/v1/forecast"] = AdaptiveLimiter(
+        initial=1, min_limit=1, max_limit=1, max_queue=0)
+    assert api.get("/station/hourly?station=FRPARIS").status_code == 200
+    # Un appel déjà en cours occupe la seule place
+    limiter.inflight = 1
+    r = api.get("/station/daily?station=FRPARIS")
+    assert r.status_code == 503 and int(r.headers["retry-after"]) >= 1
+    assert stub.hits == 1
+    assert api.get("/stats").json()["concurrency"]["api.open-meteo.com/v1/forecast"]["shed"] == 1
+
+
+def test_stream_holds_slot_until_closed():
+    pool = UpstreamPool(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b"[1,2,3]")))
+    url = "https://climate.test/v1/climate"
+
+    async def run():
+        r = await pool.stream(url)
+        limiter = pool.limiters["climate.test/v1/climate"]
+        during = limiter.inflight
+        async for _ in r.aiter_bytes():
+            pass
+        await r.aclose()
+        await r.aclose()
+        await pool.aclose()
+        return during, limiter.inflight
+
+    assert asyncio.run(run()) == (1, 0)
+
+
+def test_shed_call_does_not_consume_half_open_probe():
+    pool = UpstreamPool(transport=httpx.MockTransport(lambda request: httpx.Response(200)),
+                        failure_threshold=1, cooldown=0)
+    url = "https://api.test/v1/forecast"
+    breaker = pool.breaker_for("api.test")
+    breaker.failure()
+    pool.limiters["api.test/v1/forecast"] = AdaptiveLimiter(initial=1, min_limit=1, max_limit=1, max_queue=0)
+    pool.limiters["api.test/v1/forecast"].inflight = 1
+
+    async def run():
+        with pytest.raises(UpstreamOverloaded):
+            await pool.get(url)
+        # Place libérée : la sonde du disjoncteur est toujours disponible
+        pool.limiters["api.test/v1/forecast"].cancel()
+        r = await pool.get(url)
+        await pool.aclose()
+        return r.status_code
+
+    assert asyncio.run(run()) == 200 and breaker.stats()["state"] == "closed"
@@ -0,0 +1,58 @@
+from email.utils import parsedate_to_datetime
+
+import main
+from cache import ResponseCache
+
+
+def test_etag_ignores_generation_time_and_keeps_last_modified():
+    cache = ResponseCache(1 << 20)
+    first = cache.set("k", b'{"latitude":1,"generationtime_ms":0.12,"hourly":[1]}', 60, age=30)
+    second = cache.set("k", b'{"latitude":1,"generationtime_ms":0.57,"hourly":[1]}', 60)
+    assert second.etag == first.etag and second.modified == first.modified
+    third = cache.set("k", b'{"latitude":1,"generationtime_ms":0.3,"hourly":[2]}', 60)
+    assert third.etag != first.etag and third.modified > first.modified
+
+
+def test_if_none_match_returns_304_without_upstream(api, stub):
+    r = api.get("/station/hourly?station=FRPARIS")
+    etag, modified = r.headers["etag"], r.headers["last-modified"]
+    assert etag.startswith('"') and modified.endswith("GMT")
+    again = api.get("/station/hourly?station=FRPARIS", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+    assert api.get("/station/hourly?station=FRPARIS", headers={"If-Modified-Since": modified}).status_code == 304
+    old = "Mon, 01 Jan 2001 00:00:00 GMT"
+    assert api.get("/station/hourly?station=FRPARIS", headers={"If-Modified-Since": old}).status_code == 200
+    assert api.get("/station/hourly?station=FRPARIS", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert stub.hits == 1
+
+
+def test_conditional_on_transformed_responses(api, stub):
+    current = api.get("/current?station=FRPARIS")
+    assert api.get("/current?station=FRPARIS", headers={"If-None-Match": current.headers["etag"]}).status_code == 304
+    json_tag = api.get("/point/daily?lat=1&lon=1").headers["etag"]
+    csv = api.get("/point/daily?lat=1&lon=1&format=csv")
+    assert csv.headers["etag"] != json_tag
+    assert api.get("/point/daily?lat=1&lon=1&format=csv", headers={"If-None-Match": csv.headers["etag"]}).status_code == 304
+    # Étiquette d'une autre représentation (csv, gzip) : pas de 304 pour la version json
+    assert api.get("/point/daily?lat=1&lon=1", headers={"If-None-Match": csv.headers["etag"]}).status_code == 200
+    identity = {"Accept-Encoding": "identity"}
+    plain_tag = api.get("/station/hourly?station=FRPARIS", headers=identity).headers["etag"]
+    gzip_tag = api.get("/station/hourly?station=FRPARIS", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    assert gzip_tag != plain_tag
+    r = api.get("/station/hourly?station=FRPARIS", headers={**identity, "If-None-Match": gzip_tag})
+    assert r.status_code == 200
+    r = api.get("/station/hourly?station=FRPARIS", headers={**identity, "If-None-Match": f"W/{plain_tag}"})
+    assert r.status_code == 304
+
+
+def test_refresh_with_same_content_keeps_validators(api, stub):
+    r = api.get("/station/daily?station=FRPARIS")
+    for entry in main.response_cache._entries.values():
+        entry.stored_at -= 10_000
+        entry.modified -= 10_000
+    fresh = api.get("/station/daily?station=FRPARIS")
+    assert stub.hits == 2 and "warning" not in fresh.headers
+    assert fresh.headers["etag"] == r.headers["etag"]
+    # Date de modification conservée (celle de l'entrée d'origine, reculée de 10 000 s)
+    delta = parsedate_to_datetime(r.headers["last-modified"]) - parsedate_to_datetime(fresh.headers["last-modified"])
+    assert 9_990 <= delta.total_seconds() <= 10_010
@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+
+from current import current_conditions, current_index
+
+
+def test_current_index_uses_station_local_time():
+    times = [f"2024-06-01T{h:02d}:00" for h in range(24)]
+    now = datetime(2024, 6, 1, 12, 30, tzinfo=timezone.utc)
+    assert current_index(times, 7200, now) == 14
+    assert current_index(times, -5 * 3600, now) == 7
+    # Série entièrement passée : dernière heure
+    assert current_index(times, 0, datetime(2024, 6, 3, tzinfo=timezone.utc)) == 23
+
+
+def test_current_conditions_from_hourly_fallback():
+    data = {"utc_offset_seconds": 0, "hourly": {
+        "time": ["2024-06-01T10:00", "2024-06-01T11:00", "2024-06-01T12:00"],
+        "temperature_2m": [10.0, 11.0, 12.0],
+        "relative_humidity_2m": [80, 70, 60],
+        "wind_speed_10m": [5.0, 6.0, 7.0],
+        "weather_code": [0, 61, 3],
+    }}
+    result = current_conditions(data, "X", datetime(2024, 6, 1, 11, 20, tzinfo=timezone.utc))
+    assert result["temperature"] == 11.0 and result["humidity"] == 70
+    assert result["condition"] == "Slight rain" and result["time"] == "2024-06-01T11:00"
+
+
+def test_current_endpoint_uses_current_block(api, stub):
+    r = api.get("/current?station=FRPARIS")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["station"] == "FRPARIS" and data["condition"] == "Partly cloudy"
+    assert data["temperature"] == 18.4 and data["humidity"] == 64
+    assert "cache-control" in r.headers
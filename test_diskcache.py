@@ -0,0 +1,52 @@
+import os
+import time
+
+import main
+from cache import ResponseCache, make_key
+from diskcache import DiskCache
+
+KEY = make_key("https://api.open-meteo.com/v1/forecast", {"latitude": 1, "longitude": 2})
+
+
+def test_roundtrip_shared_between_connections(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer, reader = DiskCache(path, 1 << 20), DiskCache(path, 1 << 20)
+    writer.set(KEY, b'{"hourly": [1, 2, 3]}' * 100, ttl=60)
+    body, age, remaining = reader.get(KEY)
+    assert body == b'{"hourly": [1, 2, 3]}' * 100
+    assert 0 <= age < 1 and 59 < remaining <= 60
+    assert writer.size() < len(body)  # stocké compressé
+    assert reader.get(make_key("x", {})) is None
+
+
+def test_expiry_and_size_cap_compaction(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=0)
+    cache.set(("expired",), b"x", ttl=-1)
+    assert cache.get(("expired",)) is None
+    cache.max_bytes = 10_000
+    for i in range(20):
+        cache.set(("k", i), os.urandom(2048), ttl=60)
+        time.sleep(0.001)
+    expired, evicted = cache.compact()
+    assert expired == 1 and evicted > 0
+    assert cache.size() <= 10_000
+    assert cache.get(("k", 0)) is None and cache.get(("k", 19)) is not None
+
+
+def test_restart_served_from_disk(api, stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "disk_cache", DiskCache(str(tmp_path / "cache.sqlite3"), 1 << 24))
+    first = api.get("/point/hourly?lat=48.8566&lon=2.3522")
+    # Nouveau processus : cache mémoire vide, le disque a survécu
+    monkeypatch.setattr(main, "response_cache", ResponseCache(1 << 24))
+    second = api.get("/point/hourly?lat=48.8566&lon=2.3522")
+    assert second.json() == first.json() and stub.hits == 1
+    assert main.disk_cache.hits == 1
+
+
+def test_reads_do_not_wait_for_writer_lock(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), 1 << 20)
+    cache.set(KEY, b"body", ttl=60)
+    # Compaction ou écriture en cours (verrou pris) : la lecture passe quand même
+    with cache._lock:
+        assert cache.get(KEY)[0] == b"body"
+    cache.close()
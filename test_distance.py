@@ -0,0 +1,48 @@
+import random
+
+import numpy as np
+
+from distance import StationArrays
+from main import haversine
+
+
+def test_kernel_matches_scalar_haversine():
+    rng = random.Random(3)
+    lats = [rng.uniform(-90, 90) for _ in range(500)] + [90, -90, 0]
+    lons = [rng.uniform(-180, 180) for _ in range(500)] + [0, 0, 180]
+    arrays = StationArrays(lats, lons)
+    queries = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(20)] + [(0, 0)]
+    matrix = arrays.distances_many([q[0] for q in queries], [q[1] for q in queries])
+    for row, (qlat, qlon) in zip(matrix, queries):
+        expected = np.array([haversine(qlat, qlon, la, lo) for la, lo in zip(lats, lons)])
+        np.testing.assert_allclose(row, expected, rtol=1e-9, atol=1e-6)
+        np.testing.assert_allclose(arrays.distances(qlat, qlon), expected, rtol=1e-9, atol=1e-6)
+
+
+def test_nearest_many_k_and_radius():
+    arrays = StationArrays([0, 1, 2, 10], [0, 0, 0, 0])
+    (idx, dist), = arrays.nearest_many([0.1], [0], k=3)
+    assert idx.tolist() == [0, 1, 2] and list(dist) == sorted(dist)
+    (idx, _), = arrays.nearest_many([0.1], [0], k=10, radius_km=150)
+    assert idx.tolist() == [0, 1]
+
+
+def test_nearby_batch_endpoint(api):
+    body = {"points": [{"lat": 48.8566, "lon": 2.3522}, {"lat": 40.7128, "lon": -74.006}], "k": 2}
+    r = api.post("/station/nearby/batch", json=body)
+    assert r.status_code == 200
+    paris, nyc = r.json()
+    assert paris[0]["id"] == "FRPARIS" and nyc[0]["id"] == "USNYC"
+    assert len(paris) == 2 and paris[1]["distance_km"] > 0
+    # Même résultat que l'endpoint unitaire
+    single = api.get("/station/nearby?lat=48.8566&lon=2.3522&k=2").json()
+    assert [s["id"] for s in single] == [s["id"] for s in paris]
+
+
+def test_nearby_batch_tree_path_matches(api, monkeypatch):
+    import config
+    body = {"points": [{"lat": 35.0, "lon": 139.0}, {"lat": -33.0, "lon": 151.0}], "k": 4, "radius_km": 2000}
+    vector = api.post("/station/nearby/batch", json=body).json()
+    monkeypatch.setattr(config, "NEARBY_VECTOR_MAX_STATIONS", 0)
+    tree = api.post("/station/nearby/batch", json=body).json()
+    assert vector == tree
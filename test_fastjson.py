@@ -0,0 +1,18 @@
+import json
+
+from fastjson import FastJSONResponse, dumps, loads
+
+
+def test_dumps_matches_stdlib_compact_encoding():
+    obj = {"name": "Zürich", "values": [1, 2.5, None], "ok": True}
+    assert loads(dumps(obj)) == obj
+    assert dumps(obj) == json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def test_fast_response_used_by_transforming_endpoints(api, stub):
+    r = FastJSONResponse([{"a": 1}], headers={"X-Test": "1"})
+    assert r.body == b'[{"a":1}]' and r.headers["content-type"] == "application/json"
+    nearby = api.get("/station/nearby?lat=48.85&lon=2.35&k=2")
+    assert nearby.status_code == 200 and len(nearby.json()) == 2
+    batch = api.post("/batch/daily", json={"stations": ["FRPARIS"]})
+    assert batch.json()["FRPARIS"]["daily"]["time"]
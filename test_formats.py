@@ -0,0 +1,50 @@
+import csv
+import io
+import json
+
+import pytest
+
+import formats
+from formats import csv_chunks, ndjson_chunks, series_columns
+
+
+def test_series_columns_from_blocks_and_rows():
+    assert series_columns({"daily": {"time": ["2024-01-01"], "t": [1.0]}}) == ("daily", {"time": ["2024-01-01"], "t": [1.0]})
+    rows = [{"month": "2024-01", "days": 31}, {"month": "2024-02", "days": 29}]
+    assert series_columns({"monthly": rows}) == ("monthly", {"month": ["2024-01", "2024-02"], "days": [31, 29]})
+
+
+def test_csv_and_ndjson_are_chunked(monkeypatch):
+    monkeypatch.setattr(formats, "CHUNK_ROWS", 2)
+    columns = {"time": ["a", "b", "c"], "temperature_2m": [1.5, None, 3.0]}
+    chunks = list(csv_chunks(columns))
+    assert len(chunks) == 2
+    assert list(csv.reader(io.StringIO(b"".join(chunks).decode()))) == [
+        ["time", "temperature_2m"], ["a", "1.5"], ["b", ""], ["c", "3.0"]]
+    lines = b"".join(ndjson_chunks(columns)).splitlines()
+    assert [json.loads(line) for line in lines][1] == {"time": "b", "temperature_2m": None}
+
+
+def test_point_hourly_formats(api, stub):
+    r = api.get("/point/hourly?lat=48.85&lon=2.35&format=csv")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(r.text)))
+    assert rows[0][0] == "time" and len(rows) == 169
+    assert "cache-control" in r.headers
+    r = api.get("/station/monthly?station=FRPARIS&format=ndjson")
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert "temperature_avg" in json.loads(r.text.splitlines()[0])
+    assert api.get("/point/daily?lat=1&lon=1&format=xml").status_code == 422
+
+
+def test_arrow_and_parquet(api, stub):
+    if not formats.ARROW_AVAILABLE:
+        assert api.get("/point/hourly?lat=1&lon=1&format=arrow").status_code == 501
+        pytest.skip("pyarrow non installé")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    r = api.get("/station/daily?station=FRPARIS&format=arrow")
+    table = pa.ipc.open_stream(r.content).read_all()
+    assert table.num_rows == 7 and pa.types.is_date32(table.schema.field("time").type)
+    r = api.get("/point/hourly?lat=1&lon=1&format=parquet")
+    assert pq.read_table(io.BytesIO(r.content)).num_rows == 168
@@ -0,0 +1,28 @@
+import config
+from grid import snap_coords
+
+
+def test_snap_coords():
+    assert snap_coords(48.8566, 2.3522, 0.1) == (48.9, 2.4)
+    assert snap_coords(48.8566, 2.3522, 0.25) == (48.75, 2.25)
+    assert snap_coords(-33.8688, 151.2093, 0.1) == (-33.9, 151.2)
+    # Bords : latitude bornée, longitude 180 ramenée à -180
+    assert snap_coords(89.99, 179.99, 0.25) == (90.0, -180.0)
+
+
+def test_point_snap_shares_cache_entry(api, stub):
+    first = api.get("/point/hourly?lat=48.8566&lon=2.3522&snap=true")
+    second = api.get("/point/hourly?lat=48.8567&lon=2.3519&snap=true")
+    assert first.status_code == second.status_code == 200
+    assert second.headers["x-snapped-lat"] == "48.9" and second.headers["x-snapped-lon"] == "2.4"
+    assert stub.hits == 1
+    # Sans snap : coordonnées brutes, un appel par position
+    r = api.get("/point/hourly?lat=48.8566&lon=2.3522")
+    assert "x-snapped-lat" not in r.headers and stub.hits == 2
+
+
+def test_point_snap_default_from_config(api, stub, monkeypatch):
+    monkeypatch.setattr(config, "POINT_SNAP", True)
+    r = api.get("/point/monthly?lat=48.8566&lon=2.3522")
+    assert r.status_code == 200 and r.headers["x-snapped-lon"] == "2.4"
+    assert api.get("/point/daily?lat=48.8566&lon=2.3522&snap=false").headers.get("x-snapped-lat") is None
@@ -0,0 +1,43 @@
+import json
+
+from benchmarks.loadtest import regressions
+from benchmarks.stub_upstream import load_fixtures, replay
+
+DAILY = {
+    "latitude": 48.86, "longitude": 2.35,
+    "daily": {"time": ["2024-06-01", "2024-06-02", "2024-06-03"],
+              "temperature_2m_max": [20.1, 21.5, 19.8], "temperature_2m_min": [11.0, 12.4, 10.9],
+              "precipitation_sum": [0.0, 1.2, 0.4], "wind_speed_10m_max": [14.2, 9.8, 11.5]},
+}
+
+
+def test_replay_moves_and_slices_recorded_payload():
+    q = {"daily": "temperature_2m_max", "start_date": "2024-06-02", "end_date": "2024-06-03"}
+    payload = replay(DAILY, q, 40.0, -3.7)
+    assert (payload["latitude"], payload["longitude"]) == (40.0, -3.7)
+    assert payload["daily"] == {"time": ["2024-06-02", "2024-06-03"], "temperature_2m_max": [21.5, 19.8]}
+    # Période ou variable non enregistrée : le stub génère la réponse
+    assert replay(DAILY, {**q, "end_date": "2024-07-01"}, 40.0, -3.7) is None
+    assert replay(DAILY, {"daily": "temperature_2m_mean"}, 40.0, -3.7) is None
+
+
+def test_api_served_from_recorded_fixtures(tmp_path, stub, api):
+    (tmp_path / "fixtures").mkdir()
+    (tmp_path / "fixtures" / "daily.json").write_text(json.dumps(DAILY))
+    stub.fixtures = load_fixtures(str(tmp_path / "fixtures"))
+    r = api.get("/history", params={"station": "FRPARIS", "date": "2024-06-02"})
+    assert r.status_code == 200
+    assert r.json()["daily"]["time"] == ["2024-06-02"]
+    assert r.json()["daily"]["temperature_2m_max"] == [21.5]
+    assert stub.replayed == 1
+
+
+def test_regressions_against_baseline():
+    ref = {"rps": 100.0, "p50_ms": 5.0, "p95_ms": 10.0, "p99_ms": 20.0, "errors": 0}
+    baseline = {"results": {"/ping": ref}, "rss_peak_mb": 100.0}
+    same = {"results": {"/ping": dict(ref, rps=90.0, p95_ms=11.0)}, "rss_peak_mb": 110.0}
+    assert regressions(same, baseline, 0.3) == []
+    worse = {"results": {"/ping": dict(ref, rps=50.0, p99_ms=40.0)}, "rss_peak_mb": 150.0}
+    found = regressions(worse, baseline, 0.3)
+    assert len(found) == 3
+    assert found[0].startswith("/ping: débit")
@@ -0,0 +1,32 @@
+from metrics import Counter, Histogram, Registry
+
+
+def test_histogram_and_counter_exposition():
+    registry = Registry()
+    h = registry.add(Histogram("x_seconds", "aide", ("route",), buckets=(0.1, 1.0)))
+    c = registry.add(Counter("y_total", "aide", ("host",)))
+    h.observe(("/a",), 0.05)
+    h.observe(("/a",), 0.5)
+    h.observe(("/a",), 5.0)
+    c.inc(("api",))
+    registry.collector(lambda: [("z_ratio", "gauge", "aide", [({"k": 'a"b'}, 0.5)])])
+    text = registry.render()
+    assert 'x_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'x_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 'x_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'x_seconds_count{route="/a"} 3' in text and 'y_total{host="api"} 1' in text
+    assert 'z_ratio{k="a\\"b"} 0.5' in text
+
+
+def test_metrics_endpoint_reports_routes_stages_and_upstream(api, stub):
+    api.get("/station/hourly?station=FRPARIS")
+    api.get("/station/hourly?station=FRPARIS")
+    api.get("/current?station=FRPARIS")
+    r = api.get("/metrics")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    assert 'meteo_request_duration_seconds_count{route="/station/hourly",method="GET",status="200"}' in text
+    for stage in ("auth", "cache", "upstream", "parse", "encode"):
+        assert f'stage="{stage}"' in text
+    assert 'meteo_upstream_responses_total{host="api.open-meteo.com",status="200"}' in text
+    assert "meteo_cache_hit_ratio" in text and "meteo_requests_in_flight" in text
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import httpx
+import numpy as np
+
+import main
+import normals
+from benchmarks.stub_upstream import StubUpstream
+from normals import NormalsStore, compute_normals, warm
+
+
+def synthetic_daily(years=(2000, 2001)):
+    times = np.arange(f"{years[0]}-01-01", f"{years[-1] + 1}-01-01", dtype="datetime64[D]")
+    month = times.astype("datetime64[M]").astype(int) % 12
+    return {
+        "time": [str(t) for t in times],
+        "temperature_2m_mean": (month * 2.0).tolist(),
+        "temperature_2m_max": (month * 2.0 + 5).tolist(),
+        "temperature_2m_min": (month * 2.0 - 5).tolist(),
+        "precipitation_sum": [2.0] * len(times),
+    }
+
+
+def test_compute_normals_monthly_and_day_of_year():
+    normals = compute_normals(synthetic_daily())
+    monthly = normals["monthly"]
+    assert monthly["temperature_mean"][:3] == [0.0, 2.0, 4.0]
+    assert monthly["temperature_p90"][11] == 22.0 and monthly["temperature_max"][0] == 5.0
+    # Cumul mensuel moyen : 31 jours x 2 mm en janvier, 28/29 en février (2000 bissextile)
+    assert monthly["precipitation"][0] == 62.0 and monthly["precipitation"][1] == 57.0
+    assert monthly["rain_days"][0] == 31.0
+    doy = normals["day_of_year"]
+    assert len(doy["temperature_mean"]) == 365 and doy["temperature_mean"][0] == 0.0
+    # 2000 bissextile : le rang du 1er mars ne mélange pas le 29 février 2000 et le 1er mars 2001
+    assert doy["date"][59] == "03-01" and doy["temperature_mean"][59] == 4.0
+    assert doy["date"][58] == "02-28" and doy["temperature_mean"][58] == 2.0
+
+
+def test_store_roundtrip(tmp_path):
+    store = NormalsStore(str(tmp_path))
+    assert store.get("FRPARIS") is None and "FRPARIS" not in store
+    store.put("FRPARIS", b'{"a":1}')
+    assert store.get("FRPARIS") == b'{"a":1}' and "FRPARIS" in store
+
+
+def test_store_ignores_previous_layout(tmp_path, monkeypatch):
+    store = NormalsStore(str(tmp_path))
+    store.put("FRPARIS", b'{"a":1}')
+    # Format des normales modifié : l'ancien fichier n'est plus servi, il sera recalculé
+    monkeypatch.setattr(normals, "LAYOUT", normals.LAYOUT + 1)
+    assert store.get("FRPARIS") is None and "FRPARIS" not in store
+
+
+def test_climate_endpoint_serves_normals_from_store(api, stub):
+    r = api.get("/station/climate?station=FRLYON")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["period"] == "1991-2020" and len(data["monthly"]["temperature_mean"]) == 12
+    assert "FRLYON" in main.normals_store
+    main.response_cache.clear()
+    assert api.get("/station/climate?station=FRLYON").json() == data
+    assert stub.hits == 1
+    raw = api.get("/station/climate?station=FRLYON&raw=true").json()
+    assert len(raw["daily"]["time"]) == 10958
+
+
+def test_warm_populates_store(tmp_path):
+    stub = StubUpstream()
+    store = NormalsStore(str(tmp_path))
+    pool = main.UpstreamPool(transport=httpx.ASGITransport(app=stub.app))
+    done, failed = asyncio.run(warm(store, [("FRPARIS", 48.8566, 2.3522), ("USNYC", 40.7128, -74.006)], 2, pool=pool))
+    assert (done, failed) == (2, []) and "USNYC" in store
+    assert json.loads(store.get("FRPARIS"))["latitude"] == 48.8566
+
+
+def test_climate_stream_and_date_slices(api, stub):
+    r = api.get("/point/climate?lat=45&lon=5&stream=true&start_date=2000-01-01&end_date=2000-01-31")
+    assert r.status_code == 200
+    assert r.json()["daily"]["time"][-1] == "2000-01-31" and len(r.json()["daily"]["time"]) == 31
+    assert len(main.response_cache) == 0  # relayé sans mise en cache
+    # Une période implique la série brute, servie depuis le cache ensuite
+    sliced = api.get("/station/climate?station=FRLYON&start_date=2010-06-01&end_date=2010-06-30")
+    assert len(sliced.json()["daily"]["time"]) == 30
+    again = api.get("/station/climate?station=FRLYON&start_date=2010-06-01&end_date=2010-06-30&stream=true")
+    assert again.content == sliced.content and stub.hits == 2
+    assert api.get("/station/climate?station=FRLYON&start_date=2021-01-01&end_date=2020-01-01").status_code == 400
+    assert api.get("/station/climate?station=FRLYON&start_date=1900-01-01").status_code == 400
+    assert api.get("/station/climate?station=FRLYON&stream=true&format=csv").status_code == 400
+
+
+def test_climate_stream_closed_when_body_never_iterated(stub):
+    async def run():
+        response = await main.stream_upstream(main.provider.climate(45.0, 5.0, "2000-01-01", "2000-01-31"))
+        limiter = main.upstream.limiters["climate-api.open-meteo.com/v1/climate"]
+        during = limiter.inflight
+        # Client déconnecté avant l'itération du corps : seule la tâche de fond s'exécute
+        await response.background()
+        return during, limiter.inflight
+
+    # Réponse fermée : la place du limiteur, tenue jusque-là, est rendue
+    assert asyncio.run(run()) == (1, 0)
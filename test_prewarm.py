@@ -0,0 +1,117 @@
+import asyncio
+
+import main
+from prewarm import Prewarmer
+from providers import Query
+
+
+def make_prewarmer(remaining, **kwargs):
+    calls = []
+
+    async def refresh(key, query):
+        calls.append((key, query.dataset))
+        await asyncio.sleep(0.01)
+
+    options = {"top_n": 2, "lead": 30.0, "jitter": 0.0, "concurrency": 1, "interval": 3600, **kwargs}
+    return Prewarmer(refresh, remaining, **options), calls
+
+
+def test_only_hot_entries_near_expiry_are_refreshed():
+    remaining = {"a": 5.0, "b": 500.0, "c": 5.0, "d": None}
+    warm, calls = make_prewarmer(remaining.get)
+    for key, hits in (("a", 10), ("b", 8), ("c", 1), ("d", 3)):
+        for _ in range(hits):
+            warm.record(key, Query("current", {}))
+    # Top 2 : a et b ; b n'expire pas bientôt, c est sous le score minimal
+    assert [k for k, _ in warm.due()] == ["a"]
+
+    async def run():
+        warm.start()
+        warm.tick()
+        assert warm.stats()["scheduled"] == 1
+        await asyncio.sleep(0.05)
+        stats = warm.stats()
+        await warm.stop()
+        return stats
+
+    stats = asyncio.run(run())
+    assert calls == [("a", "current")]
+    assert stats["refreshed"] == 1 and stats["scheduled"] == 0 and stats["queue_depth"] == 0
+    assert stats["last_refresh_ms"] >= 10
+
+
+def test_scores_decay_and_concurrency_is_capped():
+    warm, _ = make_prewarmer(lambda key: None, top_n=10, decay=0.5, concurrency=2)
+    active = peak = 0
+
+    async def refresh(key, query):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    warm.refresh = refresh
+    for key in "abcdef":
+        warm.record(key, Query("hourly", {}))
+        warm.record(key, Query("hourly", {}))
+
+    async def run():
+        warm.start()
+        warm.tick()
+        await asyncio.sleep(0.1)
+        await warm.stop()
+
+    asyncio.run(run())
+    assert warm.refreshed == 6 and peak == 2
+    # 2 -> 1 après un passage : plus assez chaud pour être rafraîchi
+    assert warm.due() == []
+
+
+def test_refresh_cached_replaces_entry(api, stub):
+    query = main.provider.current(48.85, 2.35)
+    key = main.provider.key(query)
+    api.get("/current?lat=48.85&lon=2.35")
+    before = main.response_cache.peek(key)
+    asyncio.run(main.refresh_cached(key, query))
+    after = main.response_cache.peek(key)
+    assert after is not before and after.remaining > before.remaining - 1
+    assert stub.hits == 2
+    assert api.get("/stats").json()["prewarm"]["tracked"] >= 1
+
+
+def test_tracked_keys_bounded_between_ticks():
+    warm, _ = make_prewarmer(lambda key: None, max_tracked=100)
+    warm.record("hot", Query("hourly", {}))
+    warm.record("hot", Query("hourly", {}))
+    # Une clé par coordonnée, sans passage du planificateur
+    for i in range(1000):
+        warm.record(("point", i), Query("hourly", {}))
+    assert warm.stats()["tracked"] <= 100 and len(warm._requests) <= 100
+    assert "hot" in warm._scores
+
+
+def test_failing_refresh_backs_off():
+    now = [0.0]
+    warm, _ = make_prewarmer(lambda key: None, interval=10.0, max_backoff=60.0, clock=lambda: now[0])
+
+    async def refresh(key, query):
+        raise RuntimeError("Open-Meteo indisponible")
+
+    warm.refresh = refresh
+    for _ in range(5):
+        warm.record("a", Query("hourly", {}))
+
+    async def run():
+        warm.start()
+        for expected in (20.0, 40.0, 60.0):
+            warm.tick()
+            await asyncio.sleep(0.01)
+            # Pas de nouvel essai avant la fin de l'attente, qui double à chaque échec
+            assert warm.due() == [] and warm._failures["a"][1] == now[0] + expected
+            now[0] += expected
+            assert [k for k, _ in warm.due()] == ["a"]
+        await warm.stop()
+
+    asyncio.run(run())
+    assert warm.failed == 3
@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from providers import FileProvider, OpenMeteoProvider, Provider, Query
+from upstream import UpstreamError, UpstreamPool
+
+URLS = {"hourly": ["https://mirror-a.test/v1/forecast", "https://mirror-b.test/v1/forecast"]}
+
+
+def mirrors(statuses, calls):
+    # Statut renvoyé par hôte ; chaque appel est noté
+    def handler(request):
+        calls.append(request.url.host)
+        status = statuses[request.url.host]
+        return httpx.Response(status, json={"host": request.url.host})
+    return UpstreamPool(transport=httpx.MockTransport(handler), failure_threshold=2, cooldown=60)
+
+
+def test_failover_to_next_mirror_then_prefers_healthy_one():
+    calls = []
+    provider = OpenMeteoProvider(mirrors({"mirror-a.test": 503, "mirror-b.test": 200}, calls), URLS, penalty=1.0)
+    query = provider.hourly(48.85, 2.35)
+
+    async def run():
+        first = await provider.get(query)
+        second = await provider.get(query)
+        await provider.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.json()["host"] == second.json()["host"] == "mirror-b.test"
+    # Le miroir en échec est pénalisé : le second appel va directement au miroir sain
+    assert calls == ["mirror-a.test", "mirror-b.test", "mirror-b.test"]
+    assert provider.failovers == 1
+    # Clé de cache indépendante du miroir qui a répondu
+    assert provider.key(query)[0] == URLS["hourly"][0]
+
+
+def test_all_mirrors_failing_raises_last_error():
+    calls = []
+    provider = OpenMeteoProvider(mirrors({"mirror-a.test": 503, "mirror-b.test": 500}, calls), URLS)
+    with pytest.raises(UpstreamError) as e:
+        asyncio.run(provider.get(Query("hourly", {"latitude": 1, "longitude": 2})))
+    assert e.value.status_code in (500, 503) and len(calls) == 2
+
+
+def test_client_errors_are_not_retried_on_mirrors():
+    calls = []
+    provider = OpenMeteoProvider(mirrors({"mirror-a.test": 400, "mirror-b.test": 400}, calls), URLS)
+    r = asyncio.run(provider.get(Query("hourly", {"latitude": 1, "longitude": 2})))
+    assert r.status_code == 400 and len(calls) == 1
+
+
+def test_file_provider_serves_recorded_payloads(tmp_path, monkeypatch):
+    hourly = {"latitude": 0, "longitude": 0, "hourly": {"time": ["2024-06-01T00:00"], "temperature_2m": [12.5]}}
+    (tmp_path / "hourly.json").write_text(json.dumps(hourly))
+    monkeypatch.setattr(main, "provider", FileProvider(str(tmp_path)))
+    main.response_cache.clear()
+    with TestClient(main.app, headers={"x-rapidapi-host": "test"}) as api:
+        r = api.get("/station/hourly?station=FRPARIS")
+        assert r.status_code == 200 and r.json()["hourly"]["temperature_2m"] == [12.5]
+        assert r.json()["latitude"] == 48.8566
+        # Jeu de données non enregistré
+        assert api.get("/station/daily?station=FRPARIS").status_code == 502
+        assert api.get("/stats").json()["provider"]["served"] == 1
+    main.response_cache.clear()
+
+
+def test_monthly_without_period_excludes_forecast_days():
+    params = main.provider.monthly(48.85, 2.35).params
+    assert params["past_days"] > 0 and params["forecast_days"] == 0
+
+
+def test_incomplete_provider_or_empty_mirror_list_rejected_at_creation():
+    class NoGet(Provider):
+        def source(self, dataset):
+            return dataset
+
+    with pytest.raises(TypeError):
+        NoGet()
+    with pytest.raises(ValueError, match="hourly"):
+        OpenMeteoProvider(UpstreamPool(), {"hourly": []})
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+import main
+from ratelimit import BudgetExhausted, RateLimiter, UpstreamBudget
+
+PLANS = {"BASIC": 3, "PRO": 6}
+
+
+def test_bucket_per_client_and_plan():
+    now = [0.0]
+    limiter = RateLimiter(PLANS, "basic", max_clients=2, clock=lambda: now[0])
+    assert [limiter.check("alice")[0] for _ in range(4)] == [True, True, True, False]
+    allowed, limit, remaining, reset, retry_after = limiter.check("alice")
+    assert (allowed, limit, remaining) == (False, 3, 0) and retry_after == pytest.approx(20.0)
+    assert limiter.check("bob", "pro")[1:3] == (6, 5)
+    # 20 s plus tard : un jeton de plus (3 par minute)
+    now[0] = 20.0
+    assert limiter.check("alice")[0] and not limiter.check("alice")[0]
+    # Au-delà de max_clients, le client inactif depuis le plus longtemps est oublié
+    limiter.check("carol")
+    assert limiter.stats() == {"clients": 2, "rejected": 3}
+
+
+def test_plan_change_keeps_remaining_tokens():
+    limiter = RateLimiter(PLANS, "basic", clock=lambda: 0.0)
+    assert [limiter.check("alice", "basic")[0] for _ in range(3)] == [True, True, True]
+    # Alterner les abonnements ne remplit pas le seau
+    assert limiter.check("alice", "pro")[:3] == (False, 6, 0)
+    assert limiter.check("alice", "basic")[:3] == (False, 3, 0)
+
+
+def test_rate_limit_headers_and_429(api, monkeypatch):
+    monkeypatch.setattr(main.rate_limiter, "plans", PLANS)
+    monkeypatch.setattr(main.rate_limiter, "default_limit", PLANS["BASIC"])
+    main.rate_limiter.clear()
+    user = {"x-rapidapi-user": "alice"}
+    r = api.get("/stations?country=FR", headers=user)
+    assert r.status_code == 200
+    assert (r.headers["x-ratelimit-limit"], r.headers["x-ratelimit-remaining"]) == ("3", "2")
+    api.get("/ping", headers=user)
+    api.get("/ping", headers=user)
+    r = api.get("/ping", headers=user)
+    assert r.status_code == 429 and r.headers["x-ratelimit-remaining"] == "0"
+    assert int(r.headers["retry-after"]) >= 1
+    # Autre client, autre abonnement : non affecté
+    r = api.get("/ping", headers={"x-rapidapi-user": "bob", "x-rapidapi-subscription": "PRO"})
+    assert r.status_code == 200 and r.headers["x-ratelimit-limit"] == "6"
+    # Sans x-rapidapi-user : seau anonyme par adresse, abonnement par défaut
+    assert [api.get("/ping").status_code for _ in range(4)] == [200, 200, 200, 429]
+    main.rate_limiter.clear()
+
+
+def test_budget_serves_waiting_clients_in_turn():
+    async def run():
+        # 1 appel d'avance, puis un jeton toutes les 10 ms
+        budget = UpstreamBudget(per_minute=6000, burst=1)
+        order = []
+
+        async def call(client, i):
+            await budget.acquire(client)
+            order.append(f"{client}{i}")
+
+        await budget.acquire("greedy")
+        greedy = [asyncio.create_task(call("greedy", i)) for i in range(4)]
+        await asyncio.sleep(0)
+        polite = asyncio.create_task(call("polite", 0))
+        await asyncio.gather(*greedy, polite)
+        return order, budget.stats()
+
+    order, stats = asyncio.run(run())
+    # Le client arrivé après les 4 appels de "greedy" passe au deuxième tour, pas en dernier
+    assert order == ["greedy0", "polite0", "greedy1", "greedy2", "greedy3"]
+    assert stats["queued"] == 0 and stats["delayed"] == 5
+
+
+def test_budget_queue_full_sheds_with_retry_after(api, stub, monkeypatch):
+    monkeypatch.setattr(main, "upstream_budget", UpstreamBudget(per_minute=60, burst=1, max_queue=0))
+    assert api.get("/station/hourly?station=FRPARIS").status_code == 200
+    r = api.get("/station/daily?station=FRPARIS")
+    assert r.status_code == 503 and int(r.headers["retry-after"]) >= 1
+    assert stub.hits == 1
+
+    async def full():
+        with pytest.raises(BudgetExhausted):
+            await main.upstream_budget.acquire("x")
+    asyncio.run(full())
@@ -0,0 +1,34 @@
+import json
+
+from main import Station
+from registry import StationRegistry
+from stations import STATIONS
+
+
+def test_stations_json_matches_response_model(api):
+    r = api.get("/stations")
+    assert r.status_code == 200
+    assert r.json() == [Station(**s).model_dump() for s in STATIONS]
+    fr = api.get("/stations?country=FR").json()
+    assert fr and all(s["country"] == "FR" for s in fr)
+    assert len(fr) == sum(1 for s in STATIONS if s["country"] == "FR")
+    assert api.get("/stations?country=ZZ").json() == []
+
+
+def test_registry_lookups():
+    registry = StationRegistry(STATIONS)
+    assert len(registry) == len(STATIONS)
+    assert registry.get("FRPARIS") == STATIONS[0]
+    assert registry.coords("USNYC") == (40.7128, -74.006)
+    assert registry.get("NOPE") is None and registry.coords("NOPE") is None
+    # Identifiant en double : la première occurrence fait foi partout
+    first = next(s for s in STATIONS if s["id"] == "INBHIWA")
+    assert registry.get("INBHIWA") == first
+    assert registry.coords("INBHIWA") == (first["lat"], first["lon"])
+    assert json.loads(registry.json("FR")) is not None and registry.json("FR") is registry.json("FR")
+
+
+def test_meta_and_search_use_registry(api):
+    assert api.get("/station/meta?station=FRPARIS").json() == STATIONS[0]
+    assert api.get("/station/meta?station=NOPE").status_code == 404
+    assert [s["id"] for s in api.get("/station/search?name=paris").json()] == ["FRPARIS"]
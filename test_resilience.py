@@ -0,0 +1,80 @@
+import time
+
+import config
+import main
+from circuit import CircuitBreaker
+
+
+def expire(path_prefix, seconds):
+    # Vieillit les entrées du cache comme si `seconds` s'étaient écoulées
+    for (url, _), entry in main.response_cache._entries.items():
+        if url.startswith(path_prefix):
+            entry.stored_at -= seconds
+
+
+def test_breaker_opens_then_probes_after_cooldown():
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=3, cooldown=10.0, clock=lambda: now[0])
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.failure()
+    assert breaker.state == "open" and not breaker.allow() and breaker.retry_after == 10.0
+    now[0] = 10.0
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # une seule requête d'essai
+    breaker.failure()
+    assert breaker.state == "open" and breaker.trips == 1
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_stale_if_error(api, stub):
+    fresh = api.get("/station/hourly?station=FRPARIS")
+    expire(main.provider.source("hourly"), config.CACHE_TTLS["hourly"] + config.CACHE_STALE_WHILE_REVALIDATE + 1)
+    stub.error_rate = 1.0
+    r = api.get("/station/hourly?station=FRPARIS")
+    assert r.status_code == 200 and r.content == fresh.content
+    assert r.headers["warning"].startswith("110") and int(r.headers["x-stale-seconds"]) > 0
+    assert stub.errors == 1
+
+
+def test_stale_while_revalidate_refreshes_in_background(api, stub):
+    api.get("/station/daily?station=FRPARIS")
+    expire(main.provider.source("hourly"), config.CACHE_TTLS["daily"] + 1)
+    r = api.get("/station/daily?station=FRPARIS")
+    assert r.status_code == 200 and "warning" in r.headers
+    deadline = time.monotonic() + 2
+    while stub.hits < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stub.hits == 2
+    assert "warning" not in api.get("/station/daily?station=FRPARIS").headers
+
+
+def test_latency_budget(api, stub, monkeypatch):
+    monkeypatch.setitem(config.LATENCY_BUDGETS, "hourly", 0.05)
+    stub.latency = 0.3
+    start = time.perf_counter()
+    r = api.get("/point/hourly?lat=10&lon=10")
+    assert r.status_code == 504 and time.perf_counter() - start < 0.25
+    # L'appel a continué en arrière-plan et a rempli le cache
+    time.sleep(0.4)
+    r = api.get("/point/hourly?lat=10&lon=10")
+    assert r.status_code == 200 and "warning" not in r.headers
+    # Entrée expirée + upstream trop lent : réponse de secours dans le budget
+    expire(main.provider.source("hourly"), config.CACHE_TTLS["hourly"] + config.CACHE_STALE_WHILE_REVALIDATE + 1)
+    start = time.perf_counter()
+    r = api.get("/point/hourly?lat=10&lon=10")
+    assert r.status_code == 200 and "warning" in r.headers and time.perf_counter() - start < 0.25
+
+
+def test_circuit_breaker_stops_upstream_traffic(api, stub):
+    stub.error_rate = 1.0
+    for i in range(config.CIRCUIT_FAILURE_THRESHOLD):
+        assert api.get(f"/point/daily?lat={i}&lon=0").status_code == 502
+    r = api.get("/point/daily?lat=50&lon=0")
+    assert r.status_code == 503 and int(r.headers["retry-after"]) > 0
+    assert stub.hits == config.CIRCUIT_FAILURE_THRESHOLD
+    circuits = api.get("/stats").json()["circuits"]
+    assert circuits["api.open-meteo.com"]["state"] == "open"
@@ -0,0 +1,40 @@
+from search import SearchIndex, edit_distance, normalize
+
+NAMES = ["Paris", "Parma", "São Paulo", "Bogotá", "New York", "Newcastle", "York", "Saint-Étienne", "Compiègne"]
+
+
+def names(index, query, **kw):
+    return [NAMES[i] for i in index.search(query, **kw)]
+
+
+def test_normalize_strips_accents_and_punctuation():
+    assert normalize("São Paulo") == "sao paulo"
+    assert normalize("Saint-Étienne") == "saint etienne"
+
+
+def test_ranking_exact_prefix_word_substring():
+    index = SearchIndex(NAMES)
+    assert names(index, "york") == ["York", "New York"]
+    assert names(index, "new") == ["New York", "Newcastle"]
+    assert names(index, "par") == ["Paris", "Parma"]
+    assert names(index, "iegn") == ["Compiègne"]
+    assert names(index, "par", limit=1) == ["Paris"]
+
+
+def test_accent_insensitive_and_fuzzy():
+    index = SearchIndex(NAMES)
+    assert names(index, "bogota") == ["Bogotá"]
+    assert names(index, "SAO PAULO") == ["São Paulo"]
+    assert names(index, "saint etienne") == ["Saint-Étienne"]
+    assert names(index, "Prais") == ["Paris"]
+    assert names(index, "Prais", fuzzy=False) == []
+    assert edit_distance("prais", "paris", 1) == 1
+    assert edit_distance("abcdef", "uvwxyz", 1) == 2
+
+
+def test_search_endpoint(api):
+    r = api.get("/station/search", params={"name": "bogota"})
+    assert r.status_code == 200 and r.json()[0]["id"] == "COBOGOT"
+    r = api.get("/station/search", params={"name": "san", "limit": 3})
+    assert len(r.json()) == 3
+    assert api.get("/station/search", params={"name": "zzzzqq"}).status_code == 404
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+import main
+from singleflight import SingleFlight
+
+
+def test_burst_of_identical_requests_hits_upstream_once(stub):
+    stub.latency = 0.05
+    flights = main.upstream_flights
+    before = flights.coalesced
+
+    async def burst():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test",
+                                     headers={"x-rapidapi-host": "testhost", "x-rapidapi-user": "burst",
+                                              "x-rapidapi-subscription": "MEGA"}) as client:
+            responses = await asyncio.gather(*(
+                client.get("/station/hourly", params={"station": "FRPARIS"}) for _ in range(100)))
+        await main.upstream.aclose()
+        return responses
+
+    responses = asyncio.run(burst())
+    assert all(r.status_code == 200 for r in responses)
+    assert stub.hits == 1
+    assert flights.coalesced - before == 99
+    assert flights.inflight == 0
+
+
+def test_errors_are_shared_and_not_kept():
+    flights = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        results = await asyncio.gather(*(flights.do("k", failing) for _ in range(5)),
+                                       return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        with pytest.raises(ValueError):
+            await flights.do("k", failing)
+
+    asyncio.run(run())
+    assert len(calls) == 2 and flights.coalesced == 4
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    flights = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        first = asyncio.ensure_future(flights.do("k", slow))
+        second = asyncio.ensure_future(flights.do("k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "ok"
+
+    asyncio.run(run())
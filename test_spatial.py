@@ -0,0 +1,41 @@
+import random
+
+from main import haversine
+from spatial import StationIndex
+from stations import STATIONS
+
+
+def linear_scan(stations, lat, lon):
+    return sorted(((s, haversine(lat, lon, s["lat"], s["lon"])) for s in stations), key=lambda x: x[1])
+
+
+def test_index_matches_linear_scan():
+    rng = random.Random(1)
+    stations = [{"id": str(i), "lat": rng.uniform(-90, 90), "lon": rng.uniform(-180, 180)}
+                for i in range(3000)]
+    index = StationIndex([s["lat"] for s in stations], [s["lon"] for s in stations])
+    for _ in range(200):
+        lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        expected = linear_scan(stations, lat, lon)
+        got = index.query(lat, lon, k=7)
+        assert [stations[i]["id"] for i, _ in got] == [s["id"] for s, _ in expected[:7]]
+        for (_, d), (_, e) in zip(got, expected):
+            assert abs(d - e) < 1e-6
+
+
+def test_radius_query_and_antimeridian():
+    index = StationIndex([s["lat"] for s in STATIONS], [s["lon"] for s in STATIONS])
+    # Suva (178.45) et Apia (-171.77) sont proches malgré le changement de signe
+    ids = [STATIONS[i]["id"] for i, _ in index.query(-18.1248, 178.4501, k=2)]
+    assert ids == ["FJSUVA", "WSAPIA"]
+    within = index.query(48.8566, 2.3522, k=1000, radius_km=500)
+    assert within and all(d <= 500 for _, d in within)
+    assert len(within) == sum(1 for s in STATIONS if haversine(48.8566, 2.3522, s["lat"], s["lon"]) <= 500)
+
+
+def test_nearby_endpoint_returns_distances(api):
+    r = api.get("/station/nearby?lat=48.8566&lon=2.3522&k=3")
+    assert r.status_code == 200
+    data = r.json()
+    assert len(data) == 3 and data[0]["id"] == "FRPARIS" and data[0]["distance_km"] == 0
+    assert data[0]["distance_km"] <= data[1]["distance_km"] <= data[2]["distance_km"]
@@ -0,0 +1,53 @@
+import asyncio
+import httpx
+from fastapi.testclient import TestClient
+
+import main
+from upstream import UpstreamPool
+
+FORECAST = "https://api.open-meteo.com/v1/forecast"
+CLIMATE = "https://climate-api.open-meteo.com/v1/climate"
+
+
+def make_pool(calls):
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"host": request.url.host})
+    return UpstreamPool(transport=httpx.MockTransport(handler),
+                        timeouts={"climate-api.open-meteo.com": 60.0}, default_timeout=10.0)
+
+
+def test_pool_reuses_one_client_per_host():
+    calls = []
+    pool = make_pool(calls)
+
+    async def run():
+        a = pool.client_for(FORECAST)
+        assert pool.client_for(FORECAST + "?x=1") is a
+        assert pool.client_for(CLIMATE) is not a
+        r = await pool.get(FORECAST, params={"latitude": 1})
+        assert r.json() == {"host": "api.open-meteo.com"}
+        await pool.aclose()
+        assert a.is_closed
+
+    asyncio.run(run())
+    assert calls[0].url.params["latitude"] == "1"
+
+
+def test_pool_per_host_timeouts():
+    pool = make_pool([])
+
+    async def run():
+        assert pool.client_for(CLIMATE).timeout.read == 60.0
+        assert pool.client_for(FORECAST).timeout.read == 10.0
+        await pool.aclose()
+
+    asyncio.run(run())
+
+
+def test_lifespan_opens_and_closes_pool():
+    with TestClient(main.app):
+        clients = list(main.upstream._clients.values())
+        assert clients and not any(c.is_closed for c in clients)
+    assert all(c.is_closed for c in clients)
+    assert main.upstream._clients == {}
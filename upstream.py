@@ -0,0 +1,221 @@
+# Pool de connexions HTTP partagé vers les API Open-Meteo
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+import config
+from circuit import CircuitBreaker
+from concurrency import AdaptiveLimiter
+from metrics import stage, upstream_in_flight, upstream_responses, upstream_seconds
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class UpstreamPool:
+    """Un client httpx par hôte, réutilisé par tous les endpoints (keep-alive, HTTP/2)."""
+
+    def __init__(self, limits=None, http2=None, timeouts=None, default_timeout=None,
+                 connect_timeout=None, transport=None, failure_threshold=None, cooldown=None,
+                 adaptive=None):
+        self.limits = limits or httpx.Limits(
+            max_connections=config.UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=config.UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=config.UPSTREAM_KEEPALIVE_EXPIRY,
+        )
+        if http2 is None:
+            http2 = config.UPSTREAM_HTTP2
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.timeouts = dict(config.UPSTREAM_TIMEOUTS if timeouts is None else timeouts)
+        self.default_timeout = default_timeout or config.UPSTREAM_DEFAULT_TIMEOUT
+        self.connect_timeout = connect_timeout or config.UPSTREAM_CONNECT_TIMEOUT
+        # Transport injectable (tests, stubs locaux)
+        self.transport = transport
+        self.failure_threshold = failure_threshold or config.CIRCUIT_FAILURE_THRESHOLD
+        self.cooldown = config.CIRCUIT_COOLDOWN if cooldown is None else cooldown
+        # Un disjoncteur par hôte
+        self.breakers = {}
+        # Une limite de concurrence adaptative par endpoint, hôte + chemin : coûts différents
+        # (prévisions, climat sur 30 ans) ; désactivable pour comparer
+        self.adaptive = config.CONCURRENCY_ENABLED if adaptive is None else adaptive
+        self.limiters = {}
+        self._clients = {}
+        self._loop = None
+
+    def timeout_for(self, host):
+        read = self.timeouts.get(host, self.default_timeout)
+        return httpx.Timeout(read, connect=min(self.connect_timeout, read))
+
+    def client_for(self, url):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Les connexions sont liées à une boucle : hors lifespan (TestClient sans
+            # `with`), chaque nouvelle boucle repart avec ses propres clients.
+            self._clients, self._loop = {}, loop
+        host = urlsplit(url).netloc
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout_for(urlsplit(url).hostname),
+                transport=self.transport,
+            )
+            self._clients[host] = client
+        return client
+
+    async def start(self, urls=()):
+        # Ouvre à l'avance les clients des hôtes connus
+        for url in urls:
+            self.client_for(url)
+
+    def breaker_for(self, host):
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(self.failure_threshold, self.cooldown)
+        return breaker
+
+    def limiter_for(self, endpoint):
+        limiter = self.limiters.get(endpoint)
+        if limiter is None:
+            limiter = self.limiters[endpoint] = AdaptiveLimiter(
+                initial=config.CONCURRENCY_INITIAL,
+                min_limit=config.CONCURRENCY_MIN,
+                max_limit=config.CONCURRENCY_MAX,
+                backoff=config.CONCURRENCY_BACKOFF,
+                tolerance=config.CONCURRENCY_TOLERANCE,
+                max_queue=config.CONCURRENCY_MAX_QUEUE,
+                queue_timeout=config.CONCURRENCY_QUEUE_TIMEOUT,
+                window=config.CONCURRENCY_WINDOW,
+            )
+        return limiter
+
+    async def get(self, url, params=None):
+        return await self._send(url, params, stream=False)
+
+    async def stream(self, url, params=None):
+        """Réponse dont le corps n'est pas encore lu (aiter_bytes puis aclose)."""
+        return await self._send(url, params, stream=True)
+
+    async def _send(self, url, params, stream):
+        parts = urlsplit(url)
+        host = parts.hostname
+        # Place dans la limite de concurrence d'abord : un appel refusé ici ne consomme pas
+        # la sonde d'un disjoncteur semi-ouvert
+        limiter = self.limiter_for(parts.netloc + parts.path) if self.adaptive else None
+        if limiter is not None and not await limiter.acquire():
+            upstream_responses.inc((host, "shed"))
+            raise UpstreamOverloaded(host, limiter.retry_after)
+        breaker = self.breaker_for(host)
+        if not breaker.allow():
+            if limiter is not None:
+                limiter.cancel()
+            upstream_responses.inc((host, "circuit_open"))
+            raise CircuitOpenError(host, breaker.retry_after)
+        client = self.client_for(url)
+        labels = (host,)
+        upstream_in_flight.inc(labels)
+        start = time.perf_counter()
+        status = "error"
+        overloaded = True
+        held = limiter
+        try:
+            with stage("upstream"):
+                r = await client.send(client.build_request("GET", url, params=params), stream=stream)
+            status = r.status_code
+            overloaded = status >= 500 or status == 429
+            if stream and held is not None and not overloaded:
+                # Streaming : la place reste prise jusqu'à la fermeture de la réponse (corps compris),
+                # comme pour get() dont le temps mesuré inclut la lecture du corps
+                r.aclose = release_on_close(r.aclose, held, start)
+                held = None
+        except httpx.TimeoutException as e:
+            status = "timeout"
+            breaker.failure()
+            raise UpstreamTimeout() from e
+        except httpx.TransportError as e:
+            breaker.failure()
+            raise UpstreamError(502) from e
+        finally:
+            elapsed = time.perf_counter() - start
+            upstream_in_flight.dec(labels)
+            upstream_seconds.observe(labels, elapsed)
+            upstream_responses.inc((host, status))
+            if held is not None:
+                held.release(elapsed, dropped=overloaded)
+        # 5xx et 429 : l'hôte est en difficulté ; 4xx : requête invalide, hôte sain
+        if overloaded:
+            breaker.failure()
+        else:
+            breaker.success()
+        return r
+
+    def stats(self):
+        return {host: breaker.stats() for host, breaker in self.breakers.items()}
+
+    def concurrency_stats(self):
+        return {endpoint: limiter.stats() for endpoint, limiter in self.limiters.items()}
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+def release_on_close(aclose, limiter, start):
+    """aclose() d'une réponse en streaming qui rend sa place au limiteur, une seule fois."""
+    released = False
+
+    async def close():
+        nonlocal released
+        try:
+            await aclose()
+        finally:
+            if not released:
+                released = True
+                limiter.release(time.perf_counter() - start)
+
+    return close
+
+
+class UpstreamError(Exception):
+    """Réponse non-200 d'Open-Meteo."""
+
+    def __init__(self, status_code):
+        super().__init__(f"Open-Meteo a répondu {status_code}")
+        self.status_code = status_code
+
+    @property
+    def transient(self):
+        # Panne ou surcharge de l'upstream (par opposition à une requête refusée)
+        return self.status_code >= 500 or self.status_code == 429
+
+
+class UpstreamTimeout(UpstreamError):
+    """Open-Meteo n'a pas répondu dans le délai imparti."""
+
+    def __init__(self):
+        super().__init__(504)
+
+
+class CircuitOpenError(UpstreamError):
+    """Disjoncteur ouvert : l'hôte n'est pas appelé avant `retry_after` secondes."""
+
+    def __init__(self, host, retry_after):
+        super().__init__(503)
+        self.host = host
+        self.retry_after = retry_after
+
+
+class UpstreamOverloaded(UpstreamError):
+    """File d'attente de la limite de concurrence pleine ou délai dépassé : réessayer après `retry_after` secondes."""
+
+    def __init__(self, host, retry_after):
+        super().__init__(503)
+        self.host = host
+        self.retry_after = retry_after